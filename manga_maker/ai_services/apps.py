@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AiServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_services'
+
+    def ready(self):
+        from . import telemetry
+        from .blob_store import BlobStore
+        telemetry.configure_from_settings()
+        BlobStore.start_sweeper()
\ No newline at end of file
@@ -1,6 +1,8 @@
 # ai_services/base.py
 from abc import ABC, abstractmethod
 
+from .sessions import ProviderSessions
+
 class AIService(ABC):
     @abstractmethod
     def configure(self, **kwargs):
@@ -9,6 +11,16 @@ class AIService(ABC):
     @abstractmethod
     def execute(self, input_data):
         pass
+    
+    @property
+    def session(self):
+        """Pooled keep-alive HTTP session for this provider's API"""
+        return ProviderSessions.session_for(self.api_url)
+    
+    def endpoints(self):
+        """URLs worth connecting to before the first request, e.g. at worker start"""
+        api_url = getattr(self, 'api_url', None)
+        return [api_url] if api_url else []
 
 # ai_services/llm.py
 class LLMService(AIService):
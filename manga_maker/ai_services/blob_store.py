@@ -0,0 +1,191 @@
+# ai_services/blob_store.py
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from . import telemetry
+from .models import ImageBlob
+from .postprocessing import SOURCE_PREFIX, ImageVariantService
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    Content-addressed panel image storage on top of default_storage
+
+    Images are stored once under manga_panels/<sha256>.<ext>, so identical
+    renders (shared seeds, retries, cached previews) share one file. Each
+    ImageBlob counts the Panel rows showing it; blobs nobody references for
+    longer than MANGA_BLOB_GRACE_SECONDS are reclaimed by sweep().
+    """
+    _sweeper = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def put(cls, image_data, extension='png'):
+        """
+        Store image bytes, reusing the existing blob if identical bytes were stored before
+
+        Args:
+            image_data (bytes): Encoded image
+            extension (str): File extension for newly written blobs
+
+        Returns:
+            str: Storage path of the blob
+        """
+        with telemetry.span('storage.put_image', size=len(image_data)):
+            digest = hashlib.sha256(image_data).hexdigest()
+            path = f"{SOURCE_PREFIX}{digest}.{extension}"
+
+            # Touching the row keeps the sweeper off a blob that is about to gain a reference
+            stored = ImageBlob.objects.filter(digest=digest).update(last_stored_at=timezone.now())
+            if stored:
+                path = ImageBlob.objects.values_list('path', flat=True).get(digest=digest)
+                telemetry.increment('blob_store.dedup_hits')
+            else:
+                ImageBlob.objects.get_or_create(
+                    digest=digest, defaults={'path': path, 'size': len(image_data)}
+                )
+
+            if not default_storage.exists(path):
+                saved = default_storage.save(path, ContentFile(image_data))
+                if saved != path:
+                    # A concurrent writer got there first; keep its copy
+                    default_storage.delete(saved)
+                else:
+                    telemetry.increment('blob_store.bytes_stored', len(image_data))
+                ImageVariantService.register_source(path, image_data)
+
+            return path
+
+    @staticmethod
+    def digest_for_url(image_url):
+        """
+        Return the content hash encoded in a stored panel image URL
+
+        Args:
+            image_url (str): Panel.image_url
+
+        Returns:
+            str: SHA-256 hex digest, or None for provider-hosted or legacy images
+        """
+        base_url = default_storage.base_url
+        if not image_url or not base_url or not image_url.startswith(base_url + SOURCE_PREFIX):
+            return None
+        digest = image_url[len(base_url) + len(SOURCE_PREFIX):].rsplit('.', 1)[0]
+        if len(digest) != 64 or '/' in digest:
+            return None
+        return digest
+
+    @classmethod
+    def retain(cls, image_url):
+        """Record one more Panel row showing image_url"""
+        cls._adjust(image_url, 1)
+
+    @classmethod
+    def release(cls, image_url):
+        """Record that a Panel row no longer shows image_url"""
+        cls._adjust(image_url, -1)
+
+    @classmethod
+    def swap(cls, old_url, new_url):
+        """Move one reference from old_url to new_url"""
+        if old_url != new_url:
+            cls.retain(new_url)
+            cls.release(old_url)
+
+    @classmethod
+    def _adjust(cls, image_url, delta):
+        digest = cls.digest_for_url(image_url)
+        if digest:
+            ImageBlob.objects.filter(digest=digest).update(
+                ref_count=F('ref_count') + delta, last_stored_at=timezone.now()
+            )
+
+    @classmethod
+    def sweep(cls, grace_seconds=None, batch_size=500):
+        """
+        Delete blobs that no Panel has referenced for the grace period
+
+        The grace period covers images that were stored but whose Panel row
+        hasn't been written yet. Variants derived from a blob go with it.
+
+        Args:
+            grace_seconds (int, optional): Defaults to MANGA_BLOB_GRACE_SECONDS
+            batch_size (int): Candidates examined per query
+
+        Returns:
+            tuple: (blobs_removed, bytes_freed)
+        """
+        if grace_seconds is None:
+            grace_seconds = getattr(settings, 'MANGA_BLOB_GRACE_SECONDS', 60 * 60)
+        cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+
+        removed = freed = 0
+        while True:
+            candidates = list(
+                ImageBlob.objects.filter(ref_count__lte=0, last_stored_at__lt=cutoff)
+                .values_list('digest', 'path', 'size')[:batch_size]
+            )
+            if not candidates:
+                break
+
+            for digest, path, size in candidates:
+                # Conditional delete: skip blobs that were re-stored or re-referenced meanwhile
+                deleted, _ = ImageBlob.objects.filter(
+                    digest=digest, ref_count__lte=0, last_stored_at__lt=cutoff
+                ).delete()
+                if not deleted:
+                    continue
+                default_storage.delete(path)
+                ImageVariantService.delete_variants(digest)
+                removed += 1
+                freed += size
+
+            if len(candidates) < batch_size:
+                break
+
+        telemetry.increment('blob_store.swept', removed)
+        return removed, freed
+
+    @classmethod
+    def start_sweeper(cls, interval=None):
+        """
+        Run sweep() periodically in a daemon thread
+
+        Args:
+            interval (int, optional): Seconds between sweeps; defaults to MANGA_BLOB_SWEEP_INTERVAL
+        """
+        interval = interval or getattr(settings, 'MANGA_BLOB_SWEEP_INTERVAL', None)
+        if not interval:
+            return
+        with cls._lock:
+            if cls._sweeper is not None:
+                return
+            cls._sweeper = threading.Thread(
+                target=cls._sweep_forever, args=(interval,), name='blob-sweeper', daemon=True
+            )
+            cls._sweeper.start()
+
+    @classmethod
+    def _sweep_forever(cls, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                removed, freed = cls.sweep()
+                if removed:
+                    logger.info("Reclaimed %d orphaned panel images (%d bytes)", removed, freed)
+            except Exception:
+                logger.exception("Panel image sweep failed")
+            finally:
+                close_old_connections()
\ No newline at end of file
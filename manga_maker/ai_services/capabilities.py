@@ -0,0 +1,114 @@
+# ai_services/capabilities.py
+"""
+What a provider supports, and parameters compiled against it
+
+Each adapter declares a ProviderCapabilities. Generation parameters (the
+tier's quality settings) are compiled against it once into a
+PayloadTemplate: provider defaults merged with the parameters, names
+mapped to the provider's, sizes fitted to what it accepts, all frozen.
+A call only copies the template and adds its per-call values.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+ProviderCapabilities = namedtuple('ProviderCapabilities', [
+    'service_type',        # 'llm' or 'image'
+    'sizes',               # Allowed (width, height) pairs; empty for any size
+    'size_step',           # Width and height are rounded to a multiple of this
+    'max_size',            # Largest width or height accepted, or None
+    'max_batch',           # Images per request
+    'parameter_map',       # Our parameter name -> the provider's, or None to keep it out of the payload
+    'defaults',            # Provider defaults, under the provider's names
+    'per_call',            # Parameters that change on every call, left out of compiled templates
+    'max_input_chars',     # Longest prompt or narrative sent in one request
+    'max_output_tokens',
+    'supports_async',      # Jobs are started and polled rather than answered inline
+    'supports_streaming',
+], defaults=((), 1, None, 1, MappingProxyType({}), MappingProxyType({}), ('seed',), None, None, False, False))
+
+
+def fit_size(capabilities, width, height):
+    """
+    Fit a requested size to what a provider accepts
+
+    Picks the listed size closest in aspect ratio and then area, or rounds
+    to size_step and caps at max_size when any size is allowed.
+
+    Returns:
+        tuple: (width, height)
+    """
+    if capabilities.sizes:
+        return min(
+            capabilities.sizes,
+            key=lambda size: (abs(size[0] / size[1] - width / height), abs(size[0] * size[1] - width * height))
+        )
+    step = capabilities.size_step
+    width, height = max(step, round(width / step) * step), max(step, round(height / step) * step)
+    if capabilities.max_size and max(width, height) > capabilities.max_size:
+        scale = capabilities.max_size / max(width, height)
+        width, height = max(step, int(width * scale) // step * step), max(step, int(height * scale) // step * step)
+    return width, height
+
+
+class PayloadTemplate:
+    """
+    Immutable provider payload fields compiled from generation parameters
+
+    Args:
+        capabilities (ProviderCapabilities): The provider's descriptor
+        parameters (dict, optional): Generation parameters under our names;
+            per-call ones are ignored here and supplied to build()
+        shape (callable, optional): Final adjustment of the fields to the
+            provider's request format, e.g. combining width and height
+    """
+    __slots__ = ('fields', 'capabilities', '_per_call_names')
+
+    def __init__(self, capabilities, parameters=None, shape=None):
+        fields = dict(capabilities.defaults)
+        mapping = capabilities.parameter_map
+        for name, value in (parameters or {}).items():
+            if name in capabilities.per_call:
+                continue
+            provider_name = mapping.get(name, name)
+            if provider_name is not None:
+                fields[provider_name] = value
+        if 'width' in fields and 'height' in fields:
+            fields['width'], fields['height'] = fit_size(capabilities, fields['width'], fields['height'])
+        fields = {name: value for name, value in fields.items() if value is not None}
+        if shape is not None:
+            fields = shape(fields)
+
+        self.fields = MappingProxyType(fields)
+        self.capabilities = capabilities
+        self._per_call_names = {
+            name: mapping.get(name, name) for name in capabilities.per_call if mapping.get(name, name) is not None
+        }
+
+    def build(self, parameters=None, **extra):
+        """
+        Return a new payload dict: the compiled fields plus per-call values
+
+        Args:
+            parameters (dict, optional): The call's parameters; only per-call ones are read
+            **extra: Payload fields to add as they are, e.g. prompt=...
+
+        Returns:
+            dict: A fresh payload the caller may modify
+        """
+        payload = dict(self.fields)
+        if parameters:
+            for name, provider_name in self._per_call_names.items():
+                value = parameters.get(name)
+                if value is not None:
+                    payload[provider_name] = value
+        payload.update(extra)
+        return payload
+
+    @staticmethod
+    def key(capabilities, parameters):
+        """Hashable identity of the compiled part of parameters"""
+        if not parameters:
+            return ()
+        return tuple(sorted(
+            (name, value) for name, value in parameters.items() if name not in capabilities.per_call
+        ))
\ No newline at end of file
@@ -0,0 +1,208 @@
+# ai_services/chunking.py
+import math
+import re
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from django.conf import settings
+
+# Blank lines and "***" / "* * *" / "---" divider lines mark scene breaks
+SCENE_BREAK_PATTERN = re.compile(r"\n[ \t]*(?:(?:\*[ \t]*){3,}|-{3,}[ \t]*)?\n")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?…])\s+")
+
+NarrativeChunk = namedtuple('NarrativeChunk', ['index', 'start', 'end', 'text', 'context'])
+
+
+class NarrativeChunker:
+    """
+    Split book-length narratives into scene-aligned chunks
+
+    Chunks are produced lazily and never exceed max_chars. Each chunk carries
+    the tail of the text before it as context, so the LLM keeps continuity
+    across chunk boundaries without re-illustrating the overlap.
+    """
+
+    def __init__(self, max_chars=None, overlap_chars=None):
+        self.max_chars = max_chars or getattr(settings, 'LLM_NARRATIVE_CHUNK_CHARS', 6000)
+        self.overlap_chars = (
+            overlap_chars if overlap_chars is not None
+            else getattr(settings, 'LLM_NARRATIVE_CHUNK_OVERLAP', 500)
+        )
+
+    def iter_chunks(self, text):
+        """
+        Yield NarrativeChunk tuples covering the text in order
+
+        Args:
+            text (str): Narrative to split
+
+        Yields:
+            NarrativeChunk: Chunk text with its offsets and preceding context
+        """
+        index = 0
+        chunk_start = None
+        chunk_end = None
+
+        for start, end in self._iter_segments(text):
+            if chunk_start is not None and end - chunk_start > self.max_chars:
+                yield self._make_chunk(text, index, chunk_start, chunk_end)
+                index += 1
+                chunk_start = None
+
+            if chunk_start is None:
+                chunk_start = start
+            chunk_end = end
+
+        if chunk_start is not None:
+            yield self._make_chunk(text, index, chunk_start, chunk_end)
+
+    def _make_chunk(self, text, index, start, end):
+        context = ""
+        if start and self.overlap_chars:
+            context = text[max(0, start - self.overlap_chars):start]
+            # Start the context at a sentence boundary when there is one
+            boundary = SENTENCE_END_PATTERN.search(context)
+            if boundary and boundary.end() < len(context):
+                context = context[boundary.end():]
+            context = context.strip()
+        return NarrativeChunk(index, start, end, text[start:end].strip(), context)
+
+    def _iter_segments(self, text):
+        """Yield (start, end) offsets of scenes, cutting oversized scenes at sentences"""
+        position = 0
+        for match in SCENE_BREAK_PATTERN.finditer(text):
+            yield from self._split_scene(text, position, match.start())
+            position = match.end()
+        yield from self._split_scene(text, position, len(text))
+
+    def _split_scene(self, text, start, end):
+        if not text[start:end].strip():
+            return
+
+        if end - start <= self.max_chars:
+            yield start, end
+            return
+
+        # Scene is too long: cut at sentence ends, or hard-cut as a last resort
+        sentence_ends = (match.end() for match in SENTENCE_END_PATTERN.finditer(text, start, end))
+        segment_start = start
+        candidate = None
+        for boundary in chain(sentence_ends, [end]):
+            while boundary - segment_start > self.max_chars:
+                if candidate and candidate > segment_start:
+                    cut = candidate
+                else:
+                    cut = segment_start + self.max_chars
+                yield segment_start, cut
+                segment_start = cut
+            candidate = boundary
+        if text[segment_start:end].strip():
+            yield segment_start, end
+
+
+class ChunkedNarrativeParser:
+    """
+    Parse a long narrative chunk by chunk with a bounded number in flight
+
+    Panels are spread across chunks in proportion to their length and the
+    per-chunk panel lists are merged back in narrative order.
+    """
+    _executor = None
+    _lock = threading.Lock()
+
+    def __init__(self, llm_service, chunker=None):
+        self.llm_service = llm_service
+        self.chunker = chunker or NarrativeChunker(max_chars=llm_service.max_narrative_chars)
+
+    @classmethod
+    def get_executor(cls):
+        """Return the executor shared by all chunked parses, creating it on first use"""
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'LLM_CHUNK_CONCURRENCY', 4),
+                        thread_name_prefix='llm-chunk'
+                    )
+        return cls._executor
+
+    def parse(self, text, panel_count=4):
+        """
+        Parse a narrative of any length into panel data
+
+        A chunk whose share rounds to no panels is sent together with the
+        next chunk, so its text is still illustrated. When the two don't fit
+        in one prompt, the earlier one gets a panel of its own instead; only
+        a narrative needing more prompts than panels gets more panels than
+        asked for.
+
+        Args:
+            text (str): Narrative text to parse
+            panel_count (int): Total number of panels wanted
+
+        Returns:
+            list: List of panel data dictionaries in narrative order
+        """
+        total = len(text)
+        window = getattr(settings, 'LLM_CHUNK_CONCURRENCY', 4)
+        executor = self.get_executor()
+        pending = deque()
+        panels = []
+        allocated = 0
+        carried = None
+
+        def submit(chunk, chunk_panels):
+            pending.append(executor.submit(
+                self.llm_service.parse_narrative, chunk.text, chunk_panels, chunk.context
+            ))
+            # Only keep a bounded window of chunks in flight
+            if len(pending) >= window:
+                panels.extend(pending.popleft().result())
+
+        for chunk, is_last in self._with_last(self.chunker.iter_chunks(text)):
+            if carried is not None:
+                merged = f"{carried.text}\n\n{chunk.text}"
+                if len(merged) <= self.chunker.max_chars:
+                    chunk = chunk._replace(start=carried.start, text=merged, context=carried.context)
+                else:
+                    submit(carried, 1)
+                    allocated += 1
+                carried = None
+
+            # Spread panels by text offset, keeping one for each chunk the rest of
+            # the text still needs; the last chunk takes whatever is left
+            if is_last:
+                chunk_panels = panel_count - allocated
+            else:
+                reserve = math.ceil((total - chunk.end) / self.chunker.max_chars)
+                chunk_panels = min(
+                    round(panel_count * chunk.end / total) - allocated,
+                    panel_count - allocated - reserve
+                )
+            if chunk_panels <= 0:
+                if not is_last:
+                    carried = chunk
+                    continue
+                chunk_panels = 1
+            allocated += chunk_panels
+            submit(chunk, chunk_panels)
+
+        while pending:
+            panels.extend(pending.popleft().result())
+
+        return panels
+
+    @staticmethod
+    def _with_last(iterable):
+        """Yield (item, is_last) pairs, looking one item ahead"""
+        iterator = iter(iterable)
+        try:
+            previous = next(iterator)
+        except StopIteration:
+            return
+        for item in iterator:
+            yield previous, False
+            previous = item
+        yield previous, True
\ No newline at end of file
@@ -1,8 +1,16 @@
 # ai_services/image.py
 from .base import AIService
+from .capabilities import PayloadTemplate, ProviderCapabilities
+from .responses import decode_base64
 from abc import abstractmethod
 
+# Compiled templates kept per adapter; tiers and previews need only a handful
+MAX_PAYLOAD_TEMPLATES = 64
+
 class ImageGenerationService(AIService):
+    # Adapters describe their provider; see capabilities.py
+    capabilities = ProviderCapabilities('image')
+    
     @abstractmethod
     def generate_image(self, prompt, parameters=None):
         """
@@ -43,4 +51,82 @@ class ImageGenerationService(AIService):
         if not prompt:
             raise ValueError("Input must contain a 'prompt' field")
             
-        return self.generate_image(prompt, parameters)
\ No newline at end of file
+        return self.generate_image(prompt, parameters)
+    
+    def payload_template(self, parameters=None):
+        """
+        Compile generation parameters into this provider's payload fields, once
+        
+        Templates are memoised on the adapter by the parameters' values, so
+        repeated calls with a tier's settings reuse the same frozen fields;
+        only per-call parameters such as the seed are applied on each call.
+        
+        Args:
+            parameters (dict, optional): Generation parameters; never modified
+            
+        Returns:
+            PayloadTemplate: Immutable; build() returns a fresh payload
+        """
+        try:
+            key = PayloadTemplate.key(self.capabilities, parameters)
+            hash(key)
+        except TypeError:
+            # Unhashable values can't be memoised; compile for this call only
+            return PayloadTemplate(self.capabilities, parameters, shape=self._shape_payload)
+        
+        templates = self.__dict__.setdefault('_payload_templates', {})
+        template = templates.get(key)
+        if template is None:
+            if len(templates) >= MAX_PAYLOAD_TEMPLATES:
+                templates.clear()
+            template = templates.setdefault(
+                key, PayloadTemplate(self.capabilities, parameters, shape=self._shape_payload)
+            )
+        return template
+    
+    def _shape_payload(self, fields):
+        """
+        Adjust compiled payload fields to the provider's request format
+        
+        Runs once per template, not per call. Adapters whose API combines or
+        nests fields override this.
+        
+        Args:
+            fields (dict): Defaults merged with mapped parameters
+            
+        Returns:
+            dict: The fields to freeze into the template
+        """
+        return fields
+    
+    def _save_base64_image(self, base64_string):
+        """
+        Save base64 encoded image and return URL
+        
+        Args:
+            base64_string (str or bytes-like): Base64 encoded image data, possibly
+                a memoryview over a provider response body
+            
+        Returns:
+            str: URL to access the saved image
+        """
+        from django.core.files.storage import default_storage
+        from .blob_store import BlobStore
+        
+        if isinstance(base64_string, str):
+            base64_string = base64_string.encode('ascii')
+        data = memoryview(base64_string)
+        
+        # Remove potential metadata ("data:image/png;base64,") without copying the payload
+        comma = bytes(data[:256]).find(b',')
+        if comma != -1:
+            data = data[comma + 1:]
+            
+        # Decode base64 to binary
+        image_data = decode_base64(data)
+        
+        # Store by content hash; identical images share one file
+        path = BlobStore.put(image_data)
+        
+        # Return the URL
+        return default_storage.url(path)
\ No newline at end of file
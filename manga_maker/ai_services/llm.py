@@ -1,22 +1,66 @@
 # ai_services/llm.py
 from .base import AIService
+from .capabilities import ProviderCapabilities
+from .panel_text import parse_panel_text
 from abc import abstractmethod
 
 class LLMService(AIService):
+    # Adapters describe their provider; see capabilities.py
+    capabilities = ProviderCapabilities('llm', max_input_chars=6000)
+    
+    @property
+    def max_narrative_chars(self):
+        """Narratives longer than this are parsed in chunks to stay within the context window"""
+        return self.capabilities.max_input_chars
+    
     @abstractmethod
-    def parse_narrative(self, text, panel_count=4):
+    def parse_narrative(self, text, panel_count=4, context=None):
         """
         Parse a narrative text and divide it into manga panels
         
         Args:
             text (str): The narrative text to parse
             panel_count (int): Number of panels to divide the narrative into
+            context (str, optional): Preceding story text, given for continuity only
             
         Returns:
             list: A list of panel data dictionaries containing panel details
         """
         pass
     
+    def stream_narrative(self, text, panel_count=4, context=None):
+        """
+        Yield panel data dictionaries as soon as each one is available
+        
+        Adapters that can stream tokens override this so callers can start
+        rendering early panels while later ones are still being written.
+        The default simply parses the whole narrative first.
+        
+        Args:
+            text (str): The narrative text to parse
+            panel_count (int): Number of panels to divide the narrative into
+            context (str, optional): Preceding story text, given for continuity only
+            
+        Yields:
+            dict: Panel data, in narrative order
+        """
+        yield from self.parse_narrative(text, panel_count, context)
+    
+    def _parse_in_chunks(self, text, panel_count=4):
+        """
+        Parse a narrative too long for a single prompt
+        
+        Args:
+            text (str): The narrative text to parse
+            panel_count (int): Total number of panels across the narrative
+            
+        Returns:
+            list: Panel data dictionaries, merged in narrative order
+        """
+        from .chunking import ChunkedNarrativeParser
+        
+        return ChunkedNarrativeParser(self).parse(text, panel_count)
+    
     def execute(self, input_data):
         """
         Execute a generic LLM prompt
@@ -66,30 +110,4 @@ class LLMService(AIService):
         Returns:
             list: List of panel data dictionaries
         """
-        import re
-        
-        # Simple parsing for panel format: Panel 1: description
-        panel_pattern = r"Panel (\d+)[:|-]\s*(.*?)(?=Panel \d+|$)"
-        panels = re.findall(panel_pattern, text, re.DOTALL)
-        
-        if not panels:
-            # Alternative format: 1. description
-            panel_pattern = r"(\d+)[\.|\)]\s*(.*?)(?=\d+[\.|\)]|$)"
-            panels = re.findall(panel_pattern, text, re.DOTALL)
-        
-        if not panels:
-            # Fall back to simple text split
-            lines = [line.strip() for line in text.split("\n") if line.strip()]
-            return [{"description": line, "image_prompt": line} for line in lines[:4]]
-        
-        panel_data = []
-        for num, description in panels:
-            description = description.strip()
-            # Generate an image prompt based on the description
-            image_prompt = f"Manga panel of {description}"
-            panel_data.append({
-                "description": description,
-                "image_prompt": image_prompt
-            })
-        
-        return panel_data
\ No newline at end of file
+        return parse_panel_text(text)
\ No newline at end of file
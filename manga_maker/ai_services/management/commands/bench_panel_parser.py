@@ -0,0 +1,130 @@
+# ai_services/management/commands/bench_panel_parser.py
+import math
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_services.panel_text import parse_panel_text
+from ai_services.streaming import IncrementalPanelParser
+
+# The per-call patterns parse_panel_text replaced, kept for comparison runs
+LEGACY_PATTERNS = [
+    re.compile(r"Panel (\d+)[:|-]\s*(.*?)(?=Panel \d+|$)", re.DOTALL),
+    re.compile(r"(\d+)[\.|\)]\s*(.*?)(?=\d+[\.|\)]|$)", re.DOTALL),
+]
+
+# Inputs that trigger heavy backtracking in naive panel regexes
+PATHOLOGICAL_CASES = {
+    'digit-run': lambda n: "1. " + "9" * n,
+    'header-no-colon': lambda n: "Panel 1 " * (n // 8),
+    'whitespace-run': lambda n: "Panel" + " " * n,
+    'many-panels': lambda n: "Panel 1: a hero appears\n" * (n // 24),
+    'numbered-lines': lambda n: "1) x\n" * (n // 5),
+}
+
+FUZZ_TOKENS = [
+    "Panel", "panel", " ", "\t", "\n", "1", "42", "9999", ":", "-", "|", ".", ")",
+    "Image prompt:", "hero", "{", "\"", "é", "99999",
+]
+
+
+class Command(BaseCommand):
+    help = "Fuzz the panel text parser and check it scales linearly on pathological input"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='25000,50000,100000,200000',
+                            help="Comma-separated input sizes in characters")
+        parser.add_argument('--fuzz-iterations', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--max-growth', type=float, default=3.0,
+                            help="Largest allowed time ratio when the input size doubles")
+        parser.add_argument('--legacy', action='store_true',
+                            help="Also time the old per-call regexes, at a tenth of each size")
+
+    def handle(self, *args, **options):
+        self._fuzz(options['fuzz_iterations'], options['seed'])
+
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        failures = []
+        self.stdout.write(f"{'case':<18}" + "".join(f"{size:>12}" for size in sizes) + f"{'growth':>9}")
+
+        for name, build in PATHOLOGICAL_CASES.items():
+            timings = [self._time(parse_panel_text, build(size)) for size in sizes]
+            growth = self._growth(sizes, timings)
+            self.stdout.write(
+                f"{name:<18}" + "".join(f"{t * 1000:>10.2f}ms" for t in timings) + f"{growth:>9.2f}"
+            )
+            if growth > options['max_growth']:
+                failures.append(name)
+
+            if options['legacy']:
+                legacy_sizes = [size // 10 for size in sizes]
+                legacy = [self._time(self._legacy_parse, build(size), repeat=1) for size in legacy_sizes]
+                self.stdout.write(
+                    f"{'  legacy (n/10)':<18}" + "".join(f"{t * 1000:>10.2f}ms" for t in legacy)
+                    + f"{self._growth(legacy_sizes, legacy):>9.2f}"
+                )
+
+        if failures:
+            raise CommandError(f"Super-linear growth for: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Panel parser is linear on all pathological cases"))
+
+    def _fuzz(self, iterations, seed):
+        """Check parser invariants on random token soup"""
+        rng = random.Random(seed)
+        for _ in range(iterations):
+            text = "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, 200)))
+
+            for panel in parse_panel_text(text):
+                description = panel['description']
+                if not description or description != description.strip() or description not in text:
+                    raise CommandError(f"Bad description {description!r} from {text!r}")
+
+            # Streaming must not depend on how the output is chunked
+            expected = self._stream(text, [len(text)])
+            cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, 8))) if len(text) > 1 else []
+            sizes = [b - a for a, b in zip([0] + cuts, cuts + [len(text)])]
+            if self._stream(text, sizes) != expected:
+                raise CommandError(f"Streaming result depends on chunking for {text!r}")
+
+        self.stdout.write(f"Fuzzed {iterations} inputs without failures")
+
+    @staticmethod
+    def _stream(text, sizes):
+        parser = IncrementalPanelParser()
+        panels = []
+        position = 0
+        for size in sizes:
+            panels.extend(parser.feed(text[position:position + size]))
+            position += size
+        panels.extend(parser.close())
+        return panels
+
+    @staticmethod
+    def _legacy_parse(text):
+        for pattern in LEGACY_PATTERNS:
+            panels = pattern.findall(text)
+            if panels:
+                return panels
+        return []
+
+    @staticmethod
+    def _time(fn, text, repeat=3):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(text)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    @staticmethod
+    def _growth(sizes, timings):
+        """Time ratio per doubling of input size, from the two largest runs"""
+        if len(sizes) < 2 or timings[-2] <= 0:
+            return 1.0
+        doublings = math.log2(sizes[-1] / sizes[-2])
+        if doublings <= 0:
+            return 1.0
+        return (timings[-1] / timings[-2]) ** (1 / doublings)
\ No newline at end of file
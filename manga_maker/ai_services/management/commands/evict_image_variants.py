@@ -0,0 +1,16 @@
+# ai_services/management/commands/evict_image_variants.py
+from django.core.management.base import BaseCommand
+
+from ai_services.postprocessing import ImageVariantService
+
+
+class Command(BaseCommand):
+    help = "Delete least recently requested image variants until the cache fits its size budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-bytes', type=int, default=None,
+                            help="Size budget; defaults to MANGA_VARIANT_CACHE_MAX_BYTES")
+
+    def handle(self, *args, **options):
+        removed, freed = ImageVariantService.evict(options['max_bytes'])
+        self.stdout.write(f"Removed {removed} variants, freed {freed / 1024 ** 2:.1f} MiB")
\ No newline at end of file
@@ -0,0 +1,40 @@
+# ai_services/management/commands/run_mock_providers.py
+from django.core.management.base import BaseCommand
+
+from ai_services.mock_providers import MockProviderConfig, MockProviderServer
+
+
+class Command(BaseCommand):
+    help = "Serve local stand-ins for every image and LLM provider API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8900)
+        parser.add_argument('--latency-ms', type=float, default=500,
+                            help="Median response latency")
+        parser.add_argument('--latency-sigma', type=float, default=0.5,
+                            help="Log-normal spread of the latency; 0 for a fixed latency")
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help="Fraction of requests that fail with HTTP 500")
+        parser.add_argument('--image-bytes', type=int, default=200000,
+                            help="Approximate size of each generated PNG")
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        config = MockProviderConfig(
+            latency_ms=options['latency_ms'],
+            latency_sigma=options['latency_sigma'],
+            error_rate=options['error_rate'],
+            image_bytes=options['image_bytes'],
+            seed=options['seed']
+        )
+        server = MockProviderServer(options['host'], options['port'], config)
+        self.stdout.write(f"Mock providers listening on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            for route, count in sorted(server.requests.items()):
+                self.stdout.write(f"{route:<28}{count:>8}")
\ No newline at end of file
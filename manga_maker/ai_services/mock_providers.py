@@ -0,0 +1,327 @@
+# ai_services/mock_providers.py
+import base64
+import itertools
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from .registry import AIServiceRegistry
+
+PANEL_COUNT_PATTERN = re.compile(r"into (\d{1,3}) manga panels")
+
+
+class MockProviderConfig:
+    """
+    Behaviour of the mock provider endpoints
+
+    Args:
+        latency_ms (float): Median response latency
+        latency_sigma (float): Spread of the log-normal latency distribution; 0 makes it fixed
+        error_rate (float): Fraction of requests answered with HTTP 500
+        image_bytes (int): Approximate size of every generated PNG
+        seed (int, optional): Seed for reproducible latencies and errors
+    """
+
+    def __init__(self, latency_ms=500, latency_sigma=0.5, error_rate=0.0, image_bytes=200000, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.image_bytes = image_bytes
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def sample_latency(self):
+        """Return one latency draw, in seconds"""
+        with self._rng_lock:
+            factor = math.exp(self._rng.gauss(0, self.latency_sigma)) if self.latency_sigma else 1
+        return self.latency_ms * factor / 1000
+
+    def should_fail(self):
+        with self._rng_lock:
+            return self._rng.random() < self.error_rate
+
+
+class MockImageFactory:
+    """
+    Build PNGs of a fixed size that all hash differently
+
+    The pixel data is random (so it doesn't compress) and built once; each
+    image only gets a new text chunk, which keeps content-hash dedup honest.
+    """
+
+    def __init__(self, image_bytes):
+        side = max(8, int(math.sqrt(max(image_bytes, 64) / 3)))
+        rows = b"".join(b"\x00" + random.randbytes(side * 3) for _ in range(side))
+        self._header = b"\x89PNG\r\n\x1a\n" + self._chunk(b"IHDR", struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0))
+        self._body = self._chunk(b"IDAT", zlib.compress(rows, 1)) + self._chunk(b"IEND", b"")
+        self._counter = itertools.count()
+
+    def make(self):
+        """Return the bytes of a new, unique PNG"""
+        tag = f"mock-{next(self._counter)}-{uuid.uuid4().hex}".encode()
+        return self._header + self._chunk(b"tEXt", b"Comment\x00" + tag) + self._body
+
+    @staticmethod
+    def _chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    """Routes requests to the endpoint each provider adapter calls"""
+    server_version = "MockProvider/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "Request body is not JSON"})
+
+        routes = {
+            '/text2img': self._text2img,
+            '/ai/generate-image': self._novelai,
+            '/imagine': self._imagine,
+            '/v1/chat/completions': self._chat,
+        }
+        handler = routes.get(path)
+        if handler is None and path.startswith('/models/'):
+            handler = self._huggingface
+        if handler is None:
+            return self._send_json(404, {"error": f"Unknown endpoint {path}"})
+        self._serve(path, handler, body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith('/job/'):
+            return self._serve('/job', self._job, path[len('/job/'):], delay=False)
+        if path.startswith('/files/'):
+            # Images aren't kept; every download gets fresh bytes of the same size
+            if path[len('/files/'):].rsplit('.', 1)[0] not in self.server.jobs:
+                return self._send_json(404, {"error": "No such file"})
+            return self._send(200, self.server.images.make(), 'image/png')
+        self._send_json(404, {"error": f"Unknown endpoint {path}"})
+
+    def _serve(self, route, handler, body, delay=True):
+        config = self.server.config
+        self.server.count(route)
+        if delay:
+            time.sleep(config.sample_latency())
+        if config.should_fail():
+            self.server.count(f"{route} (error)")
+            return self._send_json(500, {"error": "Mock provider failure"})
+        handler(body)
+
+    # Image providers
+
+    def _text2img(self, body):
+        self._send_json(200, {"images": [self._b64_image()]})
+
+    def _novelai(self, body):
+        self._send_json(200, {"image": self._b64_image()})
+
+    def _imagine(self, body):
+        job_id = uuid.uuid4().hex
+        self.server.jobs[job_id] = time.monotonic() + self.server.config.sample_latency()
+        self._send_json(200, {"job_id": job_id})
+
+    def _job(self, job_id):
+        ready_at = self.server.jobs.get(job_id)
+        if ready_at is None:
+            return self._send_json(404, {"error": "No such job"})
+        if time.monotonic() < ready_at:
+            return self._send_json(200, {"job_id": job_id, "status": "processing"})
+        host, port = self.server.server_address[:2]
+        self._send_json(200, {
+            "job_id": job_id,
+            "status": "completed",
+            "image_url": f"http://{host}:{port}/files/{job_id}.png"
+        })
+
+    def _b64_image(self):
+        return base64.b64encode(self.server.images.make()).decode()
+
+    # LLM providers
+
+    def _huggingface(self, body):
+        panel_count = self._panel_count(body.get('inputs', ''))
+        text = self._panel_text(panel_count) if panel_count else "Basic Grid"
+        self._send_json(200, [{"generated_text": text}])
+
+    def _chat(self, body):
+        prompt = "\n".join(
+            m.get('content', '') for m in body.get('messages', []) if m.get('role') == 'user'
+        )
+        content = self._chat_reply(prompt, bool(body.get('response_format')))
+        if not body.get('stream'):
+            return self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get('model', 'mock'),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+            })
+
+        # Server-sent events, one small delta at a time
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for start in range(0, len(content), 24):
+            chunk = {
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": content[start:start + 24]}}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _chat_reply(self, prompt, json_mode):
+        if "Extract character" in prompt:
+            return json.dumps([
+                {"name": "Akira", "visual_traits": "spiky red hair, green eyes, school uniform"},
+                {"name": "Mei", "visual_traits": "long black hair, glasses, lab coat"}
+            ])
+        if "manga layout template" in prompt:
+            return "Basic Grid"
+        panel_count = self._panel_count(prompt)
+        if panel_count:
+            if json_mode:
+                return json.dumps({"panels": [
+                    {"description": f"Scene {n}", "image_prompt": f"manga panel, scene {n}, dramatic lighting"}
+                    for n in range(1, panel_count + 1)
+                ]})
+            return self._panel_text(panel_count)
+        return "OK"
+
+    @staticmethod
+    def _panel_count(prompt):
+        match = PANEL_COUNT_PATTERN.search(prompt)
+        return int(match.group(1)) if match else 0
+
+    @staticmethod
+    def _panel_text(panel_count):
+        return "\n\n".join(
+            f"Panel {n}: Scene {n}\nImage prompt: manga panel, scene {n}, dramatic lighting"
+            for n in range(1, panel_count + 1)
+        )
+
+    # Responses
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode(), 'application/json')
+
+    def _send(self, status, payload, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    """
+    One local HTTP server that answers for every provider API
+
+    Serves Stable Diffusion /text2img, NovelAI /ai/generate-image,
+    Midjourney /imagine and /job/<id>, Hugging Face /models/<name> and
+    OpenAI /v1/chat/completions (plain and streamed).
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, config=None):
+        super().__init__((host, port), MockProviderHandler)
+        self.config = config or MockProviderConfig()
+        self.images = MockImageFactory(self.config.image_bytes)
+        self.jobs = {}
+        self.requests = Counter()
+        self._counter_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, route):
+        with self._counter_lock:
+            self.requests[route] += 1
+
+    def start(self):
+        """Serve from a daemon thread and return the base URL"""
+        self._thread = threading.Thread(target=self.serve_forever, name='mock-providers', daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def register_mock_providers(base_url):
+    """
+    Point the real provider adapters at a mock server and register them
+
+    Uses the same adapter classes as production, so request building and
+    response handling are exercised too.
+
+    Args:
+        base_url (str): Mock server root, e.g. 'http://127.0.0.1:8900'
+
+    Returns:
+        list: (service_type, provider) pairs that were registered
+    """
+    from .providers.huggingface_llm import HuggingFaceLLMService
+    from .providers.midjourney_adapter import MidjourneyService
+    from .providers.novelai_adapter import NovelAIService
+    from .providers.stable_diffusion_adapter import StableDiffusionService
+
+    registered = []
+
+    stable_diffusion = StableDiffusionService()
+    stable_diffusion.configure(api_key='mock', api_url=base_url)
+    for provider in ('stability-basic', 'stability-standard', 'stability-creative'):
+        AIServiceRegistry.register('image', provider, stable_diffusion)
+        registered.append(('image', provider))
+
+    for provider, service_class in (('midjourney', MidjourneyService), ('novelai', NovelAIService)):
+        service = service_class()
+        service.configure(api_key='mock', api_url=base_url)
+        AIServiceRegistry.register('image', provider, service)
+        registered.append(('image', provider))
+
+    huggingface = HuggingFaceLLMService()
+    huggingface.configure(api_key='mock', model_name='mock-model')
+    huggingface.api_url = f"{base_url}/models/mock-model"
+    AIServiceRegistry.register('llm', 'huggingface', huggingface)
+    registered.append(('llm', 'huggingface'))
+
+    try:
+        import openai
+        from .providers.openai_llm import OpenAILLMService
+    except ImportError:
+        # Without the openai package the OpenAI-backed tiers can't be exercised
+        return registered
+
+    service = OpenAILLMService()
+    service.configure(api_key='mock')
+    openai.api_base = f"{base_url}/v1"
+    AIServiceRegistry.register('llm', 'openai', service)
+    registered.append(('llm', 'openai'))
+    return registered
\ No newline at end of file
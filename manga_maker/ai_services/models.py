@@ -1,3 +1,20 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class ImageBlob(models.Model):
+    """A stored image, addressed by the SHA-256 of its bytes"""
+    digest = models.CharField(max_length=64, primary_key=True)
+    path = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)  # Panel rows showing this image
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_stored_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'last_stored_at'], name='imageblob_orphan_idx')
+        ]
+    
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.ref_count} refs)"
\ No newline at end of file
@@ -0,0 +1,90 @@
+# ai_services/panel_text.py
+import re
+
+# One pass finds both header styles: "Panel 3:" / "Panel 3 -" anywhere, or a
+# "3." / "3)" list marker at the start of a line. Every quantifier is bounded
+# and nothing looks ahead, so scanning is linear in the length of the text.
+PANEL_HEADER_PATTERN = re.compile(
+    r"(?P<panel>Panel[ \t]{0,4}(?P<panel_number>\d{1,4})[ \t]{0,4}[:|-])"
+    r"|(?P<item>^[ \t]{0,8}(?P<item_number>\d{1,4})[.)](?=\s))",
+    re.IGNORECASE | re.MULTILINE
+)
+IMAGE_PROMPT_PATTERN = re.compile(r"Image prompt[ \t]{0,4}:", re.IGNORECASE)
+
+# Longest text a panel header can span, so a header cut across two stream tokens is still found
+HEADER_LOOKBACK = 32
+
+
+def iter_panel_headers(text, pos=0, endpos=None):
+    """
+    Find panel headers in text order
+
+    Args:
+        text (str): LLM output to scan
+        pos (int): Offset to start scanning from
+        endpos (int, optional): Offset to stop scanning at
+
+    Returns:
+        iterator: re.Match objects; group 'panel' is set for "Panel N:"
+            headers and group 'item' for numbered list markers
+    """
+    if endpos is None:
+        endpos = len(text)
+    return PANEL_HEADER_PATTERN.finditer(text, pos, endpos)
+
+
+def build_panel(body):
+    """
+    Turn the text following a panel header into panel data
+
+    Args:
+        body (str): Panel text, optionally containing an "Image prompt:" line
+
+    Returns:
+        dict: Panel data, or None if the body is empty
+    """
+    parts = IMAGE_PROMPT_PATTERN.split(body, maxsplit=1)
+    description = parts[0].strip()
+    if not description:
+        return None
+    image_prompt = parts[1].strip() if len(parts) > 1 else ""
+    return {
+        "description": description,
+        "image_prompt": image_prompt or f"Manga panel of {description}"
+    }
+
+
+def parse_panel_text(text, fallback_limit=4):
+    """
+    Split free-form LLM output into panel data in a single pass
+
+    "Panel N:" headers win over numbered list markers; when neither is
+    present each non-blank line becomes a panel.
+
+    Args:
+        text (str): LLM output
+        fallback_limit (int): Maximum panels taken from the line fallback
+
+    Returns:
+        list: List of panel data dictionaries
+    """
+    panel_starts = []
+    item_starts = []
+    for match in iter_panel_headers(text):
+        if match.group('panel'):
+            panel_starts.append((match.start(), match.end()))
+        else:
+            item_starts.append((match.start(), match.end()))
+
+    headers = panel_starts or item_starts
+    if not headers:
+        lines = [line.strip() for line in text.split("\n") if line.strip()]
+        return [{"description": line, "image_prompt": line} for line in lines[:fallback_limit]]
+
+    panels = []
+    for i, (_, body_start) in enumerate(headers):
+        body_end = headers[i + 1][0] if i + 1 < len(headers) else len(text)
+        panel = build_panel(text[body_start:body_end])
+        if panel:
+            panels.append(panel)
+    return panels
\ No newline at end of file
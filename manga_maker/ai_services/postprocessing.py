@@ -0,0 +1,287 @@
+# ai_services/postprocessing.py
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+SOURCE_PREFIX = 'manga_panels/'
+VARIANT_PREFIX = 'manga_variants/'
+
+# Derived formats served instead of the full-size PNG
+VARIANTS = {
+    'thumb': {'max_size': 320, 'format': 'WEBP', 'quality': 70},
+    'webp': {'max_size': None, 'format': 'WEBP', 'quality': 82},
+    'avif': {'max_size': None, 'format': 'AVIF', 'quality': 60},
+}
+EXTENSIONS = {'WEBP': 'webp', 'AVIF': 'avif'}
+
+
+def render_variant(image_data, spec):
+    """
+    Encode one derived version of an image
+
+    Runs in a worker process, so it only depends on Pillow.
+
+    Args:
+        image_data (bytes): Source image bytes
+        spec (dict): Entry from VARIANTS
+
+    Returns:
+        bytes: Encoded variant
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_data)) as image:
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        if spec['max_size']:
+            image.thumbnail((spec['max_size'], spec['max_size']))
+        output = io.BytesIO()
+        image.save(output, format=spec['format'], quality=spec['quality'])
+        return output.getvalue()
+
+
+class ImageVariantService:
+    """
+    Thumbnails and compressed variants of stored panel images
+
+    Variants are keyed by the SHA-256 of the source bytes, encoded in a
+    process pool and stored under manga_variants/. Eager variants are queued
+    as soon as an image is saved; the rest are built on first request.
+    """
+    _executor = None
+    _available = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls):
+        """Return the shared encoder pool, creating it on first use"""
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    # Forking a process that already runs threads can deadlock the child
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=getattr(settings, 'MANGA_VARIANT_WORKERS', 2),
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return cls._executor
+
+    @classmethod
+    def available_variants(cls):
+        """Return the variant names this install can encode"""
+        if cls._available is None:
+            try:
+                from PIL import features
+            except ImportError:
+                cls._available = []
+            else:
+                cls._available = [
+                    name for name, spec in VARIANTS.items()
+                    if features.check(EXTENSIONS[spec['format']])
+                ]
+        return cls._available
+
+    @staticmethod
+    def content_hash(image_data):
+        return hashlib.sha256(image_data).hexdigest()
+
+    @classmethod
+    def register_source(cls, path, image_data):
+        """
+        Post-process a freshly stored image
+
+        Records its content hash and queues the eager variants in the
+        background without blocking the caller.
+
+        Args:
+            path (str): Storage path the image was saved under
+            image_data (bytes): The stored bytes
+        """
+        digest = cls.content_hash(image_data)
+        cache.set(cls._hash_key(path), digest, None)
+
+        for variant in getattr(settings, 'MANGA_EAGER_VARIANTS', ['thumb']):
+            if variant not in cls.available_variants():
+                continue
+            variant_path = cls._variant_path(digest, variant)
+            future = cls.get_executor().submit(render_variant, image_data, VARIANTS[variant])
+            future.add_done_callback(
+                lambda done, variant_path=variant_path: cls._store(variant_path, done)
+            )
+
+    @classmethod
+    def get_variant_path(cls, source_path, variant):
+        """
+        Return the storage path of a variant, encoding it if needed
+
+        Args:
+            source_path (str): Storage path of the source image
+            variant (str): Variant name from VARIANTS
+
+        Returns:
+            str: Storage path of the variant
+
+        Raises:
+            ValueError: If the variant or source path is not allowed
+            FileNotFoundError: If the source image doesn't exist
+        """
+        if variant not in cls.available_variants():
+            raise ValueError(f"Unsupported image variant: {variant}")
+        if not source_path.startswith(SOURCE_PREFIX) or '..' in source_path:
+            raise ValueError("Variants can only be made from panel images")
+
+        image_data = None
+        digest = cache.get(cls._hash_key(source_path))
+        if digest is None:
+            image_data = cls._read(source_path)
+            digest = cls.content_hash(image_data)
+            cache.set(cls._hash_key(source_path), digest, None)
+
+        variant_path = cls._variant_path(digest, variant)
+
+        if default_storage.exists(variant_path):
+            cls._touch(variant_path)
+        else:
+            if image_data is None:
+                image_data = cls._read(source_path)
+            future = cls.get_executor().submit(render_variant, image_data, VARIANTS[variant])
+            variant_path = cls._store(variant_path, future)
+
+        return variant_path
+
+    @classmethod
+    def variant_urls(cls, image_url):
+        """
+        Build lazy variant URLs for a panel image
+
+        Args:
+            image_url (str): Panel.image_url
+
+        Returns:
+            dict: Variant name to URL; empty for images hosted by a provider
+        """
+        base_url = default_storage.base_url
+        if not image_url or not base_url or not image_url.startswith(base_url + SOURCE_PREFIX):
+            return {}
+        name = image_url[len(base_url) + len(SOURCE_PREFIX):]
+        return {
+            variant: reverse('image-variant', args=[variant, name])
+            for variant in cls.available_variants()
+        }
+
+    @classmethod
+    def evict(cls, max_bytes=None):
+        """
+        Delete least recently requested variants until the cache fits its budget
+
+        Runs in its own process (evict_image_variants), so it reads access
+        times from where every web worker records them: the file's
+        modification time, or the shared cache on storages without local
+        paths.
+
+        Args:
+            max_bytes (int, optional): Size budget; defaults to MANGA_VARIANT_CACHE_MAX_BYTES
+
+        Returns:
+            tuple: (files_removed, bytes_freed)
+        """
+        if max_bytes is None:
+            max_bytes = getattr(settings, 'MANGA_VARIANT_CACHE_MAX_BYTES', 2 * 1024 ** 3)
+
+        entries = []
+        total = 0
+        for path in cls._iter_variant_files():
+            size = default_storage.size(path)
+            last_access = cache.get(cls._access_key(path))
+            if last_access is None:
+                last_access = default_storage.get_modified_time(path).timestamp()
+            entries.append((last_access, size, path))
+            total += size
+
+        removed = freed = 0
+        for last_access, size, path in sorted(entries):
+            if total - freed <= max_bytes:
+                break
+            default_storage.delete(path)
+            cache.delete(cls._access_key(path))
+            removed += 1
+            freed += size
+
+        return removed, freed
+
+    @classmethod
+    def delete_variants(cls, digest):
+        """Delete every stored variant of the image with the given content hash"""
+        directory = f"{VARIANT_PREFIX}{digest[:2]}/{digest}"
+        if not default_storage.exists(directory):
+            return
+        _, files = default_storage.listdir(directory)
+        for name in files:
+            default_storage.delete(f"{directory}/{name}")
+            cache.delete(cls._access_key(f"{directory}/{name}"))
+
+    @classmethod
+    def _touch(cls, variant_path):
+        """Record a request for a variant where evict() in another process sees it"""
+        try:
+            os.utime(default_storage.path(variant_path))
+        except NotImplementedError:
+            # Remote storage has no local file to touch
+            cache.set(cls._access_key(variant_path), time.time(), None)
+        except FileNotFoundError:
+            # Evicted meanwhile; the next request builds it again
+            pass
+
+    @classmethod
+    def _store(cls, variant_path, future):
+        """Save an encoded variant once its future resolves"""
+        try:
+            data = future.result(timeout=getattr(settings, 'MANGA_VARIANT_TIMEOUT', 30))
+        except Exception:
+            logger.exception("Failed to encode image variant %s", variant_path)
+            raise
+        # Another request may have produced the same variant meanwhile
+        if default_storage.exists(variant_path):
+            return variant_path
+        return default_storage.save(variant_path, ContentFile(data))
+
+    @staticmethod
+    def _read(path):
+        with default_storage.open(path, 'rb') as source:
+            return source.read()
+
+    @staticmethod
+    def _iter_variant_files():
+        if not default_storage.exists(VARIANT_PREFIX.rstrip('/')):
+            return
+        shards, _ = default_storage.listdir(VARIANT_PREFIX.rstrip('/'))
+        for shard in shards:
+            digests, _ = default_storage.listdir(f"{VARIANT_PREFIX}{shard}")
+            for digest in digests:
+                _, files = default_storage.listdir(f"{VARIANT_PREFIX}{shard}/{digest}")
+                for name in files:
+                    yield f"{VARIANT_PREFIX}{shard}/{digest}/{name}"
+
+    @staticmethod
+    def _variant_path(digest, variant):
+        extension = EXTENSIONS[VARIANTS[variant]['format']]
+        return f"{VARIANT_PREFIX}{digest[:2]}/{digest}/{variant}.{extension}"
+
+    @staticmethod
+    def _hash_key(path):
+        return f"image-hash:{path}"
+
+    @staticmethod
+    def _access_key(path):
+        return f"image-variant-access:{path}"
\ No newline at end of file
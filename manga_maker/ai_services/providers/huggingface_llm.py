@@ -1,9 +1,13 @@
 # ai_services/providers/huggingface_llm.py
+from ..capabilities import ProviderCapabilities
 from ..llm import LLMService
-import requests
-import json
+from ..panel_text import parse_panel_text
+from ..responses import read_response
 
 class HuggingFaceLLMService(LLMService):
+    # Hosted inference models have much smaller context windows than GPT-4
+    capabilities = ProviderCapabilities('llm', max_input_chars=2000, max_output_tokens=1000)
+    
     def configure(self, api_key, model_name):
         """
         Configure the Hugging Face LLM service
@@ -17,20 +21,25 @@ class HuggingFaceLLMService(LLMService):
         self.api_url = f"https://api-inference.huggingface.co/models/{model_name}"
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
         
-    def parse_narrative(self, text, panel_count=4):
+    def parse_narrative(self, text, panel_count=4, context=None):
         """
         Parse a narrative into manga panels using Hugging Face model
         
         Args:
             text (str): Narrative text to parse
             panel_count (int): Number of panels to divide into
+            context (str, optional): Preceding story text, given for continuity only
             
         Returns:
             list: List of panel data dictionaries
         """
+        if len(text) > self.max_narrative_chars:
+            return self._parse_in_chunks(text, panel_count)
+        
+        story_so_far = f"Story so far (for continuity only, do not create panels for it):\n{context}\n" if context else ""
         prompt = f"""
         Split this narrative into {panel_count} manga panels. For each panel, provide a description and an image prompt.
-        
+        {story_so_far}
         Narrative:
         {text}
         
@@ -44,16 +53,19 @@ class HuggingFaceLLMService(LLMService):
         ... and so on.
         """
         
-        response = requests.post(
+        response = self.session.post(
             self.api_url, 
             headers=self.headers, 
-            json={"inputs": prompt, "parameters": {"max_length": 1000}}
+            json={"inputs": prompt, "parameters": {"max_length": self.capabilities.max_output_tokens}},
+            stream=True
         )
         
-        if response.status_code != 200:
-            raise Exception(f"Error from Hugging Face API: {response.text}")
+        with read_response(response) as body:
+            if response.status_code != 200:
+                raise Exception(f"Error from Hugging Face API: {body.text()}")
+            result = body.json()
             
-        return self._parse_response(response.json())
+        return self._parse_response(result)
     
     def _parse_response(self, response):
         """
@@ -76,30 +88,8 @@ class HuggingFaceLLMService(LLMService):
         else:
             text = str(response)
             
-        # Parse the text to extract panels
-        import re
-        
         # Extract panels with descriptions and image prompts
-        pattern = r"Panel (\d+):(.*?)(?:Image prompt:(.*?))?(?=Panel \d+:|$)"
-        matches = re.findall(pattern, text, re.DOTALL)
-        
-        panel_data = []
-        
-        if matches:
-            for match in matches:
-                panel_num, description, image_prompt = match
-                description = description.strip()
-                image_prompt = image_prompt.strip() if image_prompt else f"Manga panel of {description}"
-                
-                panel_data.append({
-                    "description": description,
-                    "image_prompt": image_prompt
-                })
-        else:
-            # Fallback to simpler parsing
-            return super()._parse_text_response(text)
-        
-        return panel_data
+        return parse_panel_text(text)
     
     def execute(self, input_data):
         """
@@ -111,16 +101,17 @@ class HuggingFaceLLMService(LLMService):
         Returns:
             str: Response from the LLM
         """
-        response = requests.post(
+        response = self.session.post(
             self.api_url,
             headers=self.headers,
-            json={"inputs": input_data}
+            json={"inputs": input_data},
+            stream=True
         )
         
-        if response.status_code != 200:
-            raise Exception(f"Error from Hugging Face API: {response.text}")
-            
-        result = response.json()
+        with read_response(response) as body:
+            if response.status_code != 200:
+                raise Exception(f"Error from Hugging Face API: {body.text()}")
+            result = body.json()
         
         # Extract text from different response formats
         if isinstance(result, list) and len(result) > 0:
@@ -1,11 +1,28 @@
 # ai_services/providers/midjourney_adapter.py
+from ..capabilities import ProviderCapabilities
 from ..image import ImageGenerationService
-import requests
-import json
+from ..responses import read_response
 import time
+from types import MappingProxyType
 from django.conf import settings
 
 class MidjourneyService(ImageGenerationService):
+    capabilities = ProviderCapabilities(
+        'image',
+        size_step=64,
+        max_size=2048,
+        max_batch=4,
+        parameter_map=MappingProxyType({"wait_for_completion": None, "timeout": None}),
+        defaults=MappingProxyType({
+            "width": 1024,
+            "height": 1024,
+            "style": "manga",  # Manga style by default
+            "quality": "standard"
+        }),
+        max_input_chars=6000,
+        supports_async=True
+    )
+    
     def configure(self, api_key=None, api_url=None):
         """
         Configure the Midjourney service
@@ -32,44 +49,25 @@ class MidjourneyService(ImageGenerationService):
         Returns:
             str: URL to the generated image
         """
-        # Default parameters
-        default_params = {
-            "width": 1024,
-            "height": 1024,
-            "style": "manga",  # Manga style by default
-            "quality": "standard",
-            "wait_for_completion": True,
-            "timeout": 120  # Maximum wait time in seconds
-        }
-        
-        # Update with user-provided parameters
-        if parameters:
-            default_params.update(parameters)
-            
-        # Extract wait parameters
-        wait_for_completion = default_params.pop("wait_for_completion", True)
-        timeout = default_params.pop("timeout", 120)
+        # Wait options are read, not sent; they are left out of the compiled payload
+        wait_for_completion = (parameters or {}).get("wait_for_completion", True)
+        timeout = (parameters or {}).get("timeout", 120)
         
-        # Prepare request payload
-        payload = {
-            "prompt": prompt,
-            "style": default_params.pop("style", "manga"),
-            "dimensions": f"{default_params.pop('width', 1024)}x{default_params.pop('height', 1024)}",
-            "quality": default_params.pop("quality", "standard"),
-            **default_params
-        }
+        # Defaults and tier settings are compiled once; only the seed and prompt vary per call
+        payload = self.payload_template(parameters).build(parameters, prompt=prompt)
         
         # Start the image generation job
-        response = requests.post(
+        response = self.session.post(
             f"{self.api_url}/imagine", 
             headers=self.headers, 
-            json=payload
+            json=payload,
+            stream=True
         )
         
-        if response.status_code != 200:
-            raise Exception(f"Error starting image generation: {response.text}")
-            
-        job_data = response.json()
+        with read_response(response) as body:
+            if response.status_code != 200:
+                raise Exception(f"Error starting image generation: {body.text()}")
+            job_data = body.json()
         job_id = job_data.get("job_id")
         
         if not job_id:
@@ -82,6 +80,11 @@ class MidjourneyService(ImageGenerationService):
         # Wait for job completion
         return self._wait_for_completion(job_id, timeout)
     
+    def _shape_payload(self, fields):
+        """Midjourney takes the size as a single "WIDTHxHEIGHT" dimensions field"""
+        fields["dimensions"] = f"{fields.pop('width')}x{fields.pop('height')}"
+        return fields
+    
     def _wait_for_completion(self, job_id, timeout=120):
         """
         Wait for a Midjourney job to complete
@@ -97,15 +100,16 @@ class MidjourneyService(ImageGenerationService):
         poll_interval = 5  # seconds
         
         while time.time() - start_time < timeout:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.api_url}/job/{job_id}",
-                headers=self.headers
+                headers=self.headers,
+                stream=True
             )
             
-            if response.status_code != 200:
-                raise Exception(f"Error checking job status: {response.text}")
-                
-            job_data = response.json()
+            with read_response(response) as body:
+                if response.status_code != 200:
+                    raise Exception(f"Error checking job status: {body.text()}")
+                job_data = body.json()
             status = job_data.get("status")
             
             if status == "completed":
@@ -133,12 +137,13 @@ class MidjourneyService(ImageGenerationService):
         Returns:
             dict: Job status data
         """
-        response = requests.get(
+        response = self.session.get(
             f"{self.api_url}/job/{job_id}",
-            headers=self.headers
+            headers=self.headers,
+            stream=True
         )
         
-        if response.status_code != 200:
-            raise Exception(f"Error checking job status: {response.text}")
-            
-        return response.json()
\ No newline at end of file
+        with read_response(response) as body:
+            if response.status_code != 200:
+                raise Exception(f"Error checking job status: {body.text()}")
+            return body.json()
\ No newline at end of file
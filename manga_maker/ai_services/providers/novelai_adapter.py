@@ -1,11 +1,28 @@
 # ai_services/providers/novelai_adapter.py
+from ..capabilities import ProviderCapabilities
 from ..image import ImageGenerationService
-import requests
-import json
-import base64
+from ..responses import read_response
+from types import MappingProxyType
 from django.conf import settings
 
 class NovelAIService(ImageGenerationService):
+    capabilities = ProviderCapabilities(
+        'image',
+        size_step=64,
+        max_size=1536,
+        max_batch=4,
+        parameter_map=MappingProxyType({"cfg_scale": "scale"}),
+        defaults=MappingProxyType({
+            "width": 832,
+            "height": 1216,
+            "steps": 28,
+            "scale": 11,
+            "sampler": "k_euler_ancestral",
+            "model": "nai-diffusion-3",
+            "negative_prompt": "low quality, bad anatomy, worst quality"
+        }),
+    )
+    
     def configure(self, api_key=None, api_url=None):
         """
         Configure the NovelAI service
@@ -32,95 +49,51 @@ class NovelAIService(ImageGenerationService):
         Returns:
             str: URL to the generated image
         """
-        # Default parameters - NovelAI specific
-        default_params = {
-            "width": 832,
-            "height": 1216,
-            "steps": 28,
-            "scale": 11,
-            "sampler": "k_euler_ancestral",
-            "model": "nai-diffusion-3",
-            "negative_prompt": "low quality, bad anatomy, worst quality"
-        }
+        # Defaults and tier settings are compiled once (cfg_scale becomes NovelAI's
+        # "scale" there); the caller's parameters are never modified
+        fields = self.payload_template(parameters).build(parameters)
         
-        # Update with user-provided parameters
-        if parameters:
-            # Map common parameter names to NovelAI specific ones
-            if "cfg_scale" in parameters:
-                parameters["scale"] = parameters.pop("cfg_scale")
-                
-            default_params.update(parameters)
-            
         # Prepare request payload
         payload = {
             "input": prompt,
-            "model": default_params.pop("model", "nai-diffusion-3"),
-            "parameters": default_params
+            "model": fields.pop("model"),
+            "parameters": fields
         }
         
-        # Make API request
-        response = requests.post(
+        # Make API request; the image comes back inline, so stream the body
+        response = self.session.post(
             f"{self.api_url}/ai/generate-image",
             headers=self.headers,
-            json=payload
+            json=payload,
+            stream=True
         )
         
-        if response.status_code != 200:
-            raise Exception(f"Error generating image: {response.text}")
-            
-        # NovelAI typically returns a base64 encoded image
-        response_data = response.json()
-        
-        # Save image and return URL
-        return self._process_image_response(response_data)
+        with read_response(response) as body:
+            if response.status_code != 200:
+                raise Exception(f"Error generating image: {body.text()}")
+                
+            # Save image and return URL
+            return self._process_image_response(body)
     
-    def _process_image_response(self, response):
+    def _process_image_response(self, body):
         """
         Process the API response to store image and return URL
         
         Args:
-            response (dict): API response data
+            body (ProviderBody): API response body
             
         Returns:
             str: URL to access the saved image
         """
+        # NovelAI typically returns a base64 encoded image
+        found = body.find_strings(('image',), ('data',))
+        
         # Extract base64 image data
-        if 'image' in response:
-            image_data = response['image']
-            return self._save_base64_image(image_data)
+        if ('image',) in found:
+            return self._save_base64_image(found[('image',)])
             
         # Alternative response format
-        if 'data' in response:
-            return self._save_base64_image(response['data'])
-            
-        raise ValueError("Unexpected response format from NovelAI API")
-    
-    def _save_base64_image(self, base64_string):
-        """
-        Save base64 encoded image and return URL
-        
-        Args:
-            base64_string (str): Base64 encoded image data
+        if ('data',) in found:
+            return self._save_base64_image(found[('data',)])
             
-        Returns:
-            str: URL to access the saved image
-        """
-        import uuid
-        from django.core.files.storage import default_storage
-        from django.core.files.base import ContentFile
-        
-        # Remove potential metadata from base64 string
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-            
-        # Decode base64 to binary
-        image_data = base64.b64decode(base64_string)
-        
-        # Generate a unique filename
-        filename = f"manga_panels/{uuid.uuid4()}.png"
-        
-        # Save file using Django's storage
-        path = default_storage.save(filename, ContentFile(image_data))
-        
-        # Return the URL
-        return default_storage.url(path)
\ No newline at end of file
+        raise ValueError("Unexpected response format from NovelAI API")
\ No newline at end of file
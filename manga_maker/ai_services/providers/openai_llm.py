@@ -1,9 +1,14 @@
 # ai_services/providers/openai_llm.py
+from ..capabilities import ProviderCapabilities
 from ..llm import LLMService
+from ..sessions import ProviderSessions
+from ..streaming import IncrementalPanelParser
 import openai
 import json
 
 class OpenAILLMService(LLMService):
+    capabilities = ProviderCapabilities('llm', max_input_chars=6000, supports_streaming=True)
+    
     def configure(self, api_key, model="gpt-4"):
         """
         Configure the OpenAI LLM service
@@ -15,18 +20,28 @@ class OpenAILLMService(LLMService):
         self.api_key = api_key
         self.model = model
         openai.api_key = api_key
+        # The openai client asks for its session per thread; hand it the shared keep-alive pool
+        openai.requestssession = lambda: ProviderSessions.session_for(openai.api_base)
+        
+    def endpoints(self):
+        """The openai client's API base, which it connects to for every call"""
+        return [openai.api_base]
         
-    def parse_narrative(self, text, panel_count=4):
+    def parse_narrative(self, text, panel_count=4, context=None):
         """
         Parse a narrative into manga panels using OpenAI
         
         Args:
             text (str): Narrative text to parse
             panel_count (int): Number of panels to divide into
+            context (str, optional): Preceding story text, given for continuity only
             
         Returns:
             list: List of panel data dictionaries
         """
+        if len(text) > self.max_narrative_chars:
+            return self._parse_in_chunks(text, panel_count)
+        
         system_prompt = """
         You are a manga panel designer. Break down the given narrative into specified number of manga panels.
         For each panel, provide:
@@ -36,11 +51,17 @@ class OpenAILLMService(LLMService):
         Format your response as a JSON array of objects, where each object has:
         - "description": detailed description of panel content
         - "image_prompt": prompt optimized for manga-style image generation
+        - "importance": how much of the page the panel deserves, from 1 (minor beat) to 3 (climax)
         
         Be specific in image prompts, including character positions, emotions, backgrounds, and any manga-specific elements.
         """
         
         prompt = f"Split this narrative into {panel_count} manga panels:\n\n{text}"
+        if context:
+            prompt = (
+                f"Story so far (for continuity only, do not create panels for it):\n{context}\n\n"
+                f"{prompt}"
+            )
         
         try:
             response = openai.ChatCompletion.create(
@@ -55,15 +76,83 @@ class OpenAILLMService(LLMService):
             return self._parse_response(response)
         except Exception as e:
             # Use the generic text-based fallback if JSON parsing fails
+            fallback_prompt = f"Split this narrative into {panel_count} manga panels, numbered 1-{panel_count}:\n\n{text}"
+            if context:
+                fallback_prompt = f"Story so far (for continuity only, do not create panels for it):\n{context}\n\n{fallback_prompt}"
             response = openai.ChatCompletion.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a manga panel designer."},
-                    {"role": "user", "content": f"Split this narrative into {panel_count} manga panels, numbered 1-{panel_count}:\n\n{text}"}
+                    {"role": "user", "content": fallback_prompt}
                 ]
             )
             return self._parse_response(response)
     
+    def stream_narrative(self, text, panel_count=4, context=None):
+        """
+        Stream a narrative breakdown from OpenAI, yielding panels as they complete
+        
+        Args:
+            text (str): Narrative text to parse
+            panel_count (int): Number of panels to divide into
+            context (str, optional): Preceding story text, given for continuity only
+            
+        Yields:
+            dict: Panel data, in narrative order
+        """
+        if len(text) > self.max_narrative_chars:
+            yield from self._parse_in_chunks(text, panel_count)
+            return
+        
+        system_prompt = """
+        You are a manga panel designer. Break down the given narrative into specified number of manga panels.
+        Format your response as a JSON object with a "panels" array of objects, where each object has:
+        - "description": detailed description of panel content
+        - "image_prompt": prompt optimized for manga-style image generation
+        - "importance": how much of the page the panel deserves, from 1 (minor beat) to 3 (climax)
+        
+        Be specific in image prompts, including character positions, emotions, backgrounds, and any manga-specific elements.
+        """
+        
+        prompt = f"Split this narrative into {panel_count} manga panels:\n\n{text}"
+        if context:
+            prompt = (
+                f"Story so far (for continuity only, do not create panels for it):\n{context}\n\n"
+                f"{prompt}"
+            )
+        
+        emitted = 0
+        try:
+            stream = openai.ChatCompletion.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                stream=True
+            )
+            
+            parser = IncrementalPanelParser()
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                for panel in parser.feed(getattr(chunk.choices[0].delta, 'content', None)):
+                    emitted += 1
+                    yield panel
+            
+            for panel in parser.close():
+                emitted += 1
+                yield panel
+            
+            # Output in a shape the incremental parser doesn't recognise; parse it whole
+            if not emitted:
+                yield from self._parse_response(parser.text)
+        except Exception:
+            # Fall back to a whole-response parse, which has its own text fallback;
+            # panels already yielded are being rendered, so only the rest are taken from it
+            yield from self.parse_narrative(text, panel_count, context)[emitted:]
+    
     def _parse_response(self, response):
         """
         Parse OpenAI response into structured panel data
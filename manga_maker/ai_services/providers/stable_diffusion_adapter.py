@@ -1,12 +1,26 @@
 # ai_services/providers/stable_diffusion_adapter.py
+from ..capabilities import ProviderCapabilities
 from ..image import ImageGenerationService
-import requests
-import json
-import os
-import base64
+from ..responses import read_response
+from types import MappingProxyType
 from django.conf import settings
 
 class StableDiffusionService(ImageGenerationService):
+    capabilities = ProviderCapabilities(
+        'image',
+        size_step=64,
+        max_size=1536,
+        max_batch=4,
+        defaults=MappingProxyType({
+            "width": 768,
+            "height": 768,
+            "steps": 30,
+            "cfg_scale": 7.5,
+            "sampler": "DPM++ 2M Karras",
+            "negative_prompt": "low quality, bad anatomy, worst quality, low resolution"
+        }),
+    )
+    
     def configure(self, api_key=None, api_url=None, model="stable-diffusion-xl-1024-v1-0"):
         """
         Configure the Stable Diffusion service
@@ -31,28 +45,8 @@ class StableDiffusionService(ImageGenerationService):
         Returns:
             str: URL to the generated image
         """
-        # Default parameters
-        default_params = {
-            "width": 768,
-            "height": 768,
-            "steps": 30,
-            "cfg_scale": 7.5,
-            "seed": None,
-            "sampler": "DPM++ 2M Karras"
-        }
-        
-        # Update with user-provided parameters
-        if parameters:
-            default_params.update(parameters)
-            
-        payload = {
-            "prompt": prompt,
-            "negative_prompt": "low quality, bad anatomy, worst quality, low resolution",
-            **default_params
-        }
-        
-        # Remove None values
-        payload = {k: v for k, v in payload.items() if v is not None}
+        # Defaults and tier settings are compiled once; only the seed and prompt vary per call
+        payload = self.payload_template(parameters).build(parameters, prompt=prompt)
         
         # Make API request
         headers = {
@@ -60,70 +54,39 @@ class StableDiffusionService(ImageGenerationService):
             "Content-Type": "application/json"
         }
         
-        response = requests.post(f"{self.api_url}/text2img", headers=headers, json=payload)
-        
-        if response.status_code != 200:
-            raise Exception(f"Error generating image: {response.text}")
-            
-        # Handle the response based on API format
-        response_data = response.json()
+        # Stream the body; base64 images can run to tens of megabytes
+        response = self.session.post(f"{self.api_url}/text2img", headers=headers, json=payload, stream=True)
         
-        # Save image and return URL
-        return self._process_image_response(response_data)
+        with read_response(response) as body:
+            if response.status_code != 200:
+                raise Exception(f"Error generating image: {body.text()}")
+                
+            # Save image and return URL
+            return self._process_image_response(body)
     
-    def _process_image_response(self, response):
+    def _process_image_response(self, body):
         """
         Process the API response to store image and return URL
         
         Args:
-            response (dict): API response data
+            body (ProviderBody): API response body
             
         Returns:
             str: URL to access the saved image
         """
+        # Only the image field is located; the rest of the document is never built
+        found = body.find_strings(('url',), ('images', 0), ('output', 'data'))
+        
         # Option 1: API returns a URL directly
-        if 'url' in response:
-            return response['url']
+        if ('url',) in found:
+            return bytes(found[('url',)]).decode('utf-8')
             
         # Option 2: API returns base64 encoded image
-        if 'images' in response and len(response['images']) > 0:
-            image_data = response['images'][0]
-            if isinstance(image_data, str):
-                # It's likely base64 encoded
-                return self._save_base64_image(image_data)
+        if ('images', 0) in found:
+            return self._save_base64_image(found[('images', 0)])
         
         # Option 3: Different response format
-        if 'output' in response and 'data' in response['output']:
-            return self._save_base64_image(response['output']['data'])
-            
-        raise ValueError("Unexpected response format from Stable Diffusion API")
-    
-    def _save_base64_image(self, base64_string):
-        """
-        Save base64 encoded image and return URL
-        
-        Args:
-            base64_string (str): Base64 encoded image data
+        if ('output', 'data') in found:
+            return self._save_base64_image(found[('output', 'data')])
             
-        Returns:
-            str: URL to access the saved image
-        """
-        import uuid
-        from django.core.files.storage import default_storage
-        from django.core.files.base import ContentFile
-        
-        # Remove potential metadata from base64 string
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-            
-        # Decode base64 to binary
-        image_data = base64.b64decode(base64_string)
-        
-        # Generate a unique filename
-        filename = f"manga_panels/{uuid.uuid4()}.png"
-        
-        # Save file using Django's storage
-        path = default_storage.save(filename, ContentFile(image_data))
-        
-        # Return the URL
-        return default_storage.url(path)
\ No newline at end of file
+        raise ValueError("Unexpected response format from Stable Diffusion API")
\ No newline at end of file
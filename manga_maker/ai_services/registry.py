@@ -1,15 +1,107 @@
 # ai_services/registry.py
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .capabilities import ProviderCapabilities
+
+logger = logging.getLogger(__name__)
+
+
 class AIServiceRegistry:
     _instances = {}
-    
+    _capabilities = {}
+    _lock = threading.Lock()
+
     @classmethod
-    def register(cls, service_type, provider, instance):
+    def register(cls, service_type, provider, instance, capabilities=None):
+        """
+        Register a configured service under a provider name
+
+        Args:
+            service_type (str): 'llm' or 'image'
+            provider (str): Provider name
+            instance (AIService): Configured adapter
+            capabilities (ProviderCapabilities, optional): Overrides the adapter's own descriptor
+        """
         key = (service_type, provider)
-        cls._instances[key] = instance
-        
+        with cls._lock:
+            cls._instances[key] = instance
+            cls._capabilities[key] = (
+                capabilities or getattr(instance, 'capabilities', None) or ProviderCapabilities(service_type)
+            )
+
     @classmethod
     def get(cls, service_type, provider):
         key = (service_type, provider)
         if key not in cls._instances:
             raise KeyError(f"No service registered for {service_type} with provider {provider}")
-        return cls._instances[key]
\ No newline at end of file
+        return cls._instances[key]
+
+    @classmethod
+    def is_registered(cls, service_type, provider):
+        return (service_type, provider) in cls._instances
+
+    @classmethod
+    def registered(cls):
+        """
+        Every registered service
+
+        Returns:
+            dict: (service_type, provider) -> instance
+        """
+        return dict(cls._instances)
+
+    @classmethod
+    def configure_from_settings(cls, providers=None):
+        """
+        Build, configure and register the providers in MANGA_AI_PROVIDERS
+
+        Each entry maps a provider name to its service type, adapter class
+        path and configure() options. Entries with an empty api_key are
+        skipped, as are providers already registered (e.g. mocks). Entries
+        with the same class and options share one instance.
+
+        Args:
+            providers (dict, optional): Overrides MANGA_AI_PROVIDERS
+
+        Returns:
+            list: (service_type, provider) pairs that were registered
+        """
+        providers = providers if providers is not None else getattr(settings, 'MANGA_AI_PROVIDERS', {})
+        shared = {}
+        registered = []
+        for provider, entry in providers.items():
+            service_type = entry['type']
+            options = entry.get('options', {})
+            if cls.is_registered(service_type, provider):
+                continue
+            if 'api_key' in options and not options['api_key']:
+                logger.info("Not configuring %s %s: no API key", service_type, provider)
+                continue
+
+            key = (entry['class'], json.dumps(options, sort_keys=True))
+            instance = shared.get(key)
+            if instance is None:
+                instance = import_string(entry['class'])()
+                instance.configure(**options)
+                shared[key] = instance
+            cls.register(service_type, provider, instance)
+            registered.append((service_type, provider))
+        return registered
+
+    @classmethod
+    def capabilities(cls, service_type, provider):
+        """
+        What a registered provider supports
+
+        Returns:
+            ProviderCapabilities: Sizes, batch limit, parameter mapping, token limits and async support
+        """
+        key = (service_type, provider)
+        if key not in cls._capabilities:
+            raise KeyError(f"No service registered for {service_type} with provider {provider}")
+        return cls._capabilities[key]
\ No newline at end of file
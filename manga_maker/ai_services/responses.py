@@ -0,0 +1,280 @@
+# ai_services/responses.py
+"""
+Bounded reading of provider HTTP responses
+
+Adapters request with stream=True and hand the response to read_response().
+The body is read in chunks against a hard size cap, kept in memory while
+small and spilled to an anonymous temp file past MANGA_PROVIDER_SPILL_BYTES,
+which is then memory-mapped. Image payloads are located by scanning the
+JSON for the wanted field instead of building the whole document, so a
+response never costs much more than the decoded image itself.
+
+    response = requests.post(url, json=payload, stream=True)
+    with read_response(response) as body:
+        if response.status_code != 200:
+            raise Exception(f"Error generating image: {body.text()}")
+        found = body.find_strings(('images', 0))
+"""
+import base64
+import binascii
+import json
+import mmap
+import tempfile
+
+from django.conf import settings
+
+from . import telemetry
+
+CHUNK_BYTES = 64 * 1024
+# Base64 is decoded in slices of this many characters (a multiple of 4)
+DECODE_CHUNK_CHARS = 4 * 1024 * 1024
+WHITESPACE = b' \t\r\n'
+LITERAL_END = b' \t\r\n,]}'
+
+
+class ResponseTooLarge(Exception):
+    """A provider response exceeded its size cap"""
+
+
+class ProviderBody:
+    """
+    A fully read response body held in memory or in a memory-mapped temp file
+
+    Use as a context manager, or call close(), to release the temp file.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._memory = bytearray()
+        self._file = None
+        self._buffer = None
+
+    @property
+    def spilled(self):
+        return self._file is not None
+
+    def json(self):
+        """
+        Parse the whole body as JSON
+
+        Raises:
+            ResponseTooLarge: If the body exceeds MANGA_PROVIDER_MAX_JSON_BYTES
+        """
+        limit = getattr(settings, 'MANGA_PROVIDER_MAX_JSON_BYTES', 8 * 1024 ** 2)
+        if self.size > limit:
+            raise ResponseTooLarge(
+                f"Provider response of {self.size} bytes is too large to parse whole (limit {limit})"
+            )
+        return json.loads(self._buffer[:])
+
+    def text(self, limit=1000):
+        """Return the start of the body as text, for error messages"""
+        return bytes(self._buffer[:limit]).decode('utf-8', 'replace')
+
+    def find_strings(self, *paths):
+        """
+        Locate string values in a JSON body without parsing all of it
+
+        Args:
+            *paths (tuple): Key paths such as ('image',) or ('images', 0);
+                integers index into arrays
+
+        Returns:
+            dict: Path to the value as a memoryview over the body, for each
+                path found; the first occurrence wins
+        """
+        wanted = set(paths)
+        found = {}
+        for path, start, end, escaped in _iter_strings(self._buffer):
+            if path not in wanted or path in found:
+                continue
+            if escaped:
+                # Rare for image data; decode this one value properly
+                value = json.loads(self._buffer[start - 1:end + 1]).encode('utf-8')
+                found[path] = memoryview(value)
+            else:
+                found[path] = memoryview(self._buffer)[start:end]
+            if len(found) == len(wanted):
+                break
+        return found
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.close()
+            except BufferError:
+                # A memoryview from find_strings() is still alive; the map closes when it goes
+                pass
+        self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _write(self, chunk, spill_bytes):
+        self.size += len(chunk)
+        if self._file is None and self.size <= spill_bytes:
+            self._memory.extend(chunk)
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='manga-provider-')
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        self._file.write(chunk)
+
+    def _seal(self):
+        if self._file is None:
+            self._buffer = bytes(self._memory)
+        elif self.size:
+            self._file.flush()
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._buffer = b""
+        self._memory = None
+
+
+def read_response(response, max_bytes=None, spill_bytes=None):
+    """
+    Read a streamed requests response under a size cap
+
+    Args:
+        response (requests.Response): Response requested with stream=True
+        max_bytes (int, optional): Cap; defaults to MANGA_PROVIDER_MAX_RESPONSE_BYTES
+        spill_bytes (int, optional): Size past which the body goes to a temp
+            file; defaults to MANGA_PROVIDER_SPILL_BYTES
+
+    Returns:
+        ProviderBody: The body; close it when done
+
+    Raises:
+        ResponseTooLarge: If the declared or actual size exceeds the cap
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'MANGA_PROVIDER_MAX_RESPONSE_BYTES', 64 * 1024 ** 2)
+    if spill_bytes is None:
+        spill_bytes = getattr(settings, 'MANGA_PROVIDER_SPILL_BYTES', 1024 ** 2)
+
+    body = ProviderBody()
+    try:
+        declared = response.headers.get('Content-Length', '')
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLarge(f"Provider response declares {declared} bytes (limit {max_bytes})")
+        for chunk in response.iter_content(CHUNK_BYTES):
+            body._write(chunk, spill_bytes)
+            if body.size > max_bytes:
+                raise ResponseTooLarge(f"Provider response exceeded {max_bytes} bytes")
+        body._seal()
+    except ResponseTooLarge:
+        body.close()
+        telemetry.increment('provider.oversized_responses')
+        raise
+    except BaseException:
+        body.close()
+        raise
+    finally:
+        response.close()
+
+    telemetry.increment('provider.response_bytes', body.size)
+    if body.spilled:
+        telemetry.increment('provider.spilled_responses')
+    return body
+
+
+def decode_base64(data):
+    """
+    Decode base64 from a bytes-like object slice by slice
+
+    Avoids a second full-size copy of the encoded text when data is a view
+    over a memory-mapped body.
+
+    Args:
+        data (bytes-like): Base64 text, without a data-URL prefix
+
+    Returns:
+        bytes: The decoded data
+    """
+    data = memoryview(data)
+    if len(data) <= DECODE_CHUNK_CHARS:
+        return base64.b64decode(data)
+
+    decoded = bytearray()
+    try:
+        for start in range(0, len(data), DECODE_CHUNK_CHARS):
+            # validate=True so that line breaks, which would shift the 4-character groups, are noticed
+            decoded += base64.b64decode(data[start:start + DECODE_CHUNK_CHARS], validate=True)
+    except binascii.Error:
+        return base64.b64decode(data)
+    return bytes(decoded)
+
+
+def _iter_strings(buffer):
+    """
+    Yield (path, start, end, escaped) for every string value in a JSON document
+
+    start and end delimit the string's contents, without the quotes. Only
+    the structure is walked byte by byte; string contents are skipped with
+    find(), so large embedded payloads cost almost nothing to pass over.
+    """
+    stack = []
+    expecting_key = False
+    i = 0
+    size = len(buffer)
+    while i < size:
+        c = buffer[i]
+        if c in WHITESPACE:
+            i += 1
+        elif c == 0x22:  # "
+            end = _string_end(buffer, i + 1)
+            escaped = buffer.find(b'\\', i + 1, end) != -1
+            if expecting_key:
+                raw = buffer[i:end + 1]
+                stack[-1][1] = json.loads(raw) if escaped else bytes(raw[1:-1]).decode('utf-8', 'replace')
+                expecting_key = False
+            else:
+                yield tuple(frame[1] for frame in stack), i + 1, end, escaped
+            i = end + 1
+        elif c == 0x7b:  # {
+            stack.append(['object', None])
+            expecting_key = True
+            i += 1
+        elif c == 0x5b:  # [
+            stack.append(['array', 0])
+            i += 1
+        elif c in (0x7d, 0x5d):  # } ]
+            if stack:
+                stack.pop()
+            expecting_key = False
+            i += 1
+        elif c == 0x2c:  # ,
+            if stack and stack[-1][0] == 'array':
+                stack[-1][1] += 1
+            else:
+                expecting_key = True
+            i += 1
+        elif c == 0x3a:  # :
+            i += 1
+        else:
+            # Number, true, false or null
+            while i < size and buffer[i] not in LITERAL_END:
+                i += 1
+
+
+def _string_end(buffer, start):
+    """Return the index of the quote closing the string that starts at start"""
+    position = start
+    while True:
+        end = buffer.find(b'"', position)
+        if end == -1:
+            raise ValueError("Unterminated string in provider response")
+        backslashes = 0
+        while buffer[end - 1 - backslashes] == 0x5c:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end
+        position = end + 1
\ No newline at end of file
@@ -0,0 +1,97 @@
+# ai_services/sessions.py
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from . import telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderSessions:
+    """
+    Pooled keep-alive HTTP sessions, one per provider host
+
+    Adapters send their requests through session_for(api_url) rather than
+    module-level requests calls, so TLS connections are reused between
+    requests and render threads. warm() opens connections ahead of the
+    first real request. Sessions are dropped in forked children, whose
+    inherited sockets belong to the parent.
+    """
+    _sessions = {}
+    _pid = os.getpid()
+    _lock = threading.Lock()
+
+    @classmethod
+    def session_for(cls, url):
+        """
+        Return the shared session for a URL's scheme and host
+
+        Args:
+            url (str): Any URL on the provider's host
+
+        Returns:
+            requests.Session: Session with a connection pool sized by MANGA_PROVIDER_POOL_SIZE
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        if cls._pid != os.getpid():
+            cls.reset()
+        session = cls._sessions.get(key)
+        if session is None:
+            with cls._lock:
+                session = cls._sessions.get(key)
+                if session is None:
+                    size = getattr(settings, 'MANGA_PROVIDER_POOL_SIZE', 10)
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    cls._sessions[key] = session
+        return session
+
+    @classmethod
+    def warm(cls, url, connections=None):
+        """
+        Open keep-alive connections to a provider so the first request skips the handshake
+
+        Sends concurrent HEAD requests; any status counts, since only the
+        connection matters.
+
+        Args:
+            url (str): Provider endpoint
+            connections (int, optional): Connections to open; defaults to MANGA_PROVIDER_WARM_CONNECTIONS
+
+        Returns:
+            int: Connections opened
+        """
+        connections = connections or getattr(settings, 'MANGA_PROVIDER_WARM_CONNECTIONS', 2)
+        timeout = getattr(settings, 'MANGA_PROVIDER_WARM_TIMEOUT', 5)
+        session = cls.session_for(url)
+
+        def handshake(_):
+            try:
+                session.head(url, timeout=timeout, allow_redirects=False).close()
+                return 1
+            except requests.RequestException as e:
+                logger.warning("Could not warm a connection to %s: %s", url, e)
+                return 0
+
+        with telemetry.span('provider.warm', host=urlsplit(url).netloc), \
+                ThreadPoolExecutor(max_workers=connections) as executor:
+            opened = sum(executor.map(handshake, range(connections)))
+        telemetry.increment('provider.warm_connections', opened)
+        return opened
+
+    @classmethod
+    def reset(cls):
+        """Forget every session; used after a fork"""
+        with cls._lock:
+            cls._sessions = {}
+            cls._pid = os.getpid()
\ No newline at end of file
@@ -0,0 +1,138 @@
+# ai_services/streaming.py
+import json
+
+from .panel_text import HEADER_LOOKBACK, build_panel, iter_panel_headers
+
+
+class IncrementalPanelParser:
+    """
+    Turn a token stream from an LLM into panel dictionaries as they complete
+
+    Handles both output styles the adapters ask for: a JSON array of panel
+    objects (optionally wrapped in an object such as {"panels": [...]}) and
+    "Panel N: ..." or numbered-list text. The style is picked from the first
+    non-blank character of the stream.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._mode = None
+        self._scan = 0
+
+        # JSON mode state
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._panels_depth = None
+        self._object_start = None
+
+        # Text mode state
+        self._body_start = None
+        self._header_kind = None
+
+    def feed(self, chunk):
+        """
+        Consume the next piece of LLM output
+
+        Args:
+            chunk (str): Newly streamed text
+
+        Returns:
+            list: Panel dictionaries completed by this chunk
+        """
+        if not chunk:
+            return []
+        self.text += chunk
+
+        if self._mode is None:
+            stripped = self.text.lstrip()
+            if not stripped:
+                return []
+            self._mode = 'json' if stripped[0] in '[{' else 'text'
+
+        if self._mode == 'json':
+            return self._scan_json()
+        return self._scan_text(final=False)
+
+    def close(self):
+        """
+        Signal the end of the stream
+
+        Returns:
+            list: Panel dictionaries still pending at the end of the stream
+        """
+        if self._mode == 'text':
+            return self._scan_text(final=True)
+        return []
+
+    def _scan_json(self):
+        panels = []
+        text = self.text
+        for index in range(self._scan, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self._depth += 1
+                # The first array opened holds the panels
+                if char == '[' and self._panels_depth is None:
+                    self._panels_depth = self._depth
+                elif char == '{' and self._panels_depth is not None and self._depth == self._panels_depth + 1:
+                    self._object_start = index
+            elif char in ']}':
+                if char == '}' and self._object_start is not None and self._depth == self._panels_depth + 1:
+                    panel = self._load_panel(text[self._object_start:index + 1])
+                    if panel:
+                        panels.append(panel)
+                    self._object_start = None
+                self._depth -= 1
+
+        self._scan = len(text)
+        return panels
+
+    def _scan_text(self, final):
+        panels = []
+        text = self.text
+        search_from = max(self._scan - HEADER_LOOKBACK, self._body_start or 0)
+
+        # A header can't be confirmed until the character after it has arrived
+        endpos = len(text) if final else len(text) - 1
+        for match in iter_panel_headers(text, search_from, max(search_from, endpos)):
+            # Stick to whichever header style the LLM used first
+            kind = 'panel' if match.group('panel') else 'item'
+            if self._header_kind is None:
+                self._header_kind = kind
+            elif kind != self._header_kind:
+                continue
+
+            if self._body_start is not None:
+                panels.append(build_panel(text[self._body_start:match.start()]))
+            self._body_start = match.end()
+
+        if final and self._body_start is not None:
+            panels.append(build_panel(text[self._body_start:]))
+            self._body_start = len(text)
+
+        self._scan = len(text)
+        return [panel for panel in panels if panel]
+
+    @staticmethod
+    def _load_panel(raw):
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        if 'image_prompt' not in data:
+            return None
+        data.setdefault('description', data['image_prompt'])
+        return data
\ No newline at end of file
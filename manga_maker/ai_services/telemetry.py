@@ -0,0 +1,424 @@
+# ai_services/telemetry.py
+"""
+Timing spans and counters for the generation pipeline
+
+Instrumented code calls span() and increment(); finished spans and counter
+updates go to the exporters listed in MANGA_TELEMETRY_EXPORTERS. With no
+exporters configured both calls return immediately, so instrumentation can
+stay in hot paths.
+
+    with telemetry.span('generation.suggest_template', panels=4):
+        ...
+    telemetry.increment('blob_store.bytes_stored', len(data))
+    telemetry.gauge('scheduler.queue_depth', 3, tier='FREE')
+"""
+import bisect
+import contextvars
+import functools
+import itertools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_exporters = ()
+_current_span = contextvars.ContextVar('telemetry_span', default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """A timed section of work; nested spans share their root's trace_id"""
+    __slots__ = (
+        'name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+        'start_ns', 'duration_ns', 'error', '_started', '_token'
+    )
+
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.start_ns = time.time_ns()
+        self.duration_ns = None
+        self.error = None
+
+    @property
+    def duration(self):
+        """Duration in seconds, or None while the span is open"""
+        return None if self.duration_ns is None else self.duration_ns / 1e9
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        for exporter in _exporters:
+            exporter.on_start(self)
+        self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ns = time.perf_counter_ns() - self._started
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _current_span.reset(self._token)
+        for exporter in _exporters:
+            try:
+                exporter.export_span(self)
+            except Exception:
+                logger.exception("Telemetry exporter %r failed", exporter)
+        return False
+
+
+class _NoopSpan:
+    """Stand-in returned by span() while telemetry is disabled"""
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def enabled():
+    return bool(_exporters)
+
+
+def span(name, **attributes):
+    """
+    Time a block of work
+
+    Args:
+        name (str): Dotted span name, e.g. 'generation.extract_characters'
+        **attributes: Extra data recorded with the span
+
+    Returns:
+        context manager: Yields the Span, or a no-op stand-in when disabled
+    """
+    if not _exporters:
+        return NOOP_SPAN
+    return Span(name, attributes, _current_span.get())
+
+
+def increment(name, value=1, **labels):
+    """
+    Add to a counter
+
+    Args:
+        name (str): Dotted counter name, e.g. 'blob_store.dedup_hits'
+        value (int): Amount to add
+        **labels: Low-cardinality labels, e.g. provider='openai'
+    """
+    if not _exporters:
+        return
+    for exporter in _exporters:
+        exporter.export_counter(name, value, labels)
+
+
+def gauge(name, value, **labels):
+    """
+    Set a value that can go up and down, such as a queue depth
+
+    Args:
+        name (str): Dotted gauge name, e.g. 'scheduler.queue_depth'
+        value (float): Current value
+        **labels: Low-cardinality labels, e.g. tier='FREE'
+    """
+    if not _exporters:
+        return
+    for exporter in _exporters:
+        exporter.export_gauge(name, value, labels)
+
+
+def traced(name):
+    """Decorator that wraps every call of a function in a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn):
+    """
+    Bind fn to the current span so spans it opens on another thread nest under it
+
+    Returns fn unchanged while telemetry is disabled.
+    """
+    if not _exporters:
+        return fn
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def configure(exporters):
+    """Replace the active exporters; an empty list disables telemetry"""
+    global _exporters
+    _exporters = tuple(exporters)
+
+
+def configure_from_settings():
+    """Instantiate the exporter classes named in MANGA_TELEMETRY_EXPORTERS"""
+    configure(import_string(path)() for path in getattr(settings, 'MANGA_TELEMETRY_EXPORTERS', []))
+
+
+def get_exporter(exporter_class):
+    """Return the active exporter of the given class, or None"""
+    for exporter in _exporters:
+        if isinstance(exporter, exporter_class):
+            return exporter
+    return None
+
+
+class Exporter:
+    """Base class for telemetry exporters; every hook is optional"""
+
+    def on_start(self, span):
+        pass
+
+    def export_span(self, span):
+        pass
+
+    def export_counter(self, name, value, labels):
+        pass
+
+    def export_gauge(self, name, value, labels):
+        pass
+
+
+class LogExporter(Exporter):
+    """Write finished spans to the 'ai_services.telemetry' logger"""
+
+    def export_span(self, span):
+        logger.info(
+            "span %s %.1fms trace=%s%s %s",
+            span.name, span.duration_ns / 1e6, span.trace_id,
+            f" error={span.error}" if span.error else "", span.attributes
+        )
+
+    def export_counter(self, name, value, labels):
+        logger.debug("counter %s +%s %s", name, value, labels)
+
+    def export_gauge(self, name, value, labels):
+        logger.debug("gauge %s =%s %s", name, value, labels)
+
+
+class InMemoryExporter(Exporter):
+    """Keep spans, counter totals and gauge values in memory, for tests and offline runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = []
+        self.counters = {}
+        self.gauges = {}
+
+    def export_span(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def export_counter(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def export_gauge(self, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.gauges[key] = value
+
+    def find(self, name):
+        """Return finished spans with the given name"""
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+    def total(self, name):
+        """Return a counter summed over all label sets"""
+        with self._lock:
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+            self.counters = {}
+            self.gauges = {}
+
+
+class PrometheusExporter(Exporter):
+    """
+    Aggregate spans and counters for the Prometheus text endpoint
+
+    Span durations become a histogram labelled by span name and provider;
+    other span attributes are left out to keep label cardinality bounded.
+    """
+    BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self, namespace='manga'):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._errors = {}
+
+    def export_span(self, span):
+        labels = (('span', span.name), ('provider', str(span.attributes.get('provider', ''))))
+        seconds = span.duration_ns / 1e9
+        with self._lock:
+            histogram = self._histograms.get(labels)
+            if histogram is None:
+                histogram = self._histograms[labels] = [[0] * len(self.BUCKETS), 0.0, 0]
+            index = bisect.bisect_left(self.BUCKETS, seconds)
+            if index < len(self.BUCKETS):
+                histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            if span.error:
+                self._errors[labels] = self._errors.get(labels, 0) + 1
+
+    def export_counter(self, name, value, labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def export_gauge(self, name, value, labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            counters_by_name = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters_by_name.setdefault(name, []).append((labels, value))
+            for name, series in counters_by_name.items():
+                metric = f"{ns}_{name.replace('.', '_')}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{self._labels(labels)} {value}" for labels, value in series)
+
+            gauges_by_name = {}
+            for (name, labels), value in sorted(self._gauges.items()):
+                gauges_by_name.setdefault(name, []).append((labels, value))
+            for name, series in gauges_by_name.items():
+                metric = f"{ns}_{name.replace('.', '_')}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.extend(f"{metric}{self._labels(labels)} {value}" for labels, value in series)
+
+            metric = f"{ns}_span_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, (buckets, total, count) in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.BUCKETS, buckets):
+                    cumulative += bucket_count
+                    lines.append(f"{metric}_bucket{self._labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{metric}_bucket{self._labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{metric}_sum{self._labels(labels)} {total}")
+                lines.append(f"{metric}_count{self._labels(labels)} {count}")
+
+            metric = f"{ns}_span_errors_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{self._labels(labels)} {value}" for labels, value in sorted(self._errors.items()))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ""
+        pairs = ",".join(
+            f'{key}="{value.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+            for key, value in labels
+        )
+        return "{" + pairs + "}"
+
+
+class OpenTelemetryExporter(Exporter):
+    """
+    Mirror spans and counters into the OpenTelemetry API
+
+    Spans are opened and closed alongside ours, so parent/child links and
+    timings carry over to whatever SDK and exporter the process configures.
+    Needs the opentelemetry-api package.
+    """
+
+    def __init__(self, instrumentation_name='manga_maker'):
+        try:
+            from opentelemetry import metrics, trace
+        except ImportError:
+            raise ImproperlyConfigured("OpenTelemetryExporter needs the opentelemetry-api package")
+        self._trace = trace
+        self._tracer = trace.get_tracer(instrumentation_name)
+        self._meter = metrics.get_meter(instrumentation_name)
+        self._lock = threading.Lock()
+        self._live = {}
+        self._counters = {}
+        self._gauges = {}
+        self._gauge_values = {}
+
+    def on_start(self, span):
+        with self._lock:
+            parent = self._live.get(span.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self._tracer.start_span(
+            span.name, context=context, start_time=span.start_ns,
+            attributes=self._attributes(span.attributes)
+        )
+        with self._lock:
+            self._live[span.span_id] = otel_span
+
+    def export_span(self, span):
+        with self._lock:
+            otel_span = self._live.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        # Attributes may have been added while the span was open
+        otel_span.set_attributes(self._attributes(span.attributes))
+        if span.error:
+            from opentelemetry.trace import Status, StatusCode
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.start_ns + span.duration_ns)
+
+    def export_counter(self, name, value, labels):
+        counter = self._counters.get(name)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.get(name)
+                if counter is None:
+                    counter = self._counters[name] = self._meter.create_counter(name)
+        counter.add(value, self._attributes(labels))
+
+    def export_gauge(self, name, value, labels):
+        # The API has no synchronous gauge; an up-down counter moved by the change matches it
+        attributes = self._attributes(labels)
+        key = (name, tuple(sorted(attributes.items())))
+        with self._lock:
+            gauge = self._gauges.get(name)
+            if gauge is None:
+                gauge = self._gauges[name] = self._meter.create_up_down_counter(name)
+            delta = value - self._gauge_values.get(key, 0)
+            self._gauge_values[key] = value
+        if delta:
+            gauge.add(delta, attributes)
+
+    @staticmethod
+    def _attributes(values):
+        return {
+            key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in values.items()
+        }
\ No newline at end of file
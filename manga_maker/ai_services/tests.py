@@ -1,3 +1,86 @@
-from django.test import TestCase
+# ai_services/tests.py
+import base64
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .responses import ResponseTooLarge, _iter_strings, decode_base64, read_response
+
+
+def fake_response(body, chunk=7, headers=None):
+    response = mock.Mock(headers=headers or {})
+    response.iter_content.return_value = [body[i:i + chunk] for i in range(0, len(body), chunk)]
+    return response
+
+
+class IterStringsTests(SimpleTestCase):
+    def strings(self, document):
+        buffer = document.encode('utf-8')
+        return [(path, buffer[start:end].decode('utf-8'), escaped)
+                for path, start, end, escaped in _iter_strings(buffer)]
+
+    def test_paths_follow_objects_and_arrays(self):
+        document = json.dumps({'images': ['a', 'b'], 'meta': {'seed': 7, 'name': 'c'}, 'flag': True})
+
+        self.assertEqual(self.strings(document), [
+            (('images', 0), 'a', False),
+            (('images', 1), 'b', False),
+            (('meta', 'name'), 'c', False),
+        ])
+
+    def test_literals_and_nested_arrays_advance_the_index(self):
+        document = '[1, null, [true, "x"], {"k": "y"}, "z"]'
+
+        self.assertEqual(self.strings(document), [
+            ((2, 1), 'x', False),
+            ((3, 'k'), 'y', False),
+            ((4,), 'z', False),
+        ])
+
+    def test_escaped_quotes_and_keys(self):
+        document = r'{"a\"b": "say \"hi\"", "c": "d\\"}'
+
+        self.assertEqual(self.strings(document), [
+            (('a"b',), r'say \"hi\"', True),
+            (('c',), 'd\\\\', True),
+        ])
+
+    def test_unterminated_string_is_an_error(self):
+        with self.assertRaises(ValueError):
+            list(_iter_strings(b'{"image": "abc'))
+
+
+class ReadResponseTests(SimpleTestCase):
+    def test_find_strings_returns_the_first_match(self):
+        body = json.dumps({'images': ['first', 'second'], 'image': 'one\\ntwo'}).encode()
+
+        with read_response(fake_response(body)) as read:
+            found = read.find_strings(('images', 0), ('image',), ('missing',))
+            self.assertEqual(bytes(found[('images', 0)]), b'first')
+            self.assertEqual(bytes(found[('image',)]), b'one\\ntwo')
+            self.assertNotIn(('missing',), found)
+
+    def test_large_bodies_spill_to_a_file(self):
+        body = json.dumps({'image': 'x' * 100}).encode()
+
+        with read_response(fake_response(body), spill_bytes=50) as read:
+            self.assertTrue(read.spilled)
+            self.assertEqual(read.json(), {'image': 'x' * 100})
+            self.assertEqual(bytes(read.find_strings(('image',))[('image',)]), b'x' * 100)
+
+    def test_size_cap_applies_to_declared_and_actual_size(self):
+        with self.assertRaises(ResponseTooLarge):
+            read_response(fake_response(b'{}', headers={'Content-Length': '1000'}), max_bytes=100)
+        response = fake_response(b'"' + b'x' * 200 + b'"')
+        with self.assertRaises(ResponseTooLarge):
+            read_response(response, max_bytes=100)
+        response.close.assert_called_once_with()
+
+    def test_decode_base64_in_slices(self):
+        data = bytes(range(256)) * 50
+        encoded = base64.b64encode(data)
+
+        with mock.patch('ai_services.responses.DECODE_CHUNK_CHARS', 400):
+            self.assertEqual(decode_base64(encoded), data)
+            self.assertEqual(decode_base64(encoded[:200] + b'\n' + encoded[200:]), data)
\ No newline at end of file
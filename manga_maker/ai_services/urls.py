@@ -0,0 +1,9 @@
+# ai_services/urls.py
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('images/<str:variant>/<path:name>', views.image_variant, name='image-variant'),
+    path('metrics', views.metrics, name='metrics'),
+]
\ No newline at end of file
@@ -1,3 +1,44 @@
-from django.shortcuts import render
+# ai_services/views.py
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.core.files.storage import default_storage
+from django.views.decorators.http import require_GET
+
+from . import telemetry
+from .postprocessing import SOURCE_PREFIX, ImageVariantService
+
+
+@require_GET
+def image_variant(request, variant, name):
+    """Redirect to a derived version of a panel image, encoding it on first request"""
+    try:
+        path = ImageVariantService.get_variant_path(f"{SOURCE_PREFIX}{name}", variant)
+    except (ValueError, FileNotFoundError):
+        raise Http404("No such image variant")
+    
+    response = HttpResponseRedirect(default_storage.url(path))
+    # Variant paths are content-addressed, so the redirect never goes stale
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+
+@require_GET
+def metrics(request):
+    """Serve pipeline metrics in the Prometheus text format to staff or a scraper with MANGA_METRICS_TOKEN"""
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        raise PermissionDenied
+    exporter = telemetry.get_exporter(telemetry.PrometheusExporter)
+    if exporter is None:
+        raise Http404("Prometheus exporter is not enabled")
+    return HttpResponse(exporter.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _has_metrics_token(request):
+    token = getattr(settings, 'MANGA_METRICS_TOKEN', '')
+    if not token:
+        return False
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode())
\ No newline at end of file
@@ -1,14 +1,47 @@
 # manga/api.py
+from django.core.exceptions import PermissionDenied
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+
+from subscriptions.quota_service import QuotaExceeded
+
+from .chapter_service import ChapterGenerationService, ChapterIncomplete
+from .export_service import ExportService
+from .generation_service import GenerationIncomplete, GenerationInProgress, MangaGenerationService
+from .model_router import ModelRouter
+from .models import MangaProject
+from .pagination import ProjectCursorPagination
+from .scheduler import GenerationScheduler, SchedulerBusy
+from .serializers import MangaChapterSerializer, MangaProjectListSerializer, MangaProjectSerializer
+from .warm_start import WorkerBootstrap
+
+
+def _optional_bool(value):
+    """Interpret a JSON or form boolean; None means the client didn't say"""
+    if value is None or isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
 
 class MangaProjectViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = ProjectCursorPagination
     
     def get_queryset(self):
-        return MangaProject.objects.filter(user=self.request.user)
+        queryset = MangaProject.objects.filter(user=self.request.user)
+        if self.action == 'list':
+            # Listings skip the narrative and never touch panels
+            return queryset.only(
+                'id', 'title', 'template_id', 'created_at', 'chapter_id', 'page_number', 'generation_status'
+            )
+        return queryset.select_related('template').prefetch_related('panel_set')
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return MangaProjectListSerializer
+        return MangaProjectSerializer
     
     @action(detail=False, methods=['post'])
     def generate(self, request):
@@ -19,6 +52,11 @@ class MangaProjectViewSet(viewsets.ModelViewSet):
             panel_count = int(request.data.get('panel_count', 4))
             model_id = request.data.get('model_id')
             template_id = request.data.get('template_id')
+            progressive = _optional_bool(request.data.get('progressive'))
+            # Retrying with the same key resumes the first attempt instead of starting over
+            idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+            # Lets speculative prefetch prepare the client's next page
+            next_narrative = request.data.get('next_narrative')
             
             # Validate
             if not narrative:
@@ -26,15 +64,24 @@ class MangaProjectViewSet(viewsets.ModelViewSet):
                     {'error': 'Narrative is required'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            if idempotency_key and len(idempotency_key) > 255:
+                return Response(
+                    {'error': 'Idempotency key must be at most 255 characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
             # Generate manga
             service = MangaGenerationService(request.user)
-            project = service.generate_manga(
-                narrative=narrative,
-                panel_count=panel_count,
-                model_id=model_id,
-                template_id=template_id
-            )
+            with GenerationScheduler.slot(service.user_profile.subscription_tier):
+                project = service.generate_manga(
+                    narrative=narrative,
+                    panel_count=panel_count,
+                    model_id=model_id,
+                    template_id=template_id,
+                    progressive=progressive,
+                    idempotency_key=idempotency_key,
+                    next_narrative=next_narrative
+                )
             
             # Return project data
             serializer = MangaProjectSerializer(project)
@@ -45,31 +92,209 @@ class MangaProjectViewSet(viewsets.ModelViewSet):
                 {'error': str(e), 'type': 'quota_exceeded'},
                 status=status.HTTP_402_PAYMENT_REQUIRED
             )
+        except SchedulerBusy as e:
+            return Response(
+                {'error': str(e), 'type': 'busy'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '30'}
+            )
+        except GenerationIncomplete as e:
+            return self._incomplete_response(e)
+        except GenerationInProgress as e:
+            return Response(
+                {'error': str(e), 'type': 'in_progress'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Finish a failed or interrupted generation, re-rendering only unfinished panels"""
+        project = self.get_object()
+        try:
+            service = MangaGenerationService(request.user)
+            with GenerationScheduler.slot(service.user_profile.subscription_tier):
+                project = service.resume(project)
+            return Response(MangaProjectSerializer(project).data)
+        except QuotaExceeded as e:
+            return Response(
+                {'error': str(e), 'type': 'quota_exceeded'},
+                status=status.HTTP_402_PAYMENT_REQUIRED
+            )
+        except SchedulerBusy as e:
+            return Response(
+                {'error': str(e), 'type': 'busy'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '30'}
+            )
+        except GenerationIncomplete as e:
+            return self._incomplete_response(e)
+        except GenerationInProgress as e:
+            return Response(
+                {'error': str(e), 'type': 'in_progress'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @staticmethod
+    def _incomplete_response(error):
+        # The finished panels are kept; the client retries via resume or the same idempotency key
+        return Response(
+            {
+                'error': str(error),
+                'type': 'generation_incomplete',
+                'project_id': str(error.project.id),
+                'failed_panels': error.failed_panels
+            },
+            status=status.HTTP_502_BAD_GATEWAY
+        )
+    
+    @action(detail=False, methods=['post'], url_path='generate-chapter')
+    def generate_chapter(self, request):
+        """Generate a multi-page chapter in one batch"""
+        try:
+            # Extract parameters
+            narrative = request.data.get('narrative')
+            page_count = request.data.get('page_count')
+            panels_per_page = int(request.data.get('panels_per_page', 4))
+            model_id = request.data.get('model_id')
+            template_id = request.data.get('template_id')
+            title = request.data.get('title')
+            progressive = _optional_bool(request.data.get('progressive'))
+            
+            # Validate
+            if not narrative:
+                return Response(
+                    {'error': 'Narrative is required'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Generate chapter
+            service = ChapterGenerationService(request.user)
+            with GenerationScheduler.slot(service.user_profile.subscription_tier):
+                chapter = service.generate_chapter(
+                    narrative=narrative,
+                    page_count=int(page_count) if page_count else None,
+                    panels_per_page=panels_per_page,
+                    model_id=model_id,
+                    template_id=template_id,
+                    title=title,
+                    progressive=progressive
+                )
+            
+            # Return chapter data
+            serializer = MangaChapterSerializer(chapter)
+            return Response(serializer.data)
+            
+        except ChapterIncomplete as e:
+            # Finished pages are kept and charged; each failed page is retried via its resume endpoint
+            return Response(
+                {
+                    'error': str(e),
+                    'type': 'generation_incomplete',
+                    'chapter_id': str(e.chapter.id),
+                    'failed_pages': [
+                        {'project_id': str(page.id), 'page_number': page.page_number, 'failed_panels': panels}
+                        for page, panels in sorted(e.failed_pages.items(), key=lambda item: item[0].page_number)
+                    ]
+                },
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+        except QuotaExceeded as e:
+            return Response(
+                {'error': str(e), 'type': 'quota_exceeded'},
+                status=status.HTTP_402_PAYMENT_REQUIRED
+            )
+        except SchedulerBusy as e:
+            return Response(
+                {'error': str(e), 'type': 'busy'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '30'}
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['get'], url_path='render-status')
+    def render_status(self, request, pk=None):
+        """Report preview timing and full-quality upgrade progress"""
+        project = self.get_object()
+        return Response(MangaGenerationService.get_render_status(project))
+    
     @action(detail=True, methods=['post'])
     def export(self, request, pk=None):
-        """Export project as PDF or image"""
+        """Export project, or its whole chapter, as PDF or image"""
         project = self.get_object()
         export_format = request.data.get('format', 'pdf')
+        scope = request.data.get('scope', 'page')
         
         try:
             export_service = ExportService()
             result = export_service.export_project(
                 project=project,
-                format=export_format
+                format=export_format,
+                scope=scope
             )
             
             return Response({
                 'download_url': result['url'],
                 'expires_at': result['expires_at']
             })
+        except PermissionDenied as e:
+            return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def routing_table(request):
+    """Show which providers each tier is routed to, and why"""
+    try:
+        panel_count = int(request.query_params.get('panel_count', 4))
+    except ValueError:
+        return Response({'error': 'panel_count must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(ModelRouter.routing_table(panel_count))
+
+
+@api_view(['GET', 'PATCH'])
+@permission_classes([IsAdminUser])
+def scheduler(request):
+    """Show generation queues and slots; PATCH changes weights and limits live"""
+    if request.method == 'PATCH':
+        try:
+            GenerationScheduler.configure(request.data)
+        except (ValueError, TypeError, AttributeError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(GenerationScheduler.snapshot())
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def liveness(request):
+    """Liveness probe: 200 whenever the process can serve a request, warm or not"""
+    return Response({'state': 'alive'})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def readiness(request):
+    """Readiness probe: 200 once this worker has warmed up, 503 until then; admins see each step"""
+    report = WorkerBootstrap.status()
+    if not request.user.is_staff:
+        report = {key: report[key] for key in ('state', 'seconds')}
+    ready = WorkerBootstrap.ready()
+    return Response(report, status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
\ No newline at end of file
@@ -0,0 +1,242 @@
+# manga/chapter_service.py
+import logging
+import math
+import re
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.utils import timezone
+
+from ai_services import telemetry
+from subscriptions.quota_service import QuotaService, QuotaExceeded
+
+from .character_service import CharacterConsistencyService
+from .generation_service import MangaGenerationService
+from .layout_solver import panel_importance
+from .models import MangaChapter, MangaProject, Panel, Template
+from .render_pipeline import RenderPipeline
+from .template_service import TemplateService
+
+logger = logging.getLogger(__name__)
+
+SCENE_BREAK_PATTERN = re.compile(r"\n\s*\n")
+
+
+class ChapterIncomplete(Exception):
+    """Some pages failed; finished pages are kept and each failed page can be resumed"""
+    
+    def __init__(self, chapter, failed_pages):
+        self.chapter = chapter
+        # {page project: [failed panel numbers]}; empty when the page couldn't be planned
+        self.failed_pages = failed_pages
+        super().__init__(
+            f"{len(failed_pages)} page(s) of chapter {chapter.id} failed; resume those pages to finish them"
+        )
+
+
+class ChapterGenerationService(MangaGenerationService):
+    """
+    Generate a whole chapter of manga pages in a single batch
+
+    Character extraction and template selection run once per chapter, and
+    every panel of every page is rendered through the shared RenderPipeline.
+    Each page is a checkpointed project like a single-page generation:
+    panels are saved as their renders finish, and a page with failures is
+    marked failed so MangaGenerationService.resume() can finish it.
+    """
+
+    @telemetry.traced('generation.chapter')
+    def generate_chapter(self, narrative, page_count=None, panels_per_page=4,
+                         model_id=None, template_id=None, title=None, progressive=None):
+        """
+        Generate a multi-page chapter from a long narrative
+
+        Args:
+            narrative (str): Full chapter narrative
+            page_count (int, optional): Number of pages; derived from the
+                narrative length when omitted
+            panels_per_page (int): Number of panels on each page
+            model_id (int, optional): AIModel to generate with
+            template_id (int, optional): Template shared by all pages
+            title (str, optional): Chapter title
+            progressive (bool, optional): Render previews first and upgrade
+                them in the background; defaults by subscription tier
+
+        Returns:
+            MangaChapter: The generated chapter, with one project per page
+            
+        Raises:
+            ChapterIncomplete: If any page failed; the others are complete and charged
+        """
+        page_texts = self.split_into_pages(narrative, page_count)
+
+        if not QuotaService.check_user_quota(self.user_profile, len(page_texts)):
+            raise QuotaExceeded(
+                f"This chapter needs {len(page_texts)} pages but only "
+                f"{self.user_profile.remaining_pages} remain this month"
+            )
+
+        context = self.get_context(model_id, panels_per_page)
+        llm_service, image_service = context.llm_service, context.image_service
+
+        progressive = self._use_progressive(progressive)
+        quality_settings = context.preview_settings if progressive else context.quality_settings
+        # What resume() needs to redo a page on its own
+        params = {
+            'panel_count': panels_per_page,
+            'model_id': model_id,
+            'template_id': template_id,
+            'progressive': progressive
+        }
+
+        # 1. Create the chapter and one project per page
+        chapter = MangaChapter.objects.create(
+            user=self.user,
+            title=title or f"Chapter {timezone.now().strftime('%Y-%m-%d %H:%M')}",
+            narrative=narrative
+        )
+        pages = MangaProject.objects.bulk_create([
+            MangaProject(
+                user=self.user,
+                title=f"{chapter.title} - Page {number}",
+                narrative=text,
+                chapter=chapter,
+                page_number=number,
+                generation_status='generating',
+                generation_started_at=timezone.now(),
+                generation_params=dict(params)
+            )
+            for number, text in enumerate(page_texts, start=1)
+        ])
+
+        # 2. Extract characters once and share the roster with every page
+        with telemetry.span('generation.extract_characters', pages=len(pages)):
+            character_service = CharacterConsistencyService(pages[0].id)
+            character_service.extract_characters(narrative)
+            character_service.share_roster([page.id for page in pages])
+
+        # 3. Break every page into panels concurrently; each panel starts
+        #    rendering on the shared pipeline as soon as it is described
+        with telemetry.span('generation.parse_narrative', provider=type(llm_service).__name__,
+                            pages=len(pages)):
+            page_plans = [
+                RenderPipeline.submit(
+                    self._stream_panels, llm_service, image_service, character_service, text, panels_per_page,
+                    quality_settings=quality_settings
+                )
+                for text in page_texts
+            ]
+
+        # 4. Select a single template for the chapter while the images render
+        with telemetry.span('generation.suggest_template'):
+            if not template_id:
+                template = TemplateService.suggest_template(page_texts[0], panels_per_page)
+            else:
+                template = Template.objects.get(id=template_id)
+        MangaProject.objects.filter(chapter=chapter).update(template=template)
+
+        # 5. Save each page's panels as planned, then each image as soon as it
+        #    arrives, so a failure elsewhere keeps it
+        failed = {}
+        renders = {}
+        for page, plan in zip(pages, page_plans):
+            try:
+                jobs = plan.result()
+            except Exception as e:
+                # Not marked planned, so resume() plans the page again
+                logger.warning("Planning failed for page %s of chapter %s: %s", page.page_number, chapter.id, e)
+                failed[page] = []
+                continue
+            panels = Panel.objects.bulk_create([
+                Panel(
+                    project=page,
+                    panel_number=number,
+                    description=data['description'],
+                    prompt=data['image_prompt'],
+                    importance=panel_importance(data.get('importance')),
+                    generation_status='rendering'
+                )
+                for number, (data, _) in enumerate(jobs, start=1)
+            ])
+            page.generation_params['planned'] = True
+            page.save(update_fields=['generation_params'])
+            renders.update({render: (page, panel) for panel, (_, render) in zip(panels, jobs)})
+
+        with telemetry.span('generation.await_images', provider=type(image_service).__name__):
+            for render in as_completed(renders):
+                page, panel = renders[render]
+                if not self._save_render(page, panel, render, progressive):
+                    failed.setdefault(page, []).append(panel.panel_number)
+
+        # 6. Lay out the finished pages and mark the rest failed
+        finished = [page for page in pages if page not in failed]
+        panels_by_page = {}
+        with telemetry.span('db.write_panels', pages=len(finished)):
+            for page in finished:
+                panels_by_page[page.id] = list(Panel.objects.filter(project=page))
+                TemplateService.apply_template(panels_by_page[page.id], template)
+        if failed:
+            MangaProject.objects.filter(pk__in=[page.pk for page in failed]).update(generation_status='failed')
+            telemetry.increment('generation.incomplete_pages', len(failed))
+
+        # 7. Track usage for every finished page, once, on the transition to complete
+        completed = MangaProject.objects.filter(
+            pk__in=[page.pk for page in finished], generation_status='generating'
+        ).update(generation_status='complete')
+        if completed:
+            QuotaService.increment_usage(self.user_profile, completed)
+
+        # 8. Upgrade every preview to full quality in the background
+        if progressive:
+            for page in finished:
+                self._schedule_upgrades(image_service, panels_by_page[page.id])
+
+        if failed:
+            raise ChapterIncomplete(chapter, {page: sorted(numbers) for page, numbers in failed.items()})
+        return chapter
+
+    @staticmethod
+    def split_into_pages(narrative, page_count=None):
+        """
+        Split a narrative into page-sized chunks along scene breaks
+
+        Paragraphs are never cut; they are grouped so every page gets a
+        similar share of the text.
+
+        Args:
+            narrative (str): Full chapter narrative
+            page_count (int, optional): Number of pages wanted
+
+        Returns:
+            list: Narrative text for each page
+        """
+        paragraphs = [p.strip() for p in SCENE_BREAK_PATTERN.split(narrative) if p.strip()]
+        if not paragraphs:
+            raise ValueError("Narrative is empty")
+
+        max_pages = getattr(settings, 'MANGA_CHAPTER_MAX_PAGES', 40)
+        if not page_count:
+            chars_per_page = getattr(settings, 'MANGA_CHAPTER_CHARS_PER_PAGE', 1500)
+            page_count = math.ceil(len(narrative) / chars_per_page)
+        page_count = max(1, min(page_count, max_pages, len(paragraphs)))
+
+        # Close a page once it reaches its share of the remaining text
+        pages = []
+        current = []
+        remaining = sum(len(p) for p in paragraphs)
+        for i, paragraph in enumerate(paragraphs):
+            current.append(paragraph)
+            pages_left = page_count - len(pages)
+            paragraphs_left = len(paragraphs) - i - 1
+            current_size = sum(len(p) for p in current)
+            if pages_left > 1 and (
+                current_size >= remaining / pages_left or paragraphs_left < pages_left
+            ):
+                pages.append("\n\n".join(current))
+                remaining -= current_size
+                current = []
+
+        if current:
+            pages.append("\n\n".join(current))
+
+        return pages
\ No newline at end of file
@@ -1,4 +1,12 @@
 # character_service.py
+import json
+import random
+
+from ai_services.registry import AIServiceRegistry
+
+from .models import CharacterProfile
+
+
 class CharacterConsistencyService:
     def __init__(self, project_id):
         self.project_id = project_id
@@ -16,8 +24,22 @@ class CharacterConsistencyService:
                 'style_reference': character.style_reference
             }
     
-    def extract_characters(self, narrative):
-        """Use LLM to extract character information from narrative"""
+    def extract_characters(self, narrative, extracted=None):
+        """
+        Use LLM to extract character information from narrative
+        
+        Args:
+            narrative (str): Narrative text to find characters in
+            extracted (str or list, optional): An earlier request_characters()
+                result for the same narrative; skips the LLM call
+        """
+        if extracted is None:
+            extracted = self.request_characters(narrative)
+        return self._process_character_data(extracted)
+    
+    @staticmethod
+    def request_characters(narrative):
+        """Ask the LLM for the narrative's characters; returns its raw answer"""
         llm_service = AIServiceRegistry.get('llm', 'openai')
         
         prompt = (
@@ -28,12 +50,29 @@ class CharacterConsistencyService:
             "Return as a JSON array of character objects with 'name' and 'visual_traits' keys."
         )
         
-        result = llm_service.execute(prompt)
-        return self._process_character_data(result)
+        return llm_service.execute(prompt)
+    
+    @staticmethod
+    def parse_character_data(character_data):
+        """Turn an LLM character answer into a list of dicts that each have a name"""
+        if isinstance(character_data, str):
+            # LLM adapters return the raw completion text
+            try:
+                character_data = json.loads(character_data)
+            except json.JSONDecodeError:
+                character_data = []
+        if isinstance(character_data, dict):
+            character_data = character_data.get('characters', [])
+        if not isinstance(character_data, list):
+            return []
+        return [
+            character for character in character_data
+            if isinstance(character, dict) and character.get('name')
+        ]
     
     def _process_character_data(self, character_data):
         """Process and store character data extracted by LLM"""
-        for character in character_data:
+        for character in self.parse_character_data(character_data):
             # If we already have this character, update/merge info
             if character['name'] in self.characters:
                 # Update with new information while preserving the seed
@@ -43,7 +82,8 @@ class CharacterConsistencyService:
                 self.characters[character['name']] = {
                     'description': character.get('description', ''),
                     'visual_traits': character.get('visual_traits', ''),
-                    'seed': random.randint(1, 1000000),  # Generate consistent seed
+                    # Generate consistent seed, unless one was carried over from an earlier page
+                    'seed': character.get('seed') or random.randint(1, 1000000),
                     'style_reference': None
                 }
                 
@@ -58,6 +98,30 @@ class CharacterConsistencyService:
         
         return self.characters
     
+    def share_roster(self, project_ids):
+        """
+        Copy the loaded character roster onto other projects
+        
+        Used for multi-page chapters so every page reuses the same
+        characters and seeds without extracting them again.
+        
+        Args:
+            project_ids (list): IDs of the projects receiving the roster
+        """
+        CharacterProfile.objects.bulk_create([
+            CharacterProfile(
+                project_id=project_id,
+                name=name,
+                description=char['description'],
+                visual_traits=char['visual_traits'],
+                seed=char['seed'],
+                style_reference=char['style_reference']
+            )
+            for project_id in project_ids
+            if project_id != self.project_id
+            for name, char in self.characters.items()
+        ])
+    
     def inject_character_consistency(self, prompt, character_names=None):
         """Enhance image generation prompt with character consistency info"""
         if not character_names:
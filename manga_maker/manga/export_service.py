@@ -0,0 +1,279 @@
+# manga/export_service.py
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import MangaProject, Panel
+from .page_render import StreamingPdfWriter, render_page
+
+EXPORT_PREFIX = 'exports/'
+EXPORT_FORMATS = ('pdf', 'png')
+
+# Bump whenever rendering output changes so cached exports are rebuilt
+RENDERER_VERSION = 1
+
+
+class ExportService:
+    """
+    Render manga pages to PDF or PNG
+
+    Pages are composited in a process pool with a bounded number in flight
+    and streamed into the output file one at a time, so memory stays flat
+    however many pages are exported. Outputs are stored under a hash of the
+    page content, which makes repeat exports a storage lookup. Each export
+    is kept for MANGA_EXPORT_TTL seconds after it was last handed out, then
+    deleted by sweep() (the sweep_exports command).
+    """
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls):
+        """Return the shared page renderer pool, creating it on first use"""
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    # Forking a process that already runs threads can deadlock the child
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=getattr(settings, 'MANGA_EXPORT_WORKERS', 2),
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return cls._executor
+
+    def export_project(self, project, format='pdf', scope='page'):
+        """
+        Export a project, or the whole chapter it belongs to
+
+        Args:
+            project (MangaProject): Project to export
+            format (str): 'pdf' or 'png'; multi-page PNG exports are zipped
+            scope (str): 'page' for this project only, 'chapter' for every
+                page of its chapter
+
+        Returns:
+            dict: 'url' of the exported file and 'expires_at'
+
+        Raises:
+            PermissionDenied: If the project belongs to a chapter of another user
+        """
+        pages = [project]
+        if scope == 'chapter' and project.chapter_id:
+            if project.chapter.user_id != project.user_id:
+                raise PermissionDenied("The project's chapter belongs to another user")
+            pages = list(
+                MangaProject.objects.filter(
+                    chapter_id=project.chapter_id, user_id=project.user_id
+                ).order_by('page_number')
+            )
+        return self.export_pages(pages, format)
+
+    def export_pages(self, pages, format='pdf'):
+        """
+        Export pages in order as a single file
+
+        Args:
+            pages (list): MangaProject instances, one per page
+            format (str): 'pdf' or 'png'
+
+        Returns:
+            dict: 'url' of the exported file and 'expires_at'
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        if not pages:
+            raise ValueError("Nothing to export")
+
+        specs = self._page_specs(pages, format)
+        if format == 'pdf':
+            extension = 'pdf'
+        else:
+            extension = 'png' if len(specs) == 1 else 'zip'
+
+        path = f"{EXPORT_PREFIX}{self._content_hash(format, specs)}.{extension}"
+        if not default_storage.exists(path):
+            path = self._render(specs, format, path)
+
+        ttl = getattr(settings, 'MANGA_EXPORT_TTL', 24 * 60 * 60)
+        return {
+            'url': default_storage.url(path),
+            'expires_at': self._touch(path) + timedelta(seconds=ttl)
+        }
+
+    @classmethod
+    def sweep(cls, max_age=None):
+        """
+        Delete exports that have expired
+
+        Args:
+            max_age (int, optional): Seconds since an export was last handed
+                out; defaults to MANGA_EXPORT_TTL
+
+        Returns:
+            tuple: (files_removed, bytes_freed)
+        """
+        if max_age is None:
+            max_age = getattr(settings, 'MANGA_EXPORT_TTL', 24 * 60 * 60)
+        directory = EXPORT_PREFIX.rstrip('/')
+        if not default_storage.exists(directory):
+            return 0, 0
+
+        cutoff = timezone.now() - timedelta(seconds=max_age)
+        removed = freed = 0
+        _, files = default_storage.listdir(directory)
+        for name in files:
+            path = f"{EXPORT_PREFIX}{name}"
+            try:
+                if default_storage.get_modified_time(path) > cutoff:
+                    continue
+                size = default_storage.size(path)
+                default_storage.delete(path)
+            except FileNotFoundError:
+                # Deleted by a concurrent sweep
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def _render(self, specs, format, path):
+        """Render every page and stream the result into storage"""
+        workers = getattr(settings, 'MANGA_EXPORT_WORKERS', 2)
+        executor = self.get_executor()
+
+        with tempfile.TemporaryDirectory(prefix='manga-export-') as workdir:
+            output_path = os.path.join(workdir, os.path.basename(path))
+            with open(output_path, 'wb') as output:
+                sink = self._open_sink(output, format, len(specs))
+                pending = deque()
+
+                for number, spec in enumerate(specs, start=1):
+                    page_path = os.path.join(workdir, f"page-{number:04d}.{spec['format'].lower()}")
+                    pending.append((number, spec, executor.submit(render_page, spec, page_path)))
+                    # Only keep a couple of pages per worker in flight
+                    if len(pending) >= workers * 2:
+                        self._write_page(sink, *pending.popleft())
+
+                while pending:
+                    self._write_page(sink, *pending.popleft())
+
+                if isinstance(sink, (StreamingPdfWriter, zipfile.ZipFile)):
+                    sink.close()
+
+            with open(output_path, 'rb') as output:
+                return default_storage.save(path, File(output))
+
+    @staticmethod
+    def _open_sink(output, format, page_count):
+        if format == 'pdf':
+            return StreamingPdfWriter(output)
+        if page_count > 1:
+            # Pages are already compressed PNGs; storing avoids a second deflate pass
+            return zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED)
+        return output
+
+    @staticmethod
+    def _write_page(sink, number, spec, future):
+        page_path = future.result()
+        try:
+            if isinstance(sink, StreamingPdfWriter):
+                width, height = spec['size']
+                sink.add_jpeg_page(page_path, width, height, spec['dpi'])
+            elif isinstance(sink, zipfile.ZipFile):
+                sink.write(page_path, arcname=f"page-{number:04d}.png")
+            else:
+                with open(page_path, 'rb') as page:
+                    shutil.copyfileobj(page, sink)
+        finally:
+            os.remove(page_path)
+
+    def _page_specs(self, pages, format):
+        """Build the rendering instructions for each page"""
+        width, height = getattr(settings, 'MANGA_EXPORT_PAGE_SIZE', (1654, 2339))
+        dpi = getattr(settings, 'MANGA_EXPORT_DPI', 200)
+        border = getattr(settings, 'MANGA_EXPORT_BORDER', 4)
+
+        panels_by_page = {page.pk: [] for page in pages}
+        panel_rows = Panel.objects.filter(project__in=pages).order_by('project', 'panel_number').values(
+            'project_id', 'image_url', 'position_x', 'position_y', 'width', 'height'
+        )
+        for row in panel_rows:
+            panels_by_page[row['project_id']].append(row)
+
+        specs = []
+        for page in pages:
+            panels = panels_by_page[page.pk]
+            # Layouts use either 0-1 fractions of the page or design-canvas units
+            extent_x = max([p['position_x'] + p['width'] for p in panels] + [1])
+            extent_y = max([p['position_y'] + p['height'] for p in panels] + [1])
+            scale_x = width / extent_x
+            scale_y = height / extent_y
+
+            specs.append({
+                'size': [width, height],
+                'dpi': dpi,
+                'border': border,
+                'format': 'JPEG' if format == 'pdf' else 'PNG',
+                'panels': [
+                    {
+                        'box': [
+                            round(p['position_x'] * scale_x),
+                            round(p['position_y'] * scale_y),
+                            round((p['position_x'] + p['width']) * scale_x),
+                            round((p['position_y'] + p['height']) * scale_y)
+                        ],
+                        'source': self._image_source(p['image_url'])
+                    }
+                    for p in panels
+                ]
+            })
+        return specs
+
+    @staticmethod
+    def _touch(path):
+        """Restart a reused export's lifetime so the sweep keeps it as long as advertised"""
+        try:
+            os.utime(default_storage.path(path))
+        except NotImplementedError:
+            # Remote storage can't be touched; the export expires a TTL after it was rendered
+            pass
+        return default_storage.get_modified_time(path)
+
+    @staticmethod
+    def _image_source(image_url):
+        """Tell the renderer where to read a panel image from"""
+        if not image_url:
+            return {}
+
+        base_url = default_storage.base_url
+        if base_url and image_url.startswith(base_url):
+            name = image_url[len(base_url):]
+            try:
+                return {'path': default_storage.path(name)}
+            except NotImplementedError:
+                # Remote storage backend; fetch through its URL
+                return {'url': default_storage.url(name)}
+
+        if image_url.startswith(('http://', 'https://')):
+            return {'url': image_url}
+        return {}
+
+    @staticmethod
+    def _content_hash(format, specs):
+        payload = json.dumps(
+            {'version': RENDERER_VERSION, 'format': format, 'pages': specs},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
\ No newline at end of file
@@ -0,0 +1,203 @@
+# manga/generation_context.py
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ai_services import telemetry
+from ai_services.registry import AIServiceRegistry
+
+from .models import AIModel
+
+# Default (llm, image) providers by tier
+TIER_PROVIDERS = {
+    'FREE': ('huggingface', 'stability-basic'),
+    'BASIC': ('openai', 'stability-standard'),
+    'PRO': ('openai', 'stability-creative'),
+    'ENTERPRISE': ('openai', 'midjourney')
+}
+DEFAULT_PROVIDERS = TIER_PROVIDERS['FREE']
+
+# Image quality by tier; shared by every job, so frozen
+TIER_QUALITY_SETTINGS = {
+    'FREE': MappingProxyType({
+        'width': 512,
+        'height': 512,
+        'steps': 30,
+        'cfg_scale': 7
+    }),
+    'BASIC': MappingProxyType({
+        'width': 768,
+        'height': 768,
+        'steps': 40,
+        'cfg_scale': 7.5
+    }),
+    'PRO': MappingProxyType({
+        'width': 1024,
+        'height': 1024,
+        'steps': 50,
+        'cfg_scale': 8
+    }),
+    'ENTERPRISE': MappingProxyType({
+        'width': 1536,
+        'height': 1536,
+        'steps': 60,
+        'cfg_scale': 9
+    })
+}
+
+
+def preview_settings(quality_settings):
+    """Cheap settings for a preview pass: a quarter of the pixels, few steps"""
+    return {
+        **quality_settings,
+        'width': max(256, quality_settings['width'] // 2 // 64 * 64),
+        'height': max(256, quality_settings['height'] // 2 // 64 * 64),
+        'steps': max(8, quality_settings['steps'] // 4)
+    }
+
+
+TIER_PREVIEW_SETTINGS = {
+    tier: MappingProxyType(preview_settings(values)) for tier, values in TIER_QUALITY_SETTINGS.items()
+}
+
+
+class AIModelCache:
+    """
+    Process-level cache of AIModel rows
+
+    Entries are tagged with a version number held in the shared Django
+    cache; saving or deleting any AIModel bumps it and every process
+    reloads on its next lookup. Entries are also dropped once older than
+    MANGA_AI_MODEL_CACHE_MAX_AGE seconds, in case the version bump is lost.
+    Cached instances are shared and must not be modified.
+    """
+    VERSION_KEY = 'ai-model-cache-version'
+    _models = {}
+    _version = None
+    _loaded_at = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, model_id):
+        """
+        Return an AIModel by id
+
+        Raises:
+            AIModel.DoesNotExist: If there is no such model
+        """
+        version = cls._current_version()
+        with cls._lock:
+            cls._sync(version)
+            model = cls._models.get(str(model_id))
+        if model is not None:
+            telemetry.increment('ai_model_cache.hits')
+            return model
+
+        telemetry.increment('ai_model_cache.misses')
+        model = AIModel.objects.get(id=model_id)
+        with cls._lock:
+            if cls._version == version:
+                cls._models[str(model_id)] = model
+        return model
+
+    @classmethod
+    def active(cls):
+        """
+        Return every active AIModel, in id order
+
+        Returns:
+            tuple: AIModel instances, cached until any AIModel changes
+        """
+        version = cls._current_version()
+        with cls._lock:
+            cls._sync(version)
+            active = cls._models.get('active')
+        if active is not None:
+            return active
+
+        active = tuple(AIModel.objects.filter(is_active=True).order_by('id'))
+        with cls._lock:
+            if cls._version == version:
+                cls._models['active'] = active
+        return active
+
+    @classmethod
+    def invalidate(cls):
+        """Drop every process's cached models"""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, int(time.time() * 1000), None)
+
+    @classmethod
+    def _sync(cls, version):
+        """Drop the entries if the version moved on or they are too old; call with the lock held"""
+        now = time.monotonic()
+        if cls._version != version or now - cls._loaded_at > getattr(settings, 'MANGA_AI_MODEL_CACHE_MAX_AGE', 300):
+            cls._models = {}
+            cls._version = version
+            cls._loaded_at = now
+
+    @classmethod
+    def _current_version(cls):
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            cache.add(cls.VERSION_KEY, 1, None)
+            version = cache.get(cls.VERSION_KEY, 1)
+        return version
+
+
+class GenerationContext:
+    """
+    Everything a generation job resolves up front, built once per job
+
+    Holds the user's profile, the chosen AIModel, the
+    provider instances and the tier's quality settings, so no stage or panel
+    has to look any of them up again.
+    """
+    __slots__ = (
+        'user_profile', 'tier', 'model',
+        'llm_provider', 'image_provider', 'llm_service', 'image_service',
+        'quality_settings', 'preview_settings'
+    )
+
+    def __init__(self, user_profile, model=None, providers=None):
+        self.user_profile = user_profile
+        self.tier = user_profile.subscription_tier
+        self.model = model
+
+        if providers:
+            self.llm_provider, self.image_provider = providers
+        elif model:
+            self.llm_provider, self.image_provider = model.llm_provider, model.image_provider
+        else:
+            self.llm_provider, self.image_provider = TIER_PROVIDERS.get(self.tier, DEFAULT_PROVIDERS)
+        self.llm_service = AIServiceRegistry.get('llm', self.llm_provider)
+        self.image_service = AIServiceRegistry.get('image', self.image_provider)
+
+        tier = self.tier if self.tier in TIER_QUALITY_SETTINGS else 'FREE'
+        self.quality_settings = TIER_QUALITY_SETTINGS[tier]
+        self.preview_settings = TIER_PREVIEW_SETTINGS[tier]
+
+    @classmethod
+    def build(cls, user_profile, model_id=None, route=None):
+        """
+        Resolve the context for a job
+
+        Args:
+            user_profile (UserProfile): Profile of the user generating
+            model_id (int, optional): AIModel to generate with
+            route (Route, optional): Providers picked by the ModelRouter;
+                used when no model_id is given
+
+        Returns:
+            GenerationContext: The resolved context
+        """
+        if model_id:
+            return cls(user_profile, AIModelCache.get(model_id))
+        if route is not None:
+            return cls(user_profile, route.model, (route.llm_provider, route.image_provider))
+        return cls(user_profile)
\ No newline at end of file
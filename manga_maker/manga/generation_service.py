@@ -1,137 +1,538 @@
 # manga/generation_service.py
+import logging
+import random
+from concurrent.futures import as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from ai_services import telemetry
+from ai_services.blob_store import BlobStore
+from subscriptions.quota_service import QuotaService, QuotaExceeded
+
+from .character_service import CharacterConsistencyService
+from .generation_context import GenerationContext
+from .layout_solver import panel_importance
+from .model_router import ModelRouter
+from .models import MangaProject, Panel, Template, UserProfile
+from .prefetch import SpeculativePrefetcher
+from .render_pipeline import RenderPipeline
+from .template_service import TemplateCatalogue, TemplateService
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationIncomplete(Exception):
+    """Some panels failed to render; the rest are saved and resume() retries the failures"""
+    
+    def __init__(self, project, failed_panels):
+        self.project = project
+        self.failed_panels = failed_panels
+        super().__init__(
+            f"{len(failed_panels)} panel(s) failed to render; resume project {project.id} to retry them"
+        )
+
+
+class GenerationInProgress(Exception):
+    """Another request is already generating the project"""
+
+
 class MangaGenerationService:
-    def __init__(self, user, project=None):
+    def __init__(self, user, project=None, user_profile=None):
         self.user = user
         self.project = project
-        self.user_profile = UserProfile.objects.get(user=user)
+        self.user_profile = user_profile or UserProfile.objects.get(user=user)
+        self.context = None
         
     def can_generate(self):
         """Check if user has available quota"""
         return QuotaService.check_user_quota(self.user_profile)
     
-    def generate_manga(self, narrative, panel_count=4, model_id=None, template_id=None):
-        """Generate a complete manga page from narrative"""
+    @telemetry.traced('generation.page')
+    def generate_manga(self, narrative, panel_count=4, model_id=None, template_id=None,
+                       progressive=None, idempotency_key=None, next_narrative=None):
+        """
+        Generate a complete manga page from narrative
+        
+        Every panel's progress is checkpointed, so a failed job can be
+        finished by resume() without redoing completed panels. Repeating a
+        call with the same idempotency_key resumes (or returns) the project
+        that key created instead of starting over.
+        
+        Args:
+            narrative (str): Narrative text for the page
+            panel_count (int): Number of panels wanted
+            model_id (int, optional): AIModel to generate with
+            template_id (int, optional): Layout template; suggested otherwise
+            progressive (bool, optional): Render previews first; defaults by tier
+            idempotency_key (str, optional): Client key identifying this request
+            next_narrative (str, optional): The segment the client expects to
+                generate next; prepared ahead of time when speculative prefetch is on
+            
+        Returns:
+            MangaProject: The generated project
+            
+        Raises:
+            QuotaExceeded: If the user has no pages left this month
+            GenerationIncomplete: If some panels failed; resume() retries them
+            GenerationInProgress: If another request is working on the same key
+        """
+        if idempotency_key:
+            existing = MangaProject.objects.filter(user=self.user, idempotency_key=idempotency_key).first()
+            if existing is not None:
+                return self.resume(existing)
+        
         if not self.can_generate():
             raise QuotaExceeded("You've reached your monthly page limit")
         
-        # Choose appropriate models based on subscription tier
-        llm_provider, image_provider = self._get_providers(model_id)
+        # Resolve models, providers and quality settings once for the whole job
+        self.get_context(model_id, panel_count)
         
-        # 1. Create project if not provided
+        # 1. Create project if not provided; it stays 'generating' until every panel is done
+        checkpoint = {
+            'generation_status': 'generating',
+            'generation_started_at': timezone.now(),
+            'generation_params': {
+                'panel_count': panel_count,
+                'model_id': model_id,
+                'template_id': template_id,
+                'progressive': self._use_progressive(progressive),
+                'next_narrative': next_narrative,
+                'planned': False
+            }
+        }
         if not self.project:
-            self.project = MangaProject.objects.create(
-                user=self.user,
-                title=f"Project {timezone.now().strftime('%Y-%m-%d %H:%M')}",
-                narrative=narrative
+            try:
+                with transaction.atomic():
+                    self.project = MangaProject.objects.create(
+                        user=self.user,
+                        title=f"Project {timezone.now().strftime('%Y-%m-%d %H:%M')}",
+                        narrative=narrative,
+                        idempotency_key=idempotency_key,
+                        **checkpoint
+                    )
+            except IntegrityError:
+                # A concurrent request with the same key created it first
+                return self.resume(
+                    MangaProject.objects.get(user=self.user, idempotency_key=idempotency_key)
+                )
+        else:
+            self.project.narrative = narrative
+            for field, value in checkpoint.items():
+                setattr(self.project, field, value)
+            self.project.save(update_fields=['narrative', *checkpoint])
+        
+        return self._run_checkpointed()
+    
+    def resume(self, project=None):
+        """
+        Finish a generation that failed or was interrupted
+        
+        Only panels that aren't done are rendered again; a project whose
+        breakdown never completed is planned again from scratch. Completed
+        projects are returned as they are, so resuming is idempotent.
+        
+        Args:
+            project (MangaProject, optional): Project to resume; defaults to self.project
+            
+        Returns:
+            MangaProject: The generated project
+            
+        Raises:
+            QuotaExceeded: If the user has no pages left this month
+            GenerationIncomplete: If some panels failed again
+            GenerationInProgress: If another request is still working on it
+        """
+        self.project = project = project or self.project
+        if project.generation_status == 'complete':
+            return project
+        
+        if not self.can_generate():
+            raise QuotaExceeded("You've reached your monthly page limit")
+        
+        # Take over the job unless another worker still holds a fresh claim on it
+        lease = getattr(settings, 'MANGA_GENERATION_LEASE_SECONDS', 600)
+        now = timezone.now()
+        claimed = MangaProject.objects.filter(pk=project.pk).exclude(generation_status='complete').exclude(
+            generation_status='generating', generation_started_at__gt=now - timedelta(seconds=lease)
+        ).update(generation_status='generating', generation_started_at=now)
+        if not claimed:
+            project.refresh_from_db()
+            if project.generation_status == 'complete':
+                return project
+            raise GenerationInProgress(f"Project {project.id} is already being generated")
+        project.generation_status, project.generation_started_at = 'generating', now
+        
+        params = project.generation_params
+        self.get_context(params.get('model_id'), params.get('panel_count', 4))
+        return self._run_checkpointed()
+    
+    def _run_checkpointed(self):
+        """Run or continue self.project's generation, recording each panel's progress"""
+        project = self.project
+        params = project.generation_params
+        try:
+            return self._generate_panels(project, params)
+        except GenerationIncomplete:
+            raise
+        except Exception:
+            MangaProject.objects.filter(pk=project.pk, generation_status='generating').update(
+                generation_status='failed'
             )
+            raise
+    
+    def _generate_panels(self, project, params):
+        context = self.get_context()
+        progressive = params.get('progressive', False)
+        quality_settings = context.preview_settings if progressive else context.quality_settings
         
-        # 2. Extract characters for consistency
-        character_service = CharacterConsistencyService(self.project.id)
-        characters = character_service.extract_characters(narrative)
+        # Work a speculative prefetch already did for this narrative
+        prepared = None
+        if not params.get('planned') and SpeculativePrefetcher.enabled_for(self.user_profile.subscription_tier):
+            prepared = SpeculativePrefetcher.take(
+                self.user.id, project.narrative, params['panel_count'], context.llm_provider
+            )
         
-        # 3. Use LLM to break down narrative into panel prompts
-        llm_service = AIServiceRegistry.get('llm', llm_provider)
-        panel_data = llm_service.parse_narrative(narrative, panel_count)
+        # 2. Extract characters for consistency; a resumed job keeps its roster
+        with telemetry.span('generation.extract_characters'):
+            character_service = CharacterConsistencyService(project.id)
+            if not character_service.characters:
+                character_service.extract_characters(
+                    project.narrative, extracted=prepared['characters'] if prepared else None
+                )
         
-        # 4. Select template (if not specified)
-        if not template_id:
-            template = TemplateService.suggest_template(narrative, panel_count)
+        # 3. Stream the LLM breakdown, rendering each panel as soon as it is described,
+        #    or re-render only the unfinished panels of an existing breakdown
+        if not params.get('planned'):
+            # A breakdown cut short can't be continued; plan the page again
+            Panel.objects.filter(project=project).delete()
+            planned = []
+            with telemetry.span('generation.parse_narrative', provider=type(context.llm_service).__name__):
+                jobs = self._stream_panels(
+                    context.llm_service, context.image_service, character_service,
+                    project.narrative, params['panel_count'], quality_settings=quality_settings,
+                    panel_data=prepared['plan'] if prepared else None,
+                    on_planned=lambda number, data: planned.append(Panel.objects.create(
+                        project=project,
+                        panel_number=number,
+                        description=data['description'],
+                        prompt=data['image_prompt'],
+                        importance=panel_importance(data.get('importance')),
+                        generation_status='planned'
+                    ))
+                )
+            pending = list(zip(planned, (render for _, render in jobs)))
+            params['planned'] = True
+            project.save(update_fields=['generation_params'])
         else:
-            template = Template.objects.get(id=template_id)
+            planned = [
+                panel for panel in Panel.objects.filter(project=project)
+                if panel.generation_status != 'done'
+            ]
+            pending = [
+                (panel, RenderPipeline.submit(
+                    self._render_panel, context.image_service, character_service, panel.prompt,
+                    quality_settings
+                ))
+                for panel in planned
+            ]
+        Panel.objects.filter(pk__in=[panel.pk for panel in planned]).update(
+            generation_status='rendering', generation_error=''
+        )
+        
+        # 4. Select template (if not specified) while the images render
+        with telemetry.span('generation.suggest_template'):
+            if project.template_id is None:
+                template = None
+                if params.get('template_id'):
+                    template = Template.objects.get(id=params['template_id'])
+                elif prepared:
+                    template = TemplateCatalogue.current().by_slug.get(prepared['template_slug'])
+                if template is None:
+                    template = TemplateService.suggest_template(project.narrative, params['panel_count'])
+                project.template = template
+                project.save(update_fields=['template'])
+            else:
+                template = project.template
         
-        self.project.template = template
-        self.project.save()
+        # 5. Save each panel's image as soon as it arrives, so a failure elsewhere keeps it
+        renders = {render: panel for panel, render in pending}
+        failed = []
+        with telemetry.span('generation.await_images', provider=type(context.image_service).__name__):
+            for render in as_completed(renders):
+                if not self._save_render(project, renders[render], render, progressive):
+                    failed.append(renders[render])
         
-        # 5. Generate images for each panel
-        image_service = AIServiceRegistry.get('image', image_provider)
-        panels = []
+        if failed:
+            MangaProject.objects.filter(pk=project.pk).update(generation_status='failed')
+            project.generation_status = 'failed'
+            telemetry.increment('generation.incomplete_pages')
+            raise GenerationIncomplete(project, [panel.panel_number for panel in failed])
+        
+        # 6. Apply template layout
+        panels = list(Panel.objects.filter(project=project))
+        with telemetry.span('generation.apply_template'):
+            TemplateService.apply_template(panels, template)
         
-        for i, data in enumerate(panel_data, start=1):
-            # Enhance prompt with character consistency
-            enhanced_prompt, seed_info = character_service.inject_character_consistency(
-                data['image_prompt']
+        # 7. Track usage, once, on the transition to complete
+        completed = MangaProject.objects.filter(pk=project.pk, generation_status='generating').update(
+            generation_status='complete'
+        )
+        project.generation_status = 'complete'
+        if completed:
+            QuotaService.increment_usage(self.user_profile)
+        
+        # 8. Upgrade previews to full quality in the background
+        if progressive:
+            self._schedule_upgrades(
+                context.image_service, [panel for panel in panels if panel.render_stage == 'preview']
             )
+        
+        # 9. Prepare the likely next request while providers are idle
+        SpeculativePrefetcher.after_page(self, project, params.get('next_narrative'))
+        
+        return project
+    
+    @staticmethod
+    def _save_render(project, panel, render, progressive):
+        """
+        Record a finished render on its panel: the image, or why it failed
+        
+        Args:
+            project (MangaProject): The panel's page
+            panel (Panel): Panel the render was for
+            render (Future): Completed _render_panel future
+            progressive (bool): Whether the image is a preview
             
-            # Determine image quality based on subscription
-            quality_settings = self._get_quality_settings()
-            
-            # Generate image
-            image_params = {
-                **seed_info,
-                **quality_settings
-            }
-            image_url = image_service.generate_image(enhanced_prompt, image_params)
+        Returns:
+            bool: True if the panel got its image
+        """
+        try:
+            panel.enhanced_prompt, panel.image_url, panel.seed = render.result()
+        except Exception as e:
+            logger.warning("Render failed for panel %s of project %s: %s",
+                           panel.panel_number, project.id, e)
+            panel.generation_status = 'failed'
+            panel.generation_error = str(e)[:1000]
+            panel.save(update_fields=['generation_status', 'generation_error'])
+            return False
+        panel.generation_status = 'done'
+        panel.render_stage = 'preview' if progressive else 'final'
+        panel.preview_ready_at = timezone.now()
+        panel.save(update_fields=[
+            'enhanced_prompt', 'image_url', 'seed', 'generation_status',
+            'render_stage', 'preview_ready_at'
+        ])
+        return True
+    
+    def get_context(self, model_id=None, panel_count=4):
+        """
+        Return the job's resolved GenerationContext, building it on first use
+        
+        Without an explicit model the ModelRouter picks the providers.
+        
+        Args:
+            model_id (int, optional): AIModel to generate with
+            panel_count (int): Panels per page, used to price the routes
             
-            # Create panel
-            panel = Panel.objects.create(
-                project=self.project,
-                panel_number=i,
-                description=data['description'],
-                prompt=data['image_prompt'],
-                enhanced_prompt=enhanced_prompt,
-                image_url=image_url
-            )
-            panels.append(panel)
+        Returns:
+            GenerationContext: Context shared by every stage and panel of the job
+        """
+        if self.context is None or (model_id and (
+                self.context.model is None or str(self.context.model.id) != str(model_id))):
+            if model_id:
+                self.context = GenerationContext.build(self.user_profile, model_id)
+            else:
+                try:
+                    route = ModelRouter.route(self.user_profile.subscription_tier, panel_count)
+                except KeyError:
+                    # Nothing registered to route between; the tier defaults report the real error
+                    route = None
+                self.context = GenerationContext.build(self.user_profile, route=route)
+        return self.context
+    
+    def _stream_panels(self, llm_service, image_service, character_service, narrative, panel_count,
+                       quality_settings=None, panel_data=None, on_planned=None):
+        """
+        Break a narrative into panels and schedule each panel's image immediately
         
-        # 6. Apply template layout
-        TemplateService.apply_template(panels, template)
+        Panels are submitted to the RenderPipeline as the LLM streams them,
+        so image generation overlaps with the rest of the text generation.
         
-        # 7. Track usage
-        QuotaService.increment_usage(self.user_profile)
+        Args:
+            llm_service (LLMService): Provider to break the narrative down with
+            image_service (ImageGenerationService): Provider to render with
+            character_service (CharacterConsistencyService): Loaded character roster
+            narrative (str): Narrative text for the page
+            panel_count (int): Number of panels wanted
+            quality_settings (dict, optional): Overrides the tier's image quality
+            panel_data (list, optional): Panels already described, e.g. by a
+                speculative prefetch; the LLM isn't called
+            on_planned (callable, optional): Called with (panel_number, panel_data)
+                as each panel is described, before its render is submitted
+            
+        Returns:
+            list: (panel_data, future) pairs in panel order; each future
+                resolves to (enhanced_prompt, image_url, seed)
+        """
+        def submit_all(panels):
+            for number, data in enumerate(panels, start=1):
+                if on_planned is not None:
+                    on_planned(number, data)
+                jobs.append((data, RenderPipeline.submit(
+                    self._render_panel, image_service, character_service, data['image_prompt'],
+                    quality_settings
+                )))
         
-        return self.project
+        jobs = []
+        if panel_data is not None:
+            submit_all(panel_data)
+            return jobs
+        # on_planned writes to the database, so only the stream itself is timed
+        submit_all(ModelRouter.track_stream(
+            'llm', self.get_context().llm_provider, llm_service.stream_narrative(narrative, panel_count)
+        ))
+        return jobs
     
-    def _get_providers(self, model_id=None):
-        """Get appropriate AI providers based on subscription and model"""
-        # Default providers by tier
-        tier_providers = {
-            'FREE': ('huggingface', 'stability-basic'),
-            'BASIC': ('openai', 'stability-standard'),
-            'PRO': ('openai', 'stability-creative'),
-            'ENTERPRISE': ('anthropic', 'midjourney')
-        }
+    def _render_panel(self, image_service, character_service, image_prompt, quality_settings=None):
+        """
+        Generate the image for a single panel
         
-        # If model ID is provided, look up specific provider settings
-        if model_id:
-            model = AIModel.objects.get(id=model_id)
-            return model.llm_provider, model.image_provider
+        Only talks to the image provider, so it is safe to run on a
+        RenderPipeline worker thread.
         
-        # Otherwise use defaults for tier
-        return tier_providers.get(
-            self.user_profile.subscription_tier, 
-            ('huggingface', 'stability-basic')
+        Args:
+            image_service (ImageGenerationService): Provider to render with
+            character_service (CharacterConsistencyService): Loaded character roster
+            image_prompt (str): Panel image prompt from the LLM breakdown
+            quality_settings (dict, optional): Overrides the tier's image quality
+            
+        Returns:
+            tuple: (enhanced_prompt, image_url, seed)
+        """
+        # Enhance prompt with character consistency
+        enhanced_prompt, seed_info = character_service.inject_character_consistency(
+            image_prompt
         )
+        # Pin the seed so a later pass at another quality reproduces the same image
+        seed_info.setdefault('seed', random.randint(1, 1000000))
+        
+        # Determine image quality based on subscription
+        if quality_settings is None:
+            quality_settings = self._get_quality_settings()
+        
+        # Generate image
+        image_params = {
+            **seed_info,
+            **quality_settings
+        }
+        with telemetry.span('provider.generate_image', provider=type(image_service).__name__), \
+                ModelRouter.track('image', self.get_context().image_provider):
+            image_url = image_service.generate_image(enhanced_prompt, image_params)
+        return enhanced_prompt, image_url, seed_info['seed']
     
-    def _get_quality_settings(self):
-        """Get image quality settings based on subscription tier"""
-        quality_settings = {
-            'FREE': {
-                'width': 512,
-                'height': 512,
-                'steps': 30,
-                'cfg_scale': 7
-            },
-            'BASIC': {
-                'width': 768,
-                'height': 768,
-                'steps': 40,
-                'cfg_scale': 7.5
-            },
-            'PRO': {
-                'width': 1024,
-                'height': 1024,
-                'steps': 50,
-                'cfg_scale': 8
-            },
-            'ENTERPRISE': {
-                'width': 1536,
-                'height': 1536,
-                'steps': 60,
-                'cfg_scale': 9
+    def _use_progressive(self, progressive=None):
+        """Decide whether to render a preview pass first; defaults by tier"""
+        if progressive is not None:
+            return progressive
+        tiers = getattr(settings, 'MANGA_PROGRESSIVE_TIERS', ['PRO', 'ENTERPRISE'])
+        return self.user_profile.subscription_tier in tiers
+    
+    def _schedule_upgrades(self, image_service, panels):
+        """
+        Queue full-quality renders that replace each panel's preview image
+        
+        Args:
+            image_service (ImageGenerationService): Provider to render with
+            panels (list): Saved Panel instances holding preview images
+        """
+        quality_settings = self._get_quality_settings()
+        image_provider = self.get_context().image_provider
+        for panel in panels:
+            RenderPipeline.submit(
+                self._upgrade_panel, image_service, panel.id, panel.enhanced_prompt,
+                panel.seed, quality_settings, image_provider
+            )
+    
+    @staticmethod
+    def _upgrade_panel(image_service, panel_id, enhanced_prompt, seed, quality_settings,
+                       image_provider):
+        """Render a panel at full quality and swap it in for the preview"""
+        try:
+            with telemetry.span('provider.generate_image', provider=type(image_service).__name__, stage='upgrade'), \
+                    ModelRouter.track('image', image_provider):
+                image_url = image_service.generate_image(
+                    enhanced_prompt, {'seed': seed, **quality_settings}
+                )
+            preview_url = Panel.objects.filter(pk=panel_id).values_list('image_url', flat=True).first()
+            updated = Panel.objects.filter(pk=panel_id).update(
+                image_url=image_url,
+                render_stage='final',
+                upgraded_at=timezone.now()
+            )
+            # update() skips the Panel signals, so move the image reference by hand
+            if updated:
+                BlobStore.swap(preview_url, image_url)
+        except Exception:
+            # The preview stays in place; the page is still usable
+            logger.exception("Full-quality render failed for panel %s", panel_id)
+            telemetry.increment('generation.upgrade_failures')
+    
+    @staticmethod
+    def get_render_status(project, panels=None):
+        """
+        Summarise progressive rendering for a project
+        
+        Args:
+            project (MangaProject): Project to report on
+            panels (iterable, optional): The project's already loaded panels;
+                when given no query is made
+            
+        Returns:
+            dict: Panel counts, seconds until every preview was visible and
+                whether all full-quality upgrades have landed
+        """
+        if panels is None:
+            stats = Panel.objects.filter(project=project).aggregate(
+                total=Count('id'),
+                pending=Count('id', filter=Q(render_stage='preview')),
+                previews_ready_at=Max('preview_ready_at'),
+                upgraded_at=Max('upgraded_at')
+            )
+        else:
+            panels = list(panels)
+            previews = [p.preview_ready_at for p in panels if p.preview_ready_at]
+            upgrades = [p.upgraded_at for p in panels if p.upgraded_at]
+            stats = {
+                'total': len(panels),
+                'pending': sum(1 for p in panels if p.render_stage == 'preview'),
+                'previews_ready_at': max(previews, default=None),
+                'upgraded_at': max(upgrades, default=None)
             }
-        }
         
-        return quality_settings.get(
-            self.user_profile.subscription_tier, 
-            quality_settings['FREE']
-        )
\ No newline at end of file
+        preview_seconds = None
+        if stats['previews_ready_at']:
+            preview_seconds = (stats['previews_ready_at'] - project.created_at).total_seconds()
+        return {
+            'total_panels': stats['total'],
+            'upgraded_panels': stats['total'] - stats['pending'],
+            'preview_seconds': preview_seconds,
+            'upgrade_complete': stats['pending'] == 0,
+            'upgrade_completed_at': stats['upgraded_at'] if stats['pending'] == 0 else None
+        }
+    
+    def _get_preview_settings(self):
+        """Get cheap settings for the preview pass: a quarter of the pixels, few steps"""
+        return self.get_context().preview_settings
+    
+    def _get_providers(self, model_id=None):
+        """Get appropriate AI providers based on subscription and model"""
+        context = self.get_context(model_id)
+        return context.llm_provider, context.image_provider
+    
+    def _get_quality_settings(self):
+        """Get image quality settings based on subscription tier"""
+        return self.get_context().quality_settings
\ No newline at end of file
@@ -0,0 +1,258 @@
+# manga/layout_solver.py
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError
+
+from ai_services import telemetry
+
+from .models import SolvedLayout
+
+# Bump when the solver's output changes, so stored solutions are recomputed
+SOLVER_VERSION = 1
+# Importance is clamped to this range, relative to the page's average panel
+MIN_IMPORTANCE = 0.25
+MAX_IMPORTANCE = 4.0
+
+
+def panel_importance(value):
+    """
+    Read a panel's importance from an LLM breakdown value
+
+    Args:
+        value: The breakdown's 'importance' (a number, numeric string or missing)
+
+    Returns:
+        float: Importance, 1.0 when missing or unreadable
+    """
+    try:
+        importance = float(value)
+    except (TypeError, ValueError):
+        return 1.0
+    if not math.isfinite(importance) or importance <= 0:
+        return 1.0
+    return min(max(importance, MIN_IMPORTANCE), MAX_IMPORTANCE)
+
+
+class LayoutSolver:
+    """
+    Arrange any number of panels on a page, in reading order
+
+    Panels are laid out in rows read top to bottom, and within a row left
+    to right ('direction': 'rtl' in the layout reverses that). Each row's
+    height is its share of the page's total importance and each panel's
+    width its share of the row's, so a panel's area follows its importance.
+    Which panels share a row is chosen by dynamic programming over the
+    reading sequence to keep every panel's shape close to the template's
+    typical panel aspect ratio. Panels are separated by gutters.
+
+    solve() is pure; cached() memoises solutions per (template layout,
+    count, importance) in the process and in the SolvedLayout table.
+    """
+    _memo = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def cached(cls, template, layout_data, panel_count, weights=None):
+        """
+        Return the solved positions for a template, from cache when possible
+
+        Args:
+            template (Template): Template whose layout is being adapted
+            layout_data (dict): Its parsed layout
+            panel_count (int): Number of panels to place
+            weights (list, optional): Importance of each panel, in reading order
+
+        Returns:
+            list: Position dicts with x, y, width and height
+        """
+        weights = cls._key_weights(weights, panel_count)
+        key = cls._key(layout_data, panel_count, weights)
+
+        with cls._lock:
+            positions = cls._memo.get(key)
+            if positions is not None:
+                cls._memo.move_to_end(key)
+        if positions is not None:
+            telemetry.increment('layout_solver.hits', level='memory')
+            return [dict(position) for position in positions]
+
+        stored = SolvedLayout.objects.filter(key=key).values_list('positions', flat=True).first()
+        if stored is not None:
+            telemetry.increment('layout_solver.hits', level='database')
+            positions = stored
+        else:
+            telemetry.increment('layout_solver.misses')
+            with telemetry.span('layout_solver.solve', panels=panel_count):
+                positions = cls.solve(layout_data, panel_count, weights)
+            try:
+                SolvedLayout.objects.create(
+                    key=key,
+                    template=template if template is not None and template.pk else None,
+                    panel_count=panel_count,
+                    weights=weights,
+                    positions=positions
+                )
+            except IntegrityError:
+                # Another process solved the same layout first; the results are identical
+                pass
+
+        with cls._lock:
+            cls._memo[key] = positions
+            while len(cls._memo) > getattr(settings, 'MANGA_LAYOUT_MEMO_SIZE', 1024):
+                cls._memo.popitem(last=False)
+        return [dict(position) for position in positions]
+
+    @classmethod
+    def solve(cls, layout_data, panel_count, weights=None):
+        """
+        Compute panel positions for a page
+
+        Args:
+            layout_data (dict): Template layout; its positions set the page
+                extent and target panel shape, and it may set 'gutter' and 'direction'
+            panel_count (int): Number of panels to place
+            weights (list, optional): Importance of each panel, in reading order
+
+        Returns:
+            list: Position dicts with x, y, width and height, in the template's units
+        """
+        if panel_count < 1:
+            return []
+        weights = list(weights) if weights else [1.0] * panel_count
+        if len(weights) != panel_count:
+            raise ValueError(f"Got {len(weights)} weights for {panel_count} panels")
+
+        positions = layout_data.get('positions') or []
+        extent_x = max([p['x'] + p['width'] for p in positions] + [1])
+        extent_y = max([p['y'] + p['height'] for p in positions] + [1])
+        page_width, page_height = getattr(settings, 'MANGA_EXPORT_PAGE_SIZE', (1654, 2339))
+        page_aspect = page_width / page_height
+        target = cls._target_aspect(positions, extent_x, extent_y, page_aspect)
+
+        rows = cls._partition(weights, page_aspect, target)
+        gutter = layout_data.get('gutter', getattr(settings, 'MANGA_LAYOUT_GUTTER', 0.02))
+        rtl = layout_data.get('direction') == 'rtl'
+
+        solved = []
+        total = sum(weights)
+        usable_height = 1 - gutter * (len(rows) - 1)
+        y = 0.0
+        for row in rows:
+            row_weights = weights[row[0]:row[1]]
+            row_total = sum(row_weights)
+            height = usable_height * row_total / total
+            usable_width = 1 - gutter * (len(row_weights) - 1)
+            x = 0.0
+            cells = []
+            for weight in row_weights:
+                width = usable_width * weight / row_total
+                cells.append((x, width))
+                x += width + gutter
+            for x, width in cells:
+                if rtl:
+                    x = 1 - x - width
+                solved.append({
+                    'x': round(x * extent_x, 6),
+                    'y': round(y * extent_y, 6),
+                    'width': round(width * extent_x, 6),
+                    'height': round(height * extent_y, 6)
+                })
+            y += height + gutter
+        return solved
+
+    @classmethod
+    def warm(cls, templates):
+        """
+        Solve every panel count each template allows, with equal importance
+
+        Args:
+            templates (iterable): Template instances
+
+        Returns:
+            int: Number of layouts looked up or solved
+        """
+        warmed = 0
+        for template in templates:
+            layout_data = json.loads(template.layout_json)
+            for panel_count in range(max(template.min_panels, 1), template.max_panels + 1):
+                if panel_count != len(layout_data.get('positions') or []):
+                    cls.cached(template, layout_data, panel_count)
+                    warmed += 1
+        return warmed
+
+    @classmethod
+    def clear_memo(cls):
+        with cls._lock:
+            cls._memo.clear()
+
+    @staticmethod
+    def _partition(weights, page_aspect, target):
+        """
+        Split the reading sequence into rows with the lowest shape cost
+
+        Ignoring gutters, panel i in a row holding importance R of a page
+        holding T is (w_i / R) wide and (R / T) tall, so its aspect ratio
+        is page_aspect * w_i * T / R**2. The cost is the squared log distance
+        from the target; rows only depend on their own panels, so the best
+        split of the first j panels extends the best split of a prefix.
+
+        Returns:
+            list: (start, end) index pairs, one per row
+        """
+        count = len(weights)
+        total = sum(weights)
+        max_per_row = getattr(settings, 'MANGA_LAYOUT_MAX_PER_ROW', 4)
+        best = [0.0] + [math.inf] * count
+        split = [0] * (count + 1)
+        for end in range(1, count + 1):
+            row_total = 0.0
+            for start in range(end - 1, max(end - max_per_row, 0) - 1, -1):
+                row_total += weights[start]
+                row_cost = sum(
+                    math.log(page_aspect * weight * total / row_total ** 2 / target) ** 2
+                    for weight in weights[start:end]
+                )
+                if best[start] + row_cost < best[end]:
+                    best[end] = best[start] + row_cost
+                    split[end] = start
+        rows = []
+        end = count
+        while end:
+            rows.append((split[end], end))
+            end = split[end]
+        return rows[::-1]
+
+    @staticmethod
+    def _target_aspect(positions, extent_x, extent_y, page_aspect):
+        """Geometric mean aspect ratio of the template's panels as printed, or the default"""
+        ratios = [
+            (p['width'] / extent_x) / (p['height'] / extent_y) * page_aspect
+            for p in positions if p['width'] > 0 and p['height'] > 0
+        ]
+        if not ratios:
+            return getattr(settings, 'MANGA_LAYOUT_TARGET_ASPECT', 1.2)
+        return math.exp(sum(math.log(ratio) for ratio in ratios) / len(ratios))
+
+    @staticmethod
+    def _key_weights(weights, panel_count):
+        """Normalise importance to a mean of 1 and round it, so similar pages share a solution"""
+        if not weights or len(weights) != panel_count:
+            return [1.0] * panel_count
+        weights = [panel_importance(weight) for weight in weights]
+        mean = sum(weights) / len(weights)
+        return [round(min(max(weight / mean, MIN_IMPORTANCE), MAX_IMPORTANCE), 1) for weight in weights]
+
+    @staticmethod
+    def _key(layout_data, panel_count, weights):
+        page_size = getattr(settings, 'MANGA_EXPORT_PAGE_SIZE', (1654, 2339))
+        material = json.dumps([
+            SOLVER_VERSION, layout_data, panel_count, weights, list(page_size),
+            getattr(settings, 'MANGA_LAYOUT_GUTTER', 0.02), getattr(settings, 'MANGA_LAYOUT_MAX_PER_ROW', 4),
+            getattr(settings, 'MANGA_LAYOUT_TARGET_ASPECT', 1.2)
+        ], sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
\ No newline at end of file
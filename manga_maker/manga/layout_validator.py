@@ -0,0 +1,210 @@
+# manga/layout_validator.py
+import json
+import numbers
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+# Slack for float rounding, as a fraction of the page
+TOLERANCE = 1e-6
+# Most (layout, i, j) cells in one pass's pairwise arrays; each array is 8 bytes a cell
+MAX_PAIRWISE_CELLS = 4_000_000
+
+LayoutReport = namedtuple('LayoutReport', ['errors', 'warnings', 'coverage', 'min_gutter'])
+
+
+class LayoutValidator:
+    """
+    Check page layouts for panels out of bounds, overlapping or badly spaced
+
+    Layouts are converted to an array of rectangles (x0, y0, x1, y1) in
+    page fractions, and every check is done for all panel pairs, and with
+    validate_many() for many layouts at once, with NumPy broadcasting.
+    Positions are either 0-1 page fractions or design-canvas units; a
+    canvas layout gives its size as 'canvas': [width, height], and
+    otherwise its panels' bounding box is taken as the page.
+
+    Errors: malformed positions, empty panels, panels outside the page and
+    overlapping panels. Warnings: gutters thinner than MANGA_LAYOUT_MIN_GUTTER
+    (panels that touch are fine), coverage below MANGA_LAYOUT_MIN_COVERAGE
+    and a panel count outside the template's range.
+    """
+
+    @classmethod
+    def validate(cls, layout_data, panel_range=None):
+        """
+        Check one layout
+
+        Args:
+            layout_data (dict): Layout with a 'positions' list
+            panel_range (tuple, optional): (min_panels, max_panels) the layout should fit
+
+        Returns:
+            LayoutReport: Errors and warnings, coverage (0-1) and thinnest gutter
+        """
+        return cls.validate_many([layout_data], [panel_range])[0]
+
+    @classmethod
+    def validate_many(cls, layouts, panel_ranges=None):
+        """
+        Check many layouts, vectorised over each group with the same number of positions
+
+        Args:
+            layouts (list): Layout dicts
+            panel_ranges (list, optional): (min_panels, max_panels) per layout, or None entries
+
+        Returns:
+            list: A LayoutReport per layout, in order
+        """
+        panel_ranges = panel_ranges or [None] * len(layouts)
+        parsed = [cls._rectangles(layout) for layout in layouts]
+
+        # The pairwise arrays are layouts x width x width, so layouts are checked
+        # in groups of equal position count, at most MAX_PAIRWISE_CELLS at a
+        # time: one layout with hundreds of positions only costs its own width
+        # squared, not the whole batch's
+        groups = {}
+        for index, (rects, _) in enumerate(parsed):
+            groups.setdefault(len(rects), []).append(index)
+
+        reports = [None] * len(layouts)
+        for count, indices in groups.items():
+            step = max(1, MAX_PAIRWISE_CELLS // max(1, count * count))
+            for start in range(0, len(indices), step):
+                chunk = indices[start:start + step]
+                group_reports = cls._validate_group(
+                    [parsed[index] for index in chunk], [panel_ranges[index] for index in chunk]
+                )
+                for index, report in zip(chunk, group_reports):
+                    reports[index] = report
+        return reports
+
+    @classmethod
+    def _validate_group(cls, parsed, panel_ranges):
+        """Check parsed layouts with the same number of positions in one vectorised pass"""
+        errors = [list(problems) for _, problems in parsed]
+        warnings = [[] for _ in parsed]
+
+        width = max([len(rects) for rects, _ in parsed] + [1])
+        boxes = np.zeros((len(parsed), width, 4))
+        present = np.zeros((len(parsed), width), dtype=bool)
+        for index, (rects, _) in enumerate(parsed):
+            if len(rects):
+                boxes[index, :len(rects)] = rects
+                present[index, :len(rects)] = True
+
+        x0, y0, x1, y1 = (boxes[..., i] for i in range(4))
+        areas = (x1 - x0) * (y1 - y0)
+
+        empty = present & ((x1 - x0 <= TOLERANCE) | (y1 - y0 <= TOLERANCE))
+        outside = present & (
+            (x0 < -TOLERANCE) | (y0 < -TOLERANCE) | (x1 > 1 + TOLERANCE) | (y1 > 1 + TOLERANCE)
+        )
+
+        # Pairwise (layout, i, j) geometry
+        overlap_x = np.minimum(x1[:, :, None], x1[:, None, :]) - np.maximum(x0[:, :, None], x0[:, None, :])
+        overlap_y = np.minimum(y1[:, :, None], y1[:, None, :]) - np.maximum(y0[:, :, None], y0[:, None, :])
+        intersection = np.clip(overlap_x, 0, None) * np.clip(overlap_y, 0, None)
+        pairs = present[:, :, None] & present[:, None, :] & np.triu(np.ones((width, width), dtype=bool), 1)
+        overlapping = pairs & (intersection > TOLERANCE)
+
+        # Separation of non-overlapping pairs; 0 when they touch
+        gap = np.maximum(-overlap_x, -overlap_y)
+        spaced = pairs & ~overlapping
+        gaps = np.where(spaced, gap, np.inf)
+        min_gutter = gaps.min(axis=(1, 2))
+        thin = spaced & (gap > TOLERANCE) & (gap < getattr(settings, 'MANGA_LAYOUT_MIN_GUTTER', 0.005))
+
+        # Union area: exact unless three panels share a point, which is already an error
+        coverage = np.where(present, areas, 0).sum(axis=1) - np.where(pairs, intersection, 0).sum(axis=(1, 2))
+
+        min_coverage = getattr(settings, 'MANGA_LAYOUT_MIN_COVERAGE', 0.75)
+        for index in range(len(parsed)):
+            count = len(parsed[index][0])
+            for i in np.flatnonzero(empty[index]):
+                errors[index].append(f"Panel {i + 1} has no area")
+            for i in np.flatnonzero(outside[index]):
+                errors[index].append(f"Panel {i + 1} extends past the page")
+            for i, j in zip(*np.nonzero(overlapping[index])):
+                errors[index].append(f"Panels {i + 1} and {j + 1} overlap")
+            for i, j in zip(*np.nonzero(thin[index])):
+                warnings[index].append(f"Gutter between panels {i + 1} and {j + 1} is only {gap[index, i, j]:.4f}")
+            if count and coverage[index] < min_coverage:
+                warnings[index].append(f"Panels cover only {coverage[index]:.0%} of the page")
+            panel_range = panel_ranges[index]
+            if panel_range and count and not panel_range[0] <= count <= panel_range[1]:
+                warnings[index].append(
+                    f"{count} positions, outside the template's {panel_range[0]}-{panel_range[1]} panels"
+                )
+
+        return [
+            LayoutReport(
+                errors=errors[index],
+                warnings=warnings[index],
+                coverage=float(coverage[index]),
+                min_gutter=max(0.0, float(min_gutter[index])) if np.isfinite(min_gutter[index]) else None
+            )
+            for index in range(len(parsed))
+        ]
+
+    @classmethod
+    def check_template(cls, template):
+        """
+        Validate a template's layout_json before it is saved
+
+        Raises:
+            ValidationError: If the layout isn't JSON or has errors
+        """
+        try:
+            layout_data = json.loads(template.layout_json)
+        except (TypeError, ValueError) as e:
+            raise ValidationError({'layout_json': f"Layout is not valid JSON: {e}"})
+        report = cls.validate(layout_data, (template.min_panels, template.max_panels))
+        if report.errors:
+            raise ValidationError({'layout_json': report.errors})
+        return report
+
+    @staticmethod
+    def _rectangles(layout_data):
+        """
+        Convert a layout to an (n, 4) array of page-fraction rectangles
+
+        Returns:
+            tuple: (array, list of errors for positions that couldn't be read)
+        """
+        positions = layout_data.get('positions') if isinstance(layout_data, dict) else None
+        if not isinstance(positions, list):
+            return np.zeros((0, 4)), ["Layout has no 'positions' list"]
+
+        rects = []
+        problems = []
+        for number, position in enumerate(positions, start=1):
+            try:
+                values = [position[key] for key in ('x', 'y', 'width', 'height')]
+            except (KeyError, TypeError):
+                problems.append(f"Panel {number} needs x, y, width and height")
+                continue
+            if not all(isinstance(value, numbers.Real) and not isinstance(value, bool) for value in values):
+                problems.append(f"Panel {number} has a non-numeric position")
+                continue
+            rects.append(values)
+        if not positions:
+            problems.append("Layout has no panels")
+        if problems:
+            # Geometry is only checked once every panel can be read, so panel numbers line up
+            return np.zeros((0, 4)), problems
+
+        rects = np.asarray(rects, dtype=float)
+        rects[:, 2] += rects[:, 0]
+        rects[:, 3] += rects[:, 1]
+
+        canvas = layout_data.get('canvas')
+        if canvas:
+            extent = np.asarray(canvas, dtype=float)
+        else:
+            # Page fractions, or canvas units whose page is the panels' bounding box
+            extent = np.maximum(rects[:, 2:].max(axis=0), 1)
+        rects /= np.tile(extent, 2)
+        return rects, problems
\ No newline at end of file
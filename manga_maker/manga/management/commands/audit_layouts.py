@@ -0,0 +1,80 @@
+# manga/management/commands/audit_layouts.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from manga.layout_validator import LayoutValidator
+from manga.models import Template
+
+
+class Command(BaseCommand):
+    help = (
+        "Validate the layout of every template (bounds, overlaps, gutters, coverage) in "
+        "vectorised batches and list the problems found."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Templates validated per pass")
+        parser.add_argument('--warnings', action='store_true', help="List warnings as well as errors")
+        parser.add_argument('--json', action='store_true', help="Print the findings as JSON")
+        parser.add_argument('--fail', action='store_true', help="Exit with an error if any layout is invalid")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = Template.objects.order_by('id').values_list(
+            'slug', 'layout_json', 'min_panels', 'max_panels'
+        ).iterator(chunk_size=options['batch_size'])
+
+        findings = []
+        checked = invalid = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= options['batch_size']:
+                invalid += self._check(batch, findings, options['warnings'])
+                checked += len(batch)
+                batch = []
+        if batch:
+            invalid += self._check(batch, findings, options['warnings'])
+            checked += len(batch)
+        elapsed = time.perf_counter() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'checked': checked, 'invalid': invalid, 'seconds': elapsed, 'findings': findings
+            }, indent=2))
+        else:
+            for finding in findings:
+                problems = [f"ERROR {e}" for e in finding['errors']] + [f"warning {w}" for w in finding['warnings']]
+                self.stdout.write(f"{finding['slug']}: {'; '.join(problems)}")
+            self.stdout.write(f"Checked {checked} templates in {elapsed:.2f}s, {invalid} invalid")
+
+        if options['fail'] and invalid:
+            raise CommandError(f"{invalid} templates have invalid layouts")
+
+    @staticmethod
+    def _check(batch, findings, include_warnings):
+        """Validate one batch of (slug, layout_json, min, max) rows; returns how many are invalid"""
+        layouts = []
+        for _, layout_json, _, _ in batch:
+            try:
+                layouts.append(json.loads(layout_json))
+            except (TypeError, ValueError):
+                layouts.append(None)
+        reports = LayoutValidator.validate_many(layouts, [(low, high) for _, _, low, high in batch])
+
+        invalid = 0
+        for (slug, _, _, _), layout, report in zip(batch, layouts, reports):
+            errors = ["Layout is not valid JSON"] if layout is None else report.errors
+            warnings = report.warnings if include_warnings else []
+            invalid += bool(errors)
+            if errors or warnings:
+                findings.append({
+                    'slug': slug,
+                    'errors': errors,
+                    'warnings': warnings,
+                    'coverage': round(report.coverage, 4),
+                    'min_gutter': report.min_gutter
+                })
+        return invalid
\ No newline at end of file
@@ -0,0 +1,143 @@
+# manga/management/commands/bench_db_writes.py
+import json
+import math
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from manga.models import CharacterProfile, MangaProject, Panel
+from manga_maker.database import sqlite_config
+
+CHARACTERS = ('Akira', 'Mei')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent generation-style writes (a project, its panels and characters per "
+        "transaction) and report throughput, latency and lock errors. Runs against the "
+        "configured database with scratch rows, and with --compare against throwaway SQLite "
+        "files with Django's default options and with the tuned ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Concurrent writers")
+        parser.add_argument('--transactions', type=int, default=50, help="Transactions per writer")
+        parser.add_argument('--panels', type=int, default=4, help="Panels written per transaction")
+        parser.add_argument('--compare', action='store_true',
+                            help="Also run on scratch SQLite databases, default vs tuned options")
+        parser.add_argument('--json', action='store_true', help="Print the reports as JSON")
+
+    def handle(self, *args, **options):
+        reports = {'configured': self._run('default', options)}
+
+        if options['compare']:
+            directory = Path(tempfile.mkdtemp(prefix='manga-bench-'))
+            try:
+                profiles = {
+                    'sqlite-default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': directory / 'default.sqlite3'},
+                    'sqlite-tuned': sqlite_config(directory / 'tuned.sqlite3'),
+                }
+                for name, config in profiles.items():
+                    alias = f"bench-{name}"
+                    connections.settings[alias] = connections.configure_settings(
+                        {'default': connections.settings['default'], alias: config}
+                    )[alias]
+                    try:
+                        call_command('migrate', database=alias, verbosity=0)
+                        reports[name] = self._run(alias, options)
+                    finally:
+                        connections[alias].close()
+                        del connections[alias]
+                        del connections.settings[alias]
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(reports, indent=2))
+            return
+        for name, report in reports.items():
+            latency = report['latency_ms']
+            self.stdout.write(
+                f"{name:<16}{report['vendor']:<12}{report['committed']:>6} commits  "
+                f"{report['transactions_per_second']:>8.1f} tx/s  p50 {latency['p50']:.1f}ms  "
+                f"p95 {latency['p95']:.1f}ms  p99 {latency['p99']:.1f}ms  "
+                f"{report['lock_errors']} lock errors  {report['other_errors']} other errors"
+            )
+
+    def _run(self, alias, options):
+        """Run the write workload on one database and clean up its rows"""
+        user, _ = User.objects.using(alias).get_or_create(username='bench-db-writes')
+        latencies = []
+        errors = {'lock': 0, 'other': 0}
+        lock = threading.Lock()
+
+        def writer(number):
+            try:
+                for sequence in range(options['transactions']):
+                    start = time.perf_counter()
+                    try:
+                        self._write_page(alias, user, f"{number}-{sequence}", options['panels'])
+                    except OperationalError as e:
+                        with lock:
+                            errors['lock' if 'locked' in str(e) else 'other'] += 1
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - start)
+            finally:
+                connections[alias].close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads'], thread_name_prefix='bench-writer') as pool:
+            list(pool.map(writer, range(options['threads'])))
+        wall = time.perf_counter() - started
+
+        # Panels and characters cascade with their projects
+        MangaProject.objects.using(alias).filter(user=user).delete()
+        user.delete()
+
+        latencies.sort()
+
+        def percentile(fraction):
+            if not latencies:
+                return 0.0
+            return latencies[max(0, math.ceil(fraction * len(latencies)) - 1)] * 1000
+
+        return {
+            'vendor': connections[alias].vendor,
+            'committed': len(latencies),
+            'lock_errors': errors['lock'],
+            'other_errors': errors['other'],
+            'wall_seconds': wall,
+            'transactions_per_second': len(latencies) / wall if wall else 0,
+            'latency_ms': {'p50': percentile(0.50), 'p95': percentile(0.95), 'p99': percentile(0.99)}
+        }
+
+    @staticmethod
+    def _write_page(alias, user, label, panel_count):
+        """One generated page: read the user's roster, then write the project, characters and panels"""
+        with transaction.atomic(using=alias):
+            # Reading first is what makes SQLite's deferred transactions fail on lock upgrade
+            list(CharacterProfile.objects.using(alias).filter(project__user=user, name__in=CHARACTERS)[:10])
+            project = MangaProject.objects.using(alias).create(
+                user=user, title=f"Bench {label}", narrative="Benchmark page"
+            )
+            for name in CHARACTERS:
+                CharacterProfile.objects.using(alias).create(
+                    project=project, name=name, visual_traits="bench", seed=1
+                )
+            for number in range(1, panel_count + 1):
+                Panel.objects.using(alias).create(
+                    project=project,
+                    panel_number=number,
+                    description=f"Panel {number}",
+                    prompt="bench",
+                    image_url=f"https://bench.invalid/{label}/{number}.png"
+                )
\ No newline at end of file
@@ -0,0 +1,221 @@
+# manga/management/commands/loadtest_generate.py
+import json
+import math
+import resource
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from ai_services.mock_providers import MockProviderConfig, MockProviderServer, register_mock_providers
+from manga.models import Template, UserProfile
+
+GENERATE_PATH = '/api/projects/generate/'
+
+NARRATIVE = (
+    "Akira sprints across the rooftop as the storm breaks. Mei shouts from the stairwell, "
+    "holding the stolen blueprint. Lightning reveals the masked figure waiting at the edge. "
+    "Akira skids to a stop, fists clenched, rain streaming down his face."
+)
+
+BASIC_GRID_LAYOUT = {'positions': [
+    {'x': 0, 'y': 0, 'width': 0.5, 'height': 0.5},
+    {'x': 0.5, 'y': 0, 'width': 0.5, 'height': 0.5},
+    {'x': 0, 'y': 0.5, 'width': 0.5, 'height': 0.5},
+    {'x': 0.5, 'y': 0.5, 'width': 0.5, 'height': 0.5},
+]}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent users through the generate endpoint against mock providers "
+        "and report throughput, latency percentiles and resource usage. "
+        "Creates load-test users; never point it at a production database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Concurrent simulated users")
+        parser.add_argument('--requests', type=int, default=5, help="Generate calls per user")
+        parser.add_argument('--tier', default='BASIC', help="Subscription tier of the simulated users")
+        parser.add_argument('--panel-count', type=int, default=4)
+        parser.add_argument('--base-url', default=None,
+                            help="Hit a running server over HTTP instead of calling the view in-process")
+        parser.add_argument('--password', default='loadtest',
+                            help="Password given to load-test users, for --base-url runs")
+        parser.add_argument('--mock-url', default=None,
+                            help="Use an already running run_mock_providers server")
+        parser.add_argument('--latency-ms', type=float, default=500)
+        parser.add_argument('--latency-sigma', type=float, default=0.5)
+        parser.add_argument('--error-rate', type=float, default=0.0)
+        parser.add_argument('--image-bytes', type=int, default=200000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        server = None
+        mock_url = options['mock_url']
+        if not mock_url:
+            server = MockProviderServer(config=MockProviderConfig(
+                latency_ms=options['latency_ms'],
+                latency_sigma=options['latency_sigma'],
+                error_rate=options['error_rate'],
+                image_bytes=options['image_bytes'],
+                seed=options['seed']
+            ))
+            mock_url = server.start()
+
+        if not options['base_url']:
+            # In-process runs use this process's registry; a --base-url server must be configured separately
+            registered = register_mock_providers(mock_url)
+            self.stderr.write(f"Mock providers at {mock_url}: {', '.join(p for _, p in registered)}")
+
+        users = self._prepare_users(options['users'], options['tier'], options['password'])
+        send = self._http_sender(options) if options['base_url'] else self._in_process_sender(options)
+
+        results = []
+        results_lock = threading.Lock()
+        peak_threads = threading.active_count()
+
+        def run_user(user):
+            nonlocal peak_threads
+            try:
+                for _ in range(options['requests']):
+                    start = time.perf_counter()
+                    try:
+                        status = send(user)
+                    except Exception:
+                        status = None
+                    elapsed = time.perf_counter() - start
+                    with results_lock:
+                        results.append((elapsed, status))
+                        peak_threads = max(peak_threads, threading.active_count())
+            finally:
+                close_old_connections()
+
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users), thread_name_prefix='loadtest-user') as pool:
+            list(pool.map(run_user, users))
+        wall = time.perf_counter() - started
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+        if server:
+            server.stop()
+
+        report = self._report(results, wall, usage_before, usage_after, peak_threads)
+        if server:
+            report['provider_requests'] = dict(server.requests)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print_report(report)
+
+    def _prepare_users(self, count, tier, password):
+        """Create or reset the simulated users with unlimited quota"""
+        if not Template.objects.filter(slug='basic-grid').exists():
+            Template.objects.create(
+                name='Basic Grid', slug='basic-grid', description='Four equal panels',
+                layout_json=json.dumps(BASIC_GRID_LAYOUT)
+            )
+
+        users = []
+        for number in range(count):
+            user, created = User.objects.get_or_create(username=f"loadtest-{number}")
+            if created:
+                user.set_password(password)
+                user.save()
+            UserProfile.objects.update_or_create(
+                user=user,
+                defaults={'subscription_tier': tier, 'pages_created': 0, 'pages_quota': 10 ** 9}
+            )
+            users.append(user)
+        return users
+
+    @staticmethod
+    def _in_process_sender(options):
+        from rest_framework.test import APIClient
+
+        payload = {'narrative': NARRATIVE, 'panel_count': options['panel_count']}
+        local = threading.local()
+
+        def send(user):
+            # One client per thread; the test client isn't thread-safe. Its default
+            # Host, testserver, isn't in ALLOWED_HOSTS outside the test runner
+            if getattr(local, 'user', None) != user:
+                local.client = APIClient(SERVER_NAME='localhost')
+                local.client.force_authenticate(user)
+                local.user = user
+            return local.client.post(GENERATE_PATH, payload, format='json').status_code
+
+        return send
+
+    @staticmethod
+    def _http_sender(options):
+        import requests
+
+        url = options['base_url'].rstrip('/') + GENERATE_PATH
+        payload = {'narrative': NARRATIVE, 'panel_count': options['panel_count']}
+        local = threading.local()
+
+        def send(user):
+            if getattr(local, 'user', None) != user:
+                local.session = requests.Session()
+                local.session.auth = (user.username, options['password'])
+                local.user = user
+            return local.session.post(url, json=payload, timeout=600).status_code
+
+        return send
+
+    @staticmethod
+    def _report(results, wall, usage_before, usage_after, peak_threads):
+        latencies = sorted(elapsed for elapsed, _ in results)
+        succeeded = sum(1 for _, status in results if status == 200)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            # Nearest-rank percentile
+            return latencies[max(0, math.ceil(fraction * len(latencies)) - 1)]
+
+        statuses = {}
+        for _, status in results:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+        cpu_seconds = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+        return {
+            'requests': len(results),
+            'succeeded': succeeded,
+            'statuses': statuses,
+            'wall_seconds': wall,
+            'throughput_rps': len(results) / wall if wall else 0,
+            'pages_per_minute': succeeded / wall * 60 if wall else 0,
+            'latency_seconds': {
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+                'max': latencies[-1] if latencies else None
+            },
+            'cpu_seconds': cpu_seconds,
+            'cpu_utilisation': cpu_seconds / wall if wall else 0,
+            'peak_rss_mib': usage_after.ru_maxrss / 1024,
+            'peak_threads': peak_threads
+        }
+
+    def _print_report(self, report):
+        latency = report['latency_seconds']
+        self.stdout.write(f"Requests        {report['requests']} ({report['succeeded']} succeeded) {report['statuses']}")
+        self.stdout.write(f"Wall time       {report['wall_seconds']:.2f}s")
+        self.stdout.write(f"Throughput      {report['throughput_rps']:.2f} req/s, "
+                          f"{report['pages_per_minute']:.1f} pages/min")
+        if latency['p50'] is not None:
+            self.stdout.write(f"Latency         p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  "
+                              f"p99 {latency['p99']:.3f}s  max {latency['max']:.3f}s")
+        self.stdout.write(f"CPU             {report['cpu_seconds']:.2f}s ({report['cpu_utilisation']:.0%} of one core)")
+        self.stdout.write(f"Peak RSS        {report['peak_rss_mib']:.1f} MiB, {report['peak_threads']} threads")
+        for route, count in sorted(report.get('provider_requests', {}).items()):
+            self.stdout.write(f"  {route:<26}{count:>8}")
+        if report['requests'] and not report['succeeded']:
+            raise CommandError("Every request failed")
\ No newline at end of file
@@ -0,0 +1,25 @@
+# manga/management/commands/precompute_layouts.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from manga.layout_solver import LayoutSolver
+from manga.models import Template
+
+
+class Command(BaseCommand):
+    help = (
+        "Solve and store the layout of every panel count between each template's min_panels "
+        "and max_panels (equal importance), so generation only has to look them up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help="Only these templates (default all)")
+
+    def handle(self, *args, **options):
+        templates = Template.objects.order_by('id')
+        if options['slugs']:
+            templates = templates.filter(slug__in=options['slugs'])
+        started = time.perf_counter()
+        warmed = LayoutSolver.warm(templates)
+        self.stdout.write(f"{warmed} layouts ready in {time.perf_counter() - started:.2f}s")
\ No newline at end of file
@@ -0,0 +1,90 @@
+# manga/management/commands/reset_quotas.py
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, DateField, ExpressionWrapper, F, Max, Min, Value, When
+
+from ai_services import telemetry
+from manga.models import UserProfile
+from subscriptions.quota_service import QuotaService
+
+# Overdue dates are moved on by whole periods up to this many; older ones restart from the run date
+CATCH_UP_PERIODS = 12
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll over page quotas whose period has ended: zero pages_created, set pages_quota from "
+        "the profile's tier and move quota_reset_date on by whole periods, keeping each profile's "
+        "reset day. Works through profiles in "
+        "primary key ranges with one UPDATE per range, each committed on its own, so it can run "
+        "alongside generation traffic and be resumed with --start-id after an interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=datetime.date.fromisoformat,
+                            help="Roll over quotas due on or before this date (default today)")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Primary key range per UPDATE")
+        parser.add_argument('--start-id', type=int, help="Resume from this profile id")
+        parser.add_argument('--end-id', type=int, help="Stop after this profile id")
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between chunks, to leave room for live writes")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive")
+        today = options['date'] or datetime.date.today()
+        next_reset = QuotaService.next_reset_date(today)
+
+        bounds = UserProfile.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write("No profiles")
+            return
+        start = options['start_id'] if options['start_id'] is not None else bounds['low']
+        end = min(options['end_id'], bounds['high']) if options['end_id'] is not None else bounds['high']
+
+        # Every configured tier's quota in the same statement; unknown tiers keep theirs
+        quota = Case(
+            *[When(subscription_tier=tier, then=Value(pages))
+              for tier, pages in QuotaService.tier_quotas().items()],
+            default=F('pages_quota')
+        )
+        # The first date past today on each profile's own schedule, so a late run
+        # doesn't shift the reset day; the first match is the fewest whole periods
+        period = next_reset - today
+        reset_date = Case(
+            *[When(quota_reset_date__gt=today - period * periods,
+                   then=ExpressionWrapper(F('quota_reset_date') + period * periods, output_field=DateField()))
+              for periods in range(1, CATCH_UP_PERIODS + 1)],
+            default=Value(next_reset)
+        )
+
+        total = 0
+        started = time.perf_counter()
+        low = start
+        while low <= end:
+            high = min(low + options['chunk_size'] - 1, end)
+            with telemetry.span('quota_reset.chunk'), transaction.atomic():
+                # Generation charges quota with F() updates, so they interleave safely with this
+                updated = UserProfile.objects.filter(
+                    id__gte=low, id__lte=high, quota_reset_date__lte=today
+                ).update(pages_created=0, pages_quota=quota, quota_reset_date=reset_date)
+            total += updated
+            telemetry.increment('quota_reset.rows', updated)
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"ids {low}-{high}: {updated} reset, {total} total, "
+                f"{total / elapsed if elapsed else 0:.0f} rows/s (resume with --start-id {high + 1})"
+            )
+            low = high + 1
+            if options['pause'] and low <= end:
+                time.sleep(options['pause'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Reset {total} quotas due by {today} in {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
\ No newline at end of file
@@ -0,0 +1,16 @@
+# manga/management/commands/sweep_exports.py
+from django.core.management.base import BaseCommand
+
+from manga.export_service import ExportService
+
+
+class Command(BaseCommand):
+    help = "Delete exported PDFs and PNGs older than their advertised expiry"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=None,
+                            help="Seconds since an export was last handed out; defaults to MANGA_EXPORT_TTL")
+
+    def handle(self, *args, **options):
+        removed, freed = ExportService.sweep(options['max_age'])
+        self.stdout.write(f"Removed {removed} exports, freed {freed / 1024 ** 2:.1f} MiB")
\ No newline at end of file
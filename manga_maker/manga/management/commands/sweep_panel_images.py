@@ -0,0 +1,50 @@
+# manga/management/commands/sweep_panel_images.py
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from ai_services.blob_store import BlobStore
+from ai_services.models import ImageBlob
+from manga.models import Panel
+
+
+class Command(BaseCommand):
+    help = "Delete stored panel images that no panel references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-seconds', type=int, default=None,
+                            help="Minimum time unreferenced; defaults to MANGA_BLOB_GRACE_SECONDS")
+        parser.add_argument('--reconcile', action='store_true',
+                            help="Recount references from Panel rows before sweeping")
+
+    def handle(self, *args, **options):
+        if options['reconcile']:
+            fixed = self._reconcile()
+            self.stdout.write(f"Corrected reference counts on {fixed} images")
+
+        removed, freed = BlobStore.sweep(options['grace_seconds'])
+        self.stdout.write(f"Removed {removed} images, freed {freed / 1024 ** 2:.1f} MiB")
+
+    @staticmethod
+    def _reconcile(batch_size=1000):
+        """Rebuild every blob's reference count from the Panel table"""
+        counts = Counter()
+        for image_url in Panel.objects.values_list('image_url', flat=True).iterator(chunk_size=batch_size):
+            digest = BlobStore.digest_for_url(image_url)
+            if digest:
+                counts[digest] += 1
+
+        stale = []
+        fixed = 0
+        for blob in ImageBlob.objects.only('digest', 'ref_count').iterator(chunk_size=batch_size):
+            if blob.ref_count != counts[blob.digest]:
+                blob.ref_count = counts[blob.digest]
+                stale.append(blob)
+            if len(stale) >= batch_size:
+                fixed += len(stale)
+                ImageBlob.objects.bulk_update(stale, ['ref_count'])
+                stale = []
+        if stale:
+            fixed += len(stale)
+            ImageBlob.objects.bulk_update(stale, ['ref_count'])
+        return fixed
\ No newline at end of file
@@ -0,0 +1,49 @@
+# manga/management/commands/tune_scheduler.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from manga.scheduler import TIERS, GenerationScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Show or change the generation scheduler's weights and limits. Changes are stored in "
+        "the shared cache (CACHES; Redis when REDIS_URL is set) and every server process picks "
+        "them up within a second. Queue depths shown are this command's own, so always empty; "
+        "GET /api/scheduler/ shows a server's."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tier', choices=TIERS, help="Tier that --weight and --tier-max-in-flight apply to")
+        parser.add_argument('--weight', type=float)
+        parser.add_argument('--tier-max-in-flight', type=int)
+        parser.add_argument('--max-in-flight', type=int, help="Slots per process across all tiers")
+        parser.add_argument('--aging-seconds', type=float)
+        parser.add_argument('--queue-timeout', type=float)
+        parser.add_argument('--reset', action='store_true', help="Drop runtime overrides first")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            GenerationScheduler.reset_config()
+
+        overrides = {
+            key: options[key] for key in ('max_in_flight', 'aging_seconds', 'queue_timeout')
+            if options[key] is not None
+        }
+        tier_values = {
+            key: options[option] for key, option in (('weight', 'weight'), ('max_in_flight', 'tier_max_in_flight'))
+            if options[option] is not None
+        }
+        if tier_values:
+            if not options['tier']:
+                raise CommandError("--weight and --tier-max-in-flight need --tier")
+            overrides['tiers'] = {options['tier']: tier_values}
+
+        if overrides:
+            try:
+                GenerationScheduler.configure(overrides)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(GenerationScheduler.snapshot(), indent=2))
\ No newline at end of file
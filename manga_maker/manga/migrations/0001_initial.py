@@ -0,0 +1,117 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:45
+
+import datetime
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('identifier', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField()),
+                ('llm_provider', models.CharField(max_length=50)),
+                ('image_provider', models.CharField(max_length=50)),
+                ('tier_required', models.CharField(choices=[('FREE', 'Free'), ('BASIC', 'Basic'), ('PRO', 'Pro'), ('ENTERPRISE', 'Enterprise')], default='FREE', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('configuration', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MangaChapter',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('narrative', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MangaProject',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('narrative', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('page_number', models.IntegerField(blank=True, null=True)),
+                ('chapter', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='manga.mangachapter')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CharacterProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('visual_traits', models.TextField(blank=True)),
+                ('seed', models.IntegerField()),
+                ('style_reference', models.URLField(blank=True, max_length=500, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manga.mangaproject')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Panel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('panel_number', models.IntegerField()),
+                ('description', models.TextField()),
+                ('prompt', models.TextField()),
+                ('enhanced_prompt', models.TextField(blank=True)),
+                ('image_url', models.URLField(blank=True, max_length=500)),
+                ('position_x', models.FloatField(default=0)),
+                ('position_y', models.FloatField(default=0)),
+                ('width', models.FloatField(default=0)),
+                ('height', models.FloatField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manga.mangaproject')),
+            ],
+            options={
+                'ordering': ['panel_number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Template',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('description', models.TextField()),
+                ('layout_json', models.TextField()),
+                ('preview_image', models.ImageField(blank=True, null=True, upload_to='templates/')),
+                ('is_public', models.BooleanField(default=True)),
+                ('min_panels', models.IntegerField(default=1)),
+                ('max_panels', models.IntegerField(default=12)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='mangaproject',
+            name='template',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='manga.template'),
+        ),
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subscription_tier', models.CharField(choices=[('FREE', 'Free'), ('BASIC', 'Basic'), ('PRO', 'Pro'), ('ENTERPRISE', 'Enterprise')], default='FREE', max_length=20)),
+                ('pages_created', models.IntegerField(default=0)),
+                ('pages_quota', models.IntegerField(default=5)),
+                ('quota_reset_date', models.DateField(default=datetime.date.today)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manga', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='panel',
+            name='preview_ready_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='panel',
+            name='render_stage',
+            field=models.CharField(choices=[('preview', 'Preview'), ('final', 'Final')], default='final', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='panel',
+            name='seed',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='panel',
+            name='upgraded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manga', '0002_panel_progressive_rendering'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mangaproject',
+            index=models.Index(fields=['user', 'created_at'], name='mangaproject_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manga', '0003_project_listing_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='characterprofile',
+            index=models.Index(fields=['project', 'name'], name='character_project_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='template',
+            index=models.Index(fields=['is_public', 'created_by'], name='template_public_owner_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manga', '0004_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mangaproject',
+            name='generation_params',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='mangaproject',
+            name='generation_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mangaproject',
+            name='generation_status',
+            field=models.CharField(choices=[('generating', 'Generating'), ('failed', 'Failed'), ('complete', 'Complete')], default='complete', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='mangaproject',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='panel',
+            name='generation_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='panel',
+            name='generation_status',
+            field=models.CharField(choices=[('planned', 'Planned'), ('rendering', 'Rendering'), ('done', 'Done'), ('failed', 'Failed')], default='done', max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name='mangaproject',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='mangaproject_user_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manga', '0005_checkpointed_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='panel',
+            name='importance',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.CreateModel(
+            name='SolvedLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('panel_count', models.IntegerField()),
+                ('weights', models.JSONField(default=list)),
+                ('positions', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='manga.template')),
+            ],
+        ),
+    ]
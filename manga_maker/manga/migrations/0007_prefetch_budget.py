@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manga', '0006_layout_solver'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='prefetch_budget_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='prefetch_budget_used',
+            field=models.IntegerField(default=0),
+        ),
+    ]
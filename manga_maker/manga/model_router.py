@@ -0,0 +1,275 @@
+# manga/model_router.py
+import math
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from ai_services.registry import AIServiceRegistry
+
+from .generation_context import AIModelCache, TIER_PROVIDERS
+
+TIER_ORDER = ['FREE', 'BASIC', 'PRO', 'ENTERPRISE']
+
+# A provider pair to generate with; model is None for the built-in tier defaults
+Route = namedtuple('Route', ['model', 'llm_provider', 'image_provider'])
+
+
+class ProviderStats:
+    """Exponentially weighted latency and error rate of one provider"""
+    __slots__ = ('calls', 'latency', 'latency_var', 'error_rate', 'updated_at')
+
+    def __init__(self):
+        self.calls = 0
+        self.latency = 0.0
+        self.latency_var = 0.0
+        self.error_rate = 0.0
+        self.updated_at = None
+
+    def observe(self, seconds, ok, alpha):
+        self.calls += 1
+        self.updated_at = time.time()
+        self.error_rate += alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        if not ok:
+            return
+        if self.calls == 1 or self.latency == 0.0:
+            self.latency = seconds
+            return
+        delta = seconds - self.latency
+        self.latency += alpha * delta
+        self.latency_var = (1 - alpha) * (self.latency_var + alpha * delta * delta)
+
+    def p95(self):
+        """Rough 95th percentile latency, assuming a normal spread"""
+        return self.latency + 1.645 * math.sqrt(self.latency_var)
+
+
+class ModelRouter:
+    """
+    Pick the provider pair for a job from observed latency, errors and price
+
+    Every provider call is timed into per-provider statistics. A page's
+    latency is predicted as the LLM breakdown plus the slowest panel (panels
+    render in parallel), and its cost from the AIModel.configuration prices:
+
+        {"llm_cost_per_call": 0.01, "image_cost_per_call": 0.04}
+
+    The cheapest candidate whose prediction meets the tier's latency SLO
+    (and whose error rate is acceptable) wins; if none does, the fastest
+    one. Providers with too few or stale samples are assumed to meet the
+    SLO so that they get tried.
+    """
+    _stats = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def observe(cls, service_type, provider, seconds, ok=True):
+        """
+        Record one provider call
+
+        Args:
+            service_type (str): 'llm' or 'image'
+            provider (str): Registry name of the provider
+            seconds (float): Call duration
+            ok (bool): Whether the call succeeded
+        """
+        alpha = getattr(settings, 'MANGA_ROUTER_EWMA_ALPHA', 0.2)
+        with cls._lock:
+            stats = cls._stats.get((service_type, provider))
+            if stats is None:
+                stats = cls._stats[(service_type, provider)] = ProviderStats()
+            stats.observe(seconds, ok, alpha)
+
+    @classmethod
+    @contextmanager
+    def track(cls, service_type, provider):
+        """Time the enclosed provider call into the router's statistics"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            cls.observe(service_type, provider, time.perf_counter() - start, ok)
+
+    @classmethod
+    def track_stream(cls, service_type, provider, stream):
+        """
+        Yield from a streaming provider call, timing only the provider
+
+        Time the consumer spends between items isn't counted, and a stream
+        the consumer abandons (e.g. because its own code raised) isn't
+        recorded at all, so only the provider's latency and errors count.
+
+        Args:
+            service_type (str): 'llm' or 'image'
+            provider (str): Registry name of the provider
+            stream (iterable): The provider's streamed results
+
+        Yields:
+            The stream's items
+        """
+        elapsed = 0.0
+        iterator = iter(stream)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                cls.observe(service_type, provider, elapsed + time.perf_counter() - start)
+                return
+            except Exception:
+                cls.observe(service_type, provider, elapsed + time.perf_counter() - start, ok=False)
+                raise
+            elapsed += time.perf_counter() - start
+            yield item
+
+    @classmethod
+    def route(cls, tier, panel_count=4):
+        """
+        Choose the providers for a job
+
+        Args:
+            tier (str): Subscription tier of the user
+            panel_count (int): Panels per page, used to price the page
+
+        Returns:
+            Route: Chosen AIModel (or None) and provider names
+
+        Raises:
+            KeyError: If no registered provider pair is available to the tier
+        """
+        candidates = cls._candidates(tier, panel_count)
+        if not candidates:
+            raise KeyError(f"No registered providers available for tier {tier}")
+        return cls._choose(candidates)['route']
+
+    @classmethod
+    def routing_table(cls, panel_count=4):
+        """
+        Describe the current routing decision for every tier
+
+        Returns:
+            dict: Per tier, the chosen route and every candidate's prediction,
+                plus the raw per-provider statistics
+        """
+        table = {}
+        for tier in TIER_ORDER:
+            candidates = cls._candidates(tier, panel_count)
+            chosen = cls._choose(candidates) if candidates else None
+            table[tier] = {
+                'slo_seconds': cls._slo(tier),
+                'chosen': cls._describe(chosen) if chosen else None,
+                'candidates': [cls._describe(candidate) for candidate in candidates]
+            }
+
+        with cls._lock:
+            providers = {
+                f"{service_type}:{provider}": {
+                    'calls': stats.calls,
+                    'latency_seconds': round(stats.latency, 3),
+                    'p95_seconds': round(stats.p95(), 3),
+                    'error_rate': round(stats.error_rate, 4)
+                }
+                for (service_type, provider), stats in sorted(cls._stats.items())
+            }
+        return {'tiers': table, 'providers': providers}
+
+    @classmethod
+    def reset(cls):
+        """Forget every observation"""
+        with cls._lock:
+            cls._stats = {}
+
+    @classmethod
+    def _candidates(cls, tier, panel_count):
+        allowed = TIER_ORDER[:TIER_ORDER.index(tier) + 1] if tier in TIER_ORDER else TIER_ORDER[:1]
+        routes = [
+            Route(model, model.llm_provider, model.image_provider)
+            for model in AIModelCache.active()
+            if model.tier_required in allowed
+        ]
+        if not routes:
+            # No priced models configured; fall back to the built-in tier defaults, best tier first
+            routes = [Route(None, *TIER_PROVIDERS[name]) for name in reversed(allowed)]
+
+        slo = cls._slo(tier)
+        max_error_rate = getattr(settings, 'MANGA_ROUTER_MAX_ERROR_RATE', 0.5)
+        candidates = []
+        seen = set()
+        for route in routes:
+            key = (route.model.id if route.model else None, route.llm_provider, route.image_provider)
+            if key in seen:
+                continue
+            seen.add(key)
+            if not (AIServiceRegistry.is_registered('llm', route.llm_provider)
+                    and AIServiceRegistry.is_registered('image', route.image_provider)):
+                continue
+
+            llm = cls._prediction('llm', route.llm_provider)
+            image = cls._prediction('image', route.image_provider)
+            error_rate = 1 - (1 - llm[1]) * (1 - image[1])
+
+            latency = None if llm[0] is None or image[0] is None else llm[0] + image[0]
+            configuration = route.model.configuration if route.model else {}
+            cost = (
+                configuration.get('llm_cost_per_call', 0)
+                + configuration.get('image_cost_per_call', 0) * panel_count
+            )
+            candidates.append({
+                'route': route,
+                'predicted_seconds': latency,
+                'error_rate': error_rate,
+                'cost': cost,
+                # Failed calls are paid for and retried, so they raise the real price
+                'effective_cost': cost / max(1 - error_rate, 1e-6),
+                'meets_slo': (latency is None or latency <= slo) and error_rate <= max_error_rate
+            })
+        return candidates
+
+    @classmethod
+    def _prediction(cls, service_type, provider):
+        """Return (p95 latency or None while still learning, error rate)"""
+        min_samples = getattr(settings, 'MANGA_ROUTER_MIN_SAMPLES', 5)
+        ttl = getattr(settings, 'MANGA_ROUTER_STATS_TTL', 300)
+        with cls._lock:
+            stats = cls._stats.get((service_type, provider))
+            # Stale statistics are relearned, so a provider that was failing gets retried eventually
+            if stats is None or stats.calls < min_samples or time.time() - stats.updated_at > ttl:
+                return None, 0.0
+            # No successful call yet, so there is no latency to go on
+            latency = stats.p95() if stats.latency else None
+            return latency, stats.error_rate
+
+    @staticmethod
+    def _choose(candidates):
+        within_slo = [candidate for candidate in candidates if candidate['meets_slo']]
+        if within_slo:
+            # min() keeps configuration order between equally priced candidates
+            return min(within_slo, key=lambda candidate: candidate['effective_cost'])
+        return min(candidates, key=lambda candidate: (
+            candidate['error_rate'] > getattr(settings, 'MANGA_ROUTER_MAX_ERROR_RATE', 0.5),
+            candidate['predicted_seconds'] if candidate['predicted_seconds'] is not None else math.inf
+        ))
+
+    @staticmethod
+    def _slo(tier):
+        slos = getattr(settings, 'MANGA_TIER_LATENCY_SLO', {})
+        return slos.get(tier, slos.get('FREE', 180))
+
+    @staticmethod
+    def _describe(candidate):
+        route = candidate['route']
+        return {
+            'model': route.model.identifier if route.model else None,
+            'llm_provider': route.llm_provider,
+            'image_provider': route.image_provider,
+            'predicted_seconds': None if candidate['predicted_seconds'] is None
+            else round(candidate['predicted_seconds'], 3),
+            'error_rate': round(candidate['error_rate'], 4),
+            'cost': candidate['cost'],
+            'effective_cost': round(candidate['effective_cost'], 6),
+            'meets_slo': candidate['meets_slo']
+        }
\ No newline at end of file
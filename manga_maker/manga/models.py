@@ -20,6 +20,9 @@ class UserProfile(models.Model):
     pages_created = models.IntegerField(default=0)
     pages_quota = models.IntegerField(default=5)  # Default for free tier
     quota_reset_date = models.DateField(default=datetime.date.today)
+    # Speculative prefetch segments prepared on prefetch_budget_date
+    prefetch_budget_date = models.DateField(null=True, blank=True)
+    prefetch_budget_used = models.IntegerField(default=0)
     
     @property
     def remaining_pages(self):
@@ -41,9 +44,19 @@ class Template(models.Model):
     min_panels = models.IntegerField(default=1)
     max_panels = models.IntegerField(default=12)
     
+    class Meta:
+        indexes = [
+            # Public catalogue and a user's private templates
+            models.Index(fields=['is_public', 'created_by'], name='template_public_owner_idx')
+        ]
+    
     def __str__(self):
         return self.name
     
+    def clean(self):
+        from .layout_validator import LayoutValidator
+        LayoutValidator.check_template(self)
+    
     @property
     def layout(self):
         """Return the layout as a Python object"""
@@ -74,6 +87,18 @@ class AIModel(models.Model):
         return f"{self.name} ({self.tier_required})"
 
 
+class MangaChapter(models.Model):
+    """A chapter, generated in one batch as a sequence of manga pages"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=200)
+    narrative = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.title
+
+
 class MangaProject(models.Model):
     """A manga project, containing a set of panels"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -81,4 +106,112 @@ class MangaProject(models.Model):
     title = models.CharField(max_length=200)
     narrative = models.TextField()
     template = models.ForeignKey(Template, on_delete=models.SET_NULL, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+    chapter = models.ForeignKey(
+        MangaChapter, on_delete=models.CASCADE, null=True, blank=True, related_name='pages'
+    )
+    page_number = models.IntegerField(null=True, blank=True)  # Position within the chapter
+    # Checkpointed generation: a failed job resumes from its unfinished panels.
+    # Rows written outside that path are complete as created.
+    generation_status = models.CharField(
+        max_length=12,
+        choices=[
+            ('generating', 'Generating'),
+            ('failed', 'Failed'),
+            ('complete', 'Complete')
+        ],
+        default='complete'
+    )
+    generation_started_at = models.DateTimeField(null=True, blank=True)
+    generation_params = models.JSONField(default=dict, blank=True)  # What resume() needs to redo the job
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)  # Client-supplied, per user
+    
+    class Meta:
+        indexes = [
+            # Backs the per-user project listing, paginated on created_at
+            models.Index(fields=['user', 'created_at'], name='mangaproject_user_created_idx')
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='mangaproject_user_idempotency_key')
+        ]
+    
+    def __str__(self):
+        return self.title
+
+
+class Panel(models.Model):
+    """A single generated panel of a manga page"""
+    project = models.ForeignKey(MangaProject, on_delete=models.CASCADE)
+    panel_number = models.IntegerField()
+    description = models.TextField()
+    prompt = models.TextField()
+    enhanced_prompt = models.TextField(blank=True)
+    image_url = models.URLField(max_length=500, blank=True)
+    # Layout position, assigned by TemplateService.apply_template
+    position_x = models.FloatField(default=0)
+    position_y = models.FloatField(default=0)
+    width = models.FloatField(default=0)
+    height = models.FloatField(default=0)
+    seed = models.IntegerField(null=True, blank=True)
+    importance = models.FloatField(default=1.0)  # From the LLM breakdown; weights the panel's share of the page
+    # Progressive rendering: a fast preview is shown first, then replaced in place
+    render_stage = models.CharField(
+        max_length=10,
+        choices=[
+            ('preview', 'Preview'),
+            ('final', 'Final')
+        ],
+        default='final'
+    )
+    preview_ready_at = models.DateTimeField(null=True, blank=True)
+    upgraded_at = models.DateTimeField(null=True, blank=True)
+    # Checkpoint of the panel's first render; only 'done' panels survive a resume untouched
+    generation_status = models.CharField(
+        max_length=10,
+        choices=[
+            ('planned', 'Planned'),
+            ('rendering', 'Rendering'),
+            ('done', 'Done'),
+            ('failed', 'Failed')
+        ],
+        default='done'
+    )
+    generation_error = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['panel_number']
+    
+    def __str__(self):
+        return f"Panel {self.panel_number} of {self.project}"
+
+
+class SolvedLayout(models.Model):
+    """A page layout computed by LayoutSolver, kept so it is only ever solved once"""
+    key = models.CharField(max_length=64, unique=True)  # Hash of the layout, panel count, weights and solver settings
+    template = models.ForeignKey(Template, on_delete=models.CASCADE, null=True, blank=True)
+    panel_count = models.IntegerField()
+    weights = models.JSONField(default=list)
+    positions = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.panel_count} panels for {self.template}"
+
+
+class CharacterProfile(models.Model):
+    """Visual identity of a character, kept consistent across panels"""
+    project = models.ForeignKey(MangaProject, on_delete=models.CASCADE)
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    visual_traits = models.TextField(blank=True)
+    seed = models.IntegerField()
+    style_reference = models.URLField(max_length=500, null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Roster loads per project and name lookups during consistency injection
+            models.Index(fields=['project', 'name'], name='character_project_name_idx')
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.project})"
\ No newline at end of file
@@ -0,0 +1,146 @@
+# manga/page_render.py
+"""
+Page compositing and PDF assembly for exports
+
+render_page runs in ExportService's spawned worker processes, which import
+this module without setting Django up, so it must not import Django or
+anything that does (models in particular).
+"""
+import os
+import shutil
+
+
+def render_page(page_spec, output_path):
+    """
+    Composite a page's panels onto a blank canvas and write it to disk
+
+    Runs in a worker process, so it only depends on Pillow and requests.
+
+    Args:
+        page_spec (dict): Canvas size, output format and panel boxes
+        output_path (str): File to write the rendered page to
+
+    Returns:
+        str: output_path
+    """
+    from PIL import Image, ImageDraw, ImageOps
+
+    canvas = Image.new('RGB', tuple(page_spec['size']), 'white')
+    draw = ImageDraw.Draw(canvas)
+
+    for panel in page_spec['panels']:
+        left, top, right, bottom = panel['box']
+        if right <= left or bottom <= top:
+            continue
+
+        image = _open_panel_image(panel['source'])
+        if image is not None:
+            with image:
+                fitted = ImageOps.fit(image.convert('RGB'), (right - left, bottom - top))
+            canvas.paste(fitted, (left, top))
+            fitted.close()
+
+        draw.rectangle((left, top, right - 1, bottom - 1), outline='black', width=page_spec['border'])
+
+    canvas.save(output_path, format=page_spec['format'], quality=90)
+    canvas.close()
+    return output_path
+
+
+def _open_panel_image(source):
+    from PIL import Image
+
+    if source.get('path'):
+        return Image.open(source['path'])
+    if source.get('url'):
+        import io
+        import requests
+
+        response = requests.get(source['url'], timeout=30)
+        response.raise_for_status()
+        return Image.open(io.BytesIO(response.content))
+    return None
+
+
+class StreamingPdfWriter:
+    """
+    Minimal PDF writer that appends one JPEG page at a time
+
+    JPEG data is embedded as-is (DCTDecode), so a page never has to be
+    decoded again and only one page is ever held in memory.
+    """
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, fileobj):
+        self.file = fileobj
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def add_jpeg_page(self, jpeg_path, width, height, dpi):
+        """
+        Append a page showing a full-bleed JPEG
+
+        Args:
+            jpeg_path (str): JPEG file to embed
+            width (int): Image width in pixels
+            height (int): Image height in pixels
+            dpi (int): Print resolution used to size the page
+        """
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+        page_width = width * 72 / dpi
+        page_height = height * 72 / dpi
+
+        self._begin(image_id)
+        self.file.write(
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode "
+            f"/Length {os.path.getsize(jpeg_path)} >>\nstream\n".encode()
+        )
+        with open(jpeg_path, 'rb') as source:
+            shutil.copyfileobj(source, self.file)
+        self.file.write(b"\nendstream\nendobj\n")
+
+        content = f"q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q".encode()
+        self._write_object(
+            content_id,
+            b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"
+        )
+        self._write_object(
+            page_id,
+            f"<< /Type /Page /Parent {self.PAGES_ID} 0 R "
+            f"/MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> "
+            f"/Contents {content_id} 0 R >>".encode()
+        )
+        self.page_ids.append(page_id)
+
+    def close(self):
+        """Write the page tree, catalog and cross-reference table"""
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._write_object(
+            self.PAGES_ID,
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode()
+        )
+        self._write_object(self.CATALOG_ID, f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>".encode())
+
+        xref_offset = self.file.tell()
+        self.file.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode())
+        for object_id in range(1, self.next_id):
+            self.file.write(f"{self.offsets[object_id]:010d} 00000 n \n".encode())
+        self.file.write(
+            f"trailer\n<< /Size {self.next_id} /Root {self.CATALOG_ID} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+
+    def _begin(self, object_id):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(f"{object_id} 0 obj\n".encode())
+
+    def _write_object(self, object_id, body):
+        self._begin(object_id)
+        self.file.write(body)
+        self.file.write(b"\nendobj\n")
\ No newline at end of file
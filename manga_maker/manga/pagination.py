@@ -0,0 +1,15 @@
+# manga/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class ProjectCursorPagination(CursorPagination):
+    """
+    Newest-first project pages
+
+    A cursor seeks on created_at instead of counting an OFFSET, so every page
+    costs the same however many projects a user has.
+    """
+    ordering = '-created_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
\ No newline at end of file
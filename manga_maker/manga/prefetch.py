@@ -0,0 +1,197 @@
+# manga/prefetch.py
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from ai_services import telemetry
+
+from .character_service import CharacterConsistencyService
+from .models import UserProfile
+from .render_pipeline import RenderPipeline
+from .scheduler import GenerationScheduler
+from .template_service import TemplateService
+
+logger = logging.getLogger(__name__)
+
+# Speculative segments a user may have prepared per day; 0 turns it off for the tier
+DEFAULT_PREFETCH_DAILY_BUDGET = {'FREE': 0, 'BASIC': 0, 'PRO': 20, 'ENTERPRISE': 100}
+
+
+class SpeculativePrefetcher:
+    """
+    Prepare a user's likely next generation while providers are idle
+
+    After a page finishes, the LLM work for the next request is done ahead
+    of time: the panel breakdown, the character extraction (carrying over
+    the seeds of characters already on the page) and the template choice.
+    Candidates are the next narrative segment, when the client sends one,
+    and the same narrative for a regeneration. Results sit in the cache for
+    MANGA_PREFETCH_TTL seconds and are taken by the next generate_manga()
+    for the same narrative, panel count and LLM provider. The cache is the
+    shared one from CACHES, so any worker can take what another prepared.
+
+    Work only starts when no generation job is queued and fewer than
+    MANGA_PREFETCH_IDLE_FRACTION of the scheduler's slots are busy, counts
+    against the tier's MANGA_PREFETCH_DAILY_BUDGET per user (counted on the
+    UserProfile, so every process draws on the same budget), and at most
+    MANGA_PREFETCH_MAX_CONCURRENCY segments are prepared at once per process.
+    """
+    _running = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def enabled_for(cls, tier):
+        if not getattr(settings, 'MANGA_PREFETCH_ENABLED', False):
+            return False
+        return cls._budget(tier) > 0
+
+    @classmethod
+    def after_page(cls, service, project, next_narrative=None):
+        """
+        Queue speculative work after a page has been generated
+
+        Args:
+            service (MangaGenerationService): Service that generated the page
+            project (MangaProject): The finished project
+            next_narrative (str, optional): Narrative the client will most likely generate next
+
+        Returns:
+            int: Number of segments queued
+        """
+        profile = service.user_profile
+        if not cls.enabled_for(profile.subscription_tier):
+            return 0
+
+        context = service.get_context()
+        panel_count = project.generation_params.get('panel_count', 4)
+        # Carry the page's character seeds over, so the next page draws them the same way
+        seeds = {name: character['seed'] for name, character in
+                 CharacterConsistencyService(project.id).characters.items()}
+
+        segments = [next_narrative, project.narrative] if next_narrative else [project.narrative]
+        queued = 0
+        for narrative in segments:
+            key = cls._key(profile.user_id, narrative, panel_count, context.llm_provider)
+            if cache.get(key) is not None:
+                continue
+            if not cls._is_idle():
+                telemetry.increment('prefetch.skipped', reason='busy')
+                break
+            # Take a slot first, so a skip for concurrency doesn't use up the user's budget
+            if not cls._start():
+                telemetry.increment('prefetch.skipped', reason='concurrency')
+                break
+            if not cls._charge(profile.user_id, profile.subscription_tier):
+                cls._finish()
+                telemetry.increment('prefetch.skipped', reason='budget')
+                break
+            try:
+                RenderPipeline.submit(
+                    cls._prepare, key, context.llm_service, narrative, panel_count, seeds
+                )
+            except Exception:
+                cls._finish()
+                raise
+            queued += 1
+        return queued
+
+    @classmethod
+    def take(cls, user_id, narrative, panel_count, llm_provider):
+        """
+        Remove and return prepared work for a generation, if any
+
+        Returns:
+            dict: 'plan' (panel data list), 'characters' (character dicts) and
+                'template_slug', or None when nothing was prepared
+        """
+        key = cls._key(user_id, narrative, panel_count, llm_provider)
+        prepared = cache.get(key)
+        if prepared is None:
+            telemetry.increment('prefetch.misses')
+            return None
+        cache.delete(key)
+        telemetry.increment('prefetch.hits')
+        return prepared
+
+    @classmethod
+    def _prepare(cls, key, llm_service, narrative, panel_count, seeds):
+        """Do the LLM work for one segment; runs on the RenderPipeline"""
+        try:
+            with telemetry.span('prefetch.prepare'):
+                characters = CharacterConsistencyService.parse_character_data(
+                    CharacterConsistencyService.request_characters(narrative)
+                )
+                for character in characters:
+                    if character['name'] in seeds:
+                        character['seed'] = seeds[character['name']]
+                plan = list(llm_service.parse_narrative(narrative, panel_count))
+                template = TemplateService.suggest_template(narrative, panel_count)
+            cache.set(key, {
+                'plan': plan,
+                'characters': characters,
+                'template_slug': template.slug
+            }, getattr(settings, 'MANGA_PREFETCH_TTL', 600))
+        except Exception:
+            # Speculation is best effort; the real request does the work instead
+            logger.warning("Speculative prefetch failed", exc_info=True)
+            telemetry.increment('prefetch.failures')
+        finally:
+            cls._finish()
+
+    @classmethod
+    def _is_idle(cls):
+        snapshot = GenerationScheduler.snapshot()
+        tiers = snapshot['tiers'].values()
+        if any(tier['queued'] for tier in tiers):
+            return False
+        busy = sum(tier['in_flight'] for tier in tiers)
+        return busy < snapshot['max_in_flight'] * getattr(settings, 'MANGA_PREFETCH_IDLE_FRACTION', 0.5)
+
+    @classmethod
+    def _start(cls):
+        with cls._lock:
+            if cls._running >= getattr(settings, 'MANGA_PREFETCH_MAX_CONCURRENCY', 2):
+                return False
+            cls._running += 1
+            return True
+
+    @classmethod
+    def _finish(cls):
+        with cls._lock:
+            cls._running -= 1
+
+    @classmethod
+    def _charge(cls, user_id, tier):
+        """Count one segment against the user's daily budget; False once it is spent"""
+        budget = cls._budget(tier)
+        today = timezone.now().date()
+        profiles = UserProfile.objects.filter(user_id=user_id)
+        # Conditional F() updates, so concurrent workers can't overspend; the
+        # second attempt covers another worker starting the day in between
+        for _ in range(2):
+            if profiles.filter(prefetch_budget_date=today, prefetch_budget_used__lt=budget).update(
+                prefetch_budget_used=F('prefetch_budget_used') + 1
+            ):
+                return True
+            if budget < 1 or profiles.filter(prefetch_budget_date=today).exists():
+                return False
+            if profiles.exclude(prefetch_budget_date=today).update(
+                prefetch_budget_date=today, prefetch_budget_used=1
+            ):
+                return True
+        return False
+
+    @staticmethod
+    def _budget(tier):
+        budgets = getattr(settings, 'MANGA_PREFETCH_DAILY_BUDGET', DEFAULT_PREFETCH_DAILY_BUDGET)
+        return budgets.get(tier, 0)
+
+    @staticmethod
+    def _key(user_id, narrative, panel_count, llm_provider):
+        digest = hashlib.sha256(narrative.encode()).hexdigest()
+        return f"prefetch:{user_id}:{llm_provider}:{panel_count}:{digest}"
\ No newline at end of file
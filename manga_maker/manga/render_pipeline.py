@@ -0,0 +1,82 @@
+# manga/render_pipeline.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from ai_services import telemetry
+
+
+class RenderPipeline:
+    """
+    Process-wide pool that runs provider calls for every generation job
+
+    All pages and panels share the same bounded executor, so the number of
+    in-flight provider requests never exceeds MANGA_RENDER_MAX_CONCURRENCY
+    no matter how many chapters are being generated at once. Jobs may use
+    the ORM: each worker thread keeps its own database connection, and a
+    stale or broken one is closed after every job, as Django does at the
+    end of a request.
+    """
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls):
+        """Return the shared executor, creating it on first use"""
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'MANGA_RENDER_MAX_CONCURRENCY', 8),
+                        thread_name_prefix='manga-render'
+                    )
+        return cls._executor
+
+    @classmethod
+    def submit(cls, fn, *args, **kwargs):
+        """
+        Schedule a provider call, or other work of a job, on the shared pipeline
+
+        Args:
+            fn (callable): Function to run; it may use the ORM
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Future: Future resolving to the function result
+        """
+        # Spans opened by fn nest under the caller's current span
+        return cls.get_executor().submit(cls._run, telemetry.propagate(fn), *args, **kwargs)
+
+    @classmethod
+    def map(cls, fn, items):
+        """
+        Run fn over items concurrently and return results in input order
+
+        Args:
+            fn (callable): Function applied to each item
+            items (iterable): Inputs to process
+
+        Returns:
+            list: Results, in the same order as items
+        """
+        futures = [cls.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _run(fn, *args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            # Worker threads outlive any request, so nothing else releases their connections
+            close_old_connections()
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        """Stop the shared executor; a new one is created on next use"""
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=wait)
+                cls._executor = None
\ No newline at end of file
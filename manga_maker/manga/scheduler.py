@@ -0,0 +1,295 @@
+# manga/scheduler.py
+import copy
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ai_services import telemetry
+
+TIERS = ['FREE', 'BASIC', 'PRO', 'ENTERPRISE']
+
+DEFAULT_SCHEDULER_CONFIG = {
+    # Generation jobs running at once in this process, across all tiers
+    'max_in_flight': 8,
+    # A job waiting this long is served next regardless of its tier's weight
+    'aging_seconds': 30,
+    # Give up on a queued job after this many seconds
+    'queue_timeout': 300,
+    'tiers': {
+        'FREE': {'weight': 1, 'max_in_flight': 2},
+        'BASIC': {'weight': 2, 'max_in_flight': 4},
+        'PRO': {'weight': 4, 'max_in_flight': 6},
+        'ENTERPRISE': {'weight': 8, 'max_in_flight': 8},
+    }
+}
+
+
+class SchedulerBusy(Exception):
+    """Raised when a job waited longer than queue_timeout for a slot"""
+
+
+class _Ticket:
+    __slots__ = ('tier', 'enqueued_at', 'granted')
+
+    def __init__(self, tier):
+        self.tier = tier
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class GenerationScheduler:
+    """
+    Weighted fair queuing of generation jobs by subscription tier
+
+    Each tier has its own FIFO queue. When a slot frees up, the tier with
+    the lowest virtual time is served and its virtual time advances by
+    1 / weight, so over a busy period tiers get slots in proportion to
+    their weights. Per-tier max_in_flight caps keep one tier from filling
+    every slot, and a job that has waited aging_seconds jumps the line so
+    FREE jobs never starve.
+
+    Slots are per process, so they only queue jobs that share a process
+    (threaded or ASGI workers). The configuration is the MANGA_SCHEDULER
+    setting merged with overrides stored in the shared cache by configure(),
+    which every process picks up within a second.
+    """
+    CONFIG_KEY = 'generation-scheduler:config'
+    CONFIG_REFRESH_SECONDS = 1
+
+    _condition = threading.Condition()
+    _queues = {}
+    _in_flight = {}
+    _virtual_time = {}
+    _config = None
+    _config_loaded_at = 0.0
+
+    @classmethod
+    @contextmanager
+    def slot(cls, tier, timeout=None):
+        """
+        Hold a generation slot for the enclosed block
+
+        Args:
+            tier (str): Subscription tier of the job's user
+            timeout (float, optional): Seconds to wait; defaults to queue_timeout
+
+        Raises:
+            SchedulerBusy: If no slot was granted in time
+        """
+        tier = cls.acquire(tier, timeout)
+        try:
+            yield
+        finally:
+            cls.release(tier)
+
+    @classmethod
+    def acquire(cls, tier, timeout=None):
+        """
+        Wait for a generation slot
+
+        Args:
+            tier (str): Subscription tier of the job's user; unknown tiers queue as FREE
+            timeout (float, optional): Seconds to wait; defaults to queue_timeout
+
+        Returns:
+            str: The tier the slot was granted under, to pass to release()
+
+        Raises:
+            SchedulerBusy: If no slot was granted in time
+        """
+        config = cls.get_config()
+        tier = tier if tier in config['tiers'] else TIERS[0]
+        if timeout is None:
+            timeout = config['queue_timeout']
+
+        ticket = _Ticket(tier)
+        deadline = ticket.enqueued_at + timeout
+        with telemetry.span('scheduler.wait', tier=tier), cls._condition:
+            queue = cls._queues.setdefault(tier, deque())
+            if not queue and not cls._in_flight.get(tier):
+                # A tier returning from idle starts level with the busiest one, not with banked credit
+                active = [cls._virtual_time.get(name, 0.0) for name in cls._active_tiers()]
+                cls._virtual_time[tier] = max(cls._virtual_time.get(tier, 0.0), min(active, default=0.0))
+            queue.append(ticket)
+            cls._dispatch(config)
+
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    queue.remove(ticket)
+                    cls._publish()
+                    telemetry.increment('scheduler.timeouts', tier=tier)
+                    raise SchedulerBusy(f"No generation slot free for the {tier} tier after {timeout:g}s")
+                # Wake up at least every second so configuration changes and aging take effect
+                cls._condition.wait(min(remaining, cls.CONFIG_REFRESH_SECONDS))
+                if not ticket.granted:
+                    cls._dispatch(cls.get_config())
+        return tier
+
+    @classmethod
+    def release(cls, tier):
+        """Give back a slot taken by acquire()"""
+        with cls._condition:
+            cls._in_flight[tier] = max(0, cls._in_flight.get(tier, 0) - 1)
+            cls._dispatch(cls.get_config())
+
+    @classmethod
+    def snapshot(cls):
+        """
+        Describe queues and slots for monitoring
+
+        Returns:
+            dict: Configuration plus per-tier queue depth, jobs in flight and
+                the oldest queued job's wait in seconds
+        """
+        config = cls.get_config()
+        now = time.monotonic()
+        with cls._condition:
+            tiers = {}
+            for tier in config['tiers']:
+                queue = cls._queues.get(tier) or ()
+                tiers[tier] = {
+                    **config['tiers'][tier],
+                    'queued': len(queue),
+                    'in_flight': cls._in_flight.get(tier, 0),
+                    'oldest_wait_seconds': round(now - queue[0].enqueued_at, 3) if queue else 0.0
+                }
+        return {
+            'max_in_flight': config['max_in_flight'],
+            'aging_seconds': config['aging_seconds'],
+            'queue_timeout': config['queue_timeout'],
+            'tiers': tiers
+        }
+
+    @classmethod
+    def get_config(cls):
+        """Return the effective configuration, refreshed from the cache at most once a second"""
+        now = time.monotonic()
+        if cls._config is None or now - cls._config_loaded_at >= cls.CONFIG_REFRESH_SECONDS:
+            cls._config = cls._merge(cls._settings(), cache.get(cls.CONFIG_KEY) or {})
+            cls._config_loaded_at = now
+        return cls._config
+
+    @classmethod
+    def configure(cls, overrides):
+        """
+        Change the scheduler configuration at runtime, in every process
+
+        Args:
+            overrides (dict): Any of max_in_flight, aging_seconds, queue_timeout
+                and tiers: {tier: {weight, max_in_flight}}
+
+        Returns:
+            dict: The new effective configuration
+
+        Raises:
+            ValueError: If a key is unknown or a value isn't a positive number
+        """
+        stored = cls._merge(cache.get(cls.CONFIG_KEY) or {}, overrides)
+        config = cls._merge(cls._settings(), stored)
+        cls._validate(config)
+        cache.set(cls.CONFIG_KEY, stored, None)
+
+        with cls._condition:
+            cls._config = config
+            cls._config_loaded_at = time.monotonic()
+            # More slots or a new weight may let queued jobs start right away
+            cls._dispatch(config)
+        return config
+
+    @classmethod
+    def reset_config(cls):
+        """Drop runtime overrides and go back to the settings"""
+        cache.delete(cls.CONFIG_KEY)
+        cls._config = None
+
+    @classmethod
+    def _dispatch(cls, config):
+        """Grant free slots to queued jobs; call with the condition held"""
+        granted = False
+        while sum(cls._in_flight.values()) < config['max_in_flight']:
+            tier = cls._next_tier(config)
+            if tier is None:
+                break
+            ticket = cls._queues[tier].popleft()
+            ticket.granted = granted = True
+            cls._in_flight[tier] = cls._in_flight.get(tier, 0) + 1
+            cls._virtual_time[tier] = cls._virtual_time.get(tier, 0.0) + 1 / config['tiers'][tier]['weight']
+        if granted:
+            cls._condition.notify_all()
+        cls._publish()
+
+    @classmethod
+    def _next_tier(cls, config):
+        eligible = [
+            tier for tier, queue in cls._queues.items()
+            if queue and tier in config['tiers']
+            and cls._in_flight.get(tier, 0) < config['tiers'][tier]['max_in_flight']
+        ]
+        if not eligible:
+            return None
+
+        # Jobs past the aging threshold go first, oldest first
+        aged_before = time.monotonic() - config['aging_seconds']
+        aged = [tier for tier in eligible if cls._queues[tier][0].enqueued_at <= aged_before]
+        if aged:
+            return min(aged, key=lambda tier: cls._queues[tier][0].enqueued_at)
+        return min(eligible, key=lambda tier: (
+            cls._virtual_time.get(tier, 0.0), -config['tiers'][tier]['weight']
+        ))
+
+    @classmethod
+    def _active_tiers(cls):
+        return [
+            tier for tier in set(cls._queues) | set(cls._in_flight)
+            if cls._queues.get(tier) or cls._in_flight.get(tier)
+        ]
+
+    @classmethod
+    def _publish(cls):
+        if not telemetry.enabled():
+            return
+        for tier, queue in cls._queues.items():
+            telemetry.gauge('scheduler.queue_depth', len(queue), tier=tier)
+            telemetry.gauge('scheduler.in_flight', cls._in_flight.get(tier, 0), tier=tier)
+
+    @classmethod
+    def _settings(cls):
+        # MANGA_SCHEDULER only needs to name what it changes
+        return cls._merge(DEFAULT_SCHEDULER_CONFIG, getattr(settings, 'MANGA_SCHEDULER', {}))
+
+    @staticmethod
+    def _merge(base, overrides):
+        merged = copy.deepcopy(base)
+        for key, value in overrides.items():
+            if key == 'tiers':
+                tiers = merged.setdefault('tiers', {})
+                for tier, values in value.items():
+                    tiers[tier] = {**tiers.get(tier, {}), **values}
+            else:
+                merged[key] = value
+        return merged
+
+    @staticmethod
+    def _validate(config):
+        for key, value in config.items():
+            if key == 'tiers':
+                continue
+            if key not in DEFAULT_SCHEDULER_CONFIG:
+                raise ValueError(f"Unknown scheduler setting: {key}")
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                raise ValueError(f"{key} must be a positive number")
+        for tier, values in config['tiers'].items():
+            if tier not in TIERS:
+                raise ValueError(f"Unknown subscription tier: {tier}")
+            for key in ('weight', 'max_in_flight'):
+                value = values.get(key)
+                if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                    raise ValueError(f"{tier} {key} must be a positive number")
+            for key in values:
+                if key not in ('weight', 'max_in_flight'):
+                    raise ValueError(f"Unknown setting for {tier}: {key}")
\ No newline at end of file
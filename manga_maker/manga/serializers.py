@@ -0,0 +1,61 @@
+# manga/serializers.py
+from rest_framework import serializers
+
+from ai_services.postprocessing import ImageVariantService
+
+from .generation_service import MangaGenerationService
+from .models import MangaChapter, MangaProject, Panel
+
+
+class PanelSerializer(serializers.ModelSerializer):
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Panel
+        fields = [
+            'id', 'panel_number', 'description', 'prompt', 'image_url', 'image_variants',
+            'position_x', 'position_y', 'width', 'height',
+            'render_stage', 'preview_ready_at', 'upgraded_at', 'generation_status'
+        ]
+
+    def get_image_variants(self, panel):
+        return ImageVariantService.variant_urls(panel.image_url)
+
+
+class MangaProjectListSerializer(serializers.ModelSerializer):
+    """Project summary for listings; no narrative, panels or render stats"""
+
+    class Meta:
+        model = MangaProject
+        fields = ['id', 'title', 'template', 'created_at', 'chapter', 'page_number', 'generation_status']
+
+
+class MangaProjectSerializer(serializers.ModelSerializer):
+    panels = PanelSerializer(source='panel_set', many=True, read_only=True)
+    rendering = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MangaProject
+        fields = [
+            'id', 'title', 'narrative', 'template', 'created_at',
+            'chapter', 'page_number', 'generation_status', 'panels', 'rendering'
+        ]
+        # Set by generation only: resume() and quota charging rely on
+        # generation_status, and pages are placed in chapters by generate_chapter
+        read_only_fields = ['template', 'chapter', 'page_number', 'generation_status']
+
+    def get_rendering(self, project):
+        # Reuse the prefetched panels rather than aggregating per project
+        return MangaGenerationService.get_render_status(project, project.panel_set.all())
+
+
+class MangaChapterSerializer(serializers.ModelSerializer):
+    pages = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MangaChapter
+        fields = ['id', 'title', 'created_at', 'pages']
+
+    def get_pages(self, chapter):
+        pages = chapter.pages.order_by('page_number').prefetch_related('panel_set')
+        return MangaProjectSerializer(pages, many=True).data
\ No newline at end of file
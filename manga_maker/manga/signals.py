@@ -0,0 +1,64 @@
+# manga/signals.py
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from ai_services.blob_store import BlobStore
+
+from .generation_context import AIModelCache
+from .layout_validator import LayoutValidator
+from .models import AIModel, Panel, Template
+from .template_service import TemplateCatalogue
+
+logger = logging.getLogger(__name__)
+
+# Marks a row loaded without image_url, whose stored image is unknown
+_UNKNOWN = object()
+
+
+@receiver(post_init, sender=Panel)
+def remember_panel_image(sender, instance, **kwargs):
+    # Deferred loads (.only()/.defer()) leave image_url unset
+    instance._stored_image_url = instance.__dict__.get('image_url', _UNKNOWN)
+
+
+@receiver(post_save, sender=Panel)
+def count_panel_image(sender, instance, created, **kwargs):
+    """Keep blob reference counts in step with the image each Panel row shows"""
+    if created:
+        BlobStore.retain(instance.image_url)
+    elif instance._stored_image_url is not _UNKNOWN and 'image_url' in instance.__dict__:
+        BlobStore.swap(instance._stored_image_url, instance.image_url)
+    instance._stored_image_url = instance.__dict__.get('image_url', _UNKNOWN)
+
+
+@receiver(post_delete, sender=Panel)
+def release_panel_image(sender, instance, **kwargs):
+    if instance._stored_image_url is not _UNKNOWN:
+        BlobStore.release(instance._stored_image_url)
+
+
+@receiver(pre_save, sender=Template)
+def validate_template_layout(sender, instance, raw=False, **kwargs):
+    """Refuse layouts with overlapping or out-of-page panels before they reach an export"""
+    if raw:
+        # Fixture loading saves rows as they are
+        return
+    report = LayoutValidator.check_template(instance)
+    for warning in report.warnings:
+        logger.warning("Template %s: %s", instance.slug, warning)
+
+
+@receiver(post_save, sender=Template)
+@receiver(post_delete, sender=Template)
+def refresh_template_catalogue(sender, **kwargs):
+    # Wait for the commit so no process rebuilds from the old rows
+    transaction.on_commit(TemplateCatalogue.invalidate)
+
+
+@receiver(post_save, sender=AIModel)
+@receiver(post_delete, sender=AIModel)
+def refresh_ai_models(sender, **kwargs):
+    transaction.on_commit(AIModelCache.invalidate)
\ No newline at end of file
@@ -1,35 +1,154 @@
 # manga/template_service.py
-class TemplateService:
+import difflib
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ai_services import telemetry
+from ai_services.registry import AIServiceRegistry
+
+from .layout_solver import LayoutSolver
+from .layout_validator import LayoutValidator
+from .models import Template, UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+# Templates each tier may use; tiers in FULL_CATALOGUE_TIERS get every public template
+TIER_TEMPLATE_SLUGS = {
+    'FREE': ('basic-grid', 'simple-vertical'),
+    'BASIC': ('basic-grid', 'simple-vertical', 'action-focused', 'dialogue-heavy'),
+}
+DEFAULT_TEMPLATE_SLUGS = ('basic-grid',)
+FULL_CATALOGUE_TIERS = ('PRO', 'ENTERPRISE')
+CUSTOM_TEMPLATE_TIERS = ('ENTERPRISE',)
+
+CatalogueSnapshot = namedtuple('CatalogueSnapshot', ['version', 'by_slug', 'by_tier', 'by_owner', 'built_at'])
+
+
+class TemplateCatalogue:
+    """
+    In-memory snapshot of the Template table with per-tier access lists
+
+    Each process keeps one snapshot, tagged with a version number held in
+    the shared Django cache. Template saves and deletes bump the version,
+    and the next lookup in every process rebuilds its snapshot with one
+    query. Snapshots are also rebuilt once older than
+    MANGA_TEMPLATE_CATALOGUE_MAX_AGE seconds, which bounds how stale a
+    process can get if the cache loses the version or isn't shared.
+    Snapshot templates are shared between threads and must not be modified.
+    """
+    VERSION_KEY = 'template-catalogue-version'
+    _snapshot = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def current(cls):
+        """Return an up-to-date snapshot, rebuilding it if templates changed"""
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            cache.add(cls.VERSION_KEY, 1, None)
+            version = cache.get(cls.VERSION_KEY, 1)
+
+        max_age = getattr(settings, 'MANGA_TEMPLATE_CATALOGUE_MAX_AGE', 300)
+        snapshot = cls._snapshot
+        if cls._stale(snapshot, version, max_age):
+            with cls._lock:
+                snapshot = cls._snapshot
+                if cls._stale(snapshot, version, max_age):
+                    snapshot = cls._snapshot = cls._build(version)
+        return snapshot
+
+    @classmethod
+    def invalidate(cls):
+        """Mark every process's snapshot stale, through the shared cache"""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            # Key expired or was never set; any new value forces a rebuild
+            cache.set(cls.VERSION_KEY, int(time.time() * 1000), None)
+
+    @staticmethod
+    def _stale(snapshot, version, max_age):
+        return (
+            snapshot is None
+            or snapshot.version != version
+            or time.monotonic() - snapshot.built_at > max_age
+        )
+
     @staticmethod
-    def get_available_templates(user):
-        """Get templates available for user based on subscription tier"""
-        user_profile = UserProfile.objects.get(user=user)
-        
-        # Define template access by tier
-        tier_template_access = {
-            'FREE': ['basic-grid', 'simple-vertical'],
-            'BASIC': ['basic-grid', 'simple-vertical', 'action-focused', 'dialogue-heavy'],
-            'PRO': Template.objects.values_list('slug', flat=True),
-            'ENTERPRISE': Template.objects.values_list('slug', flat=True)
+    def _build(version):
+        telemetry.increment('template_catalogue.rebuilds')
+        templates = list(Template.objects.order_by('id'))
+        by_slug = {template.slug: template for template in templates}
+        public = tuple(template for template in templates if template.is_public)
+
+        by_tier = {
+            tier: tuple(by_slug[slug] for slug in slugs if slug in by_slug)
+            for tier, slugs in TIER_TEMPLATE_SLUGS.items()
         }
+        for tier in FULL_CATALOGUE_TIERS:
+            by_tier[tier] = public
+
+        # Custom templates, overlaid on the tier list for the users who own them
+        by_owner = {}
+        for template in templates:
+            if template.created_by_id is not None:
+                by_owner.setdefault(template.created_by_id, []).append(template)
+
+        return CatalogueSnapshot(
+            version=version,
+            by_slug=by_slug,
+            by_tier=by_tier,
+            by_owner={owner: tuple(owned) for owner, owned in by_owner.items()},
+            built_at=time.monotonic()
+        )
+
+
+class TemplateService:
+    @staticmethod
+    def get_available_templates(user, user_profile=None):
+        """
+        Get templates available for user based on subscription tier
         
-        template_slugs = tier_template_access.get(user_profile.subscription_tier, ['basic-grid'])
-        
-        if user_profile.subscription_tier == 'ENTERPRISE':
+        Args:
+            user (User): User to list templates for
+            user_profile (UserProfile, optional): Their profile, if already loaded
+            
+        Returns:
+            list: Template instances from the shared catalogue snapshot
+        """
+        if user_profile is None:
+            user_profile = UserProfile.objects.get(user=user)
+        tier = user_profile.subscription_tier
+        catalogue = TemplateCatalogue.current()
+        
+        if tier in catalogue.by_tier:
+            templates = catalogue.by_tier[tier]
+        else:
+            templates = tuple(
+                catalogue.by_slug[slug] for slug in DEFAULT_TEMPLATE_SLUGS if slug in catalogue.by_slug
+            )
+        
+        if tier in CUSTOM_TEMPLATE_TIERS:
             # Include custom templates for enterprise users
-            custom_template_slugs = Template.objects.filter(
-                created_by=user
-            ).values_list('slug', flat=True)
-            template_slugs = list(template_slugs) + list(custom_template_slugs)
-        
-        return Template.objects.filter(slug__in=template_slugs)
+            custom = [t for t in catalogue.by_owner.get(user.id, ()) if not t.is_public]
+            if custom:
+                return list(templates) + custom
+        return list(templates)
     
     @staticmethod
     def suggest_template(narrative, panel_count):
         """Use LLM to suggest the best template based on narrative content"""
         llm_service = AIServiceRegistry.get('llm', 'openai')
         
-        templates = Template.objects.all()
+        catalogue = TemplateCatalogue.current()
+        templates = list(catalogue.by_slug.values())
         template_descriptions = [
             f"{t.name}: {t.description}" for t in templates
         ]
@@ -43,30 +162,32 @@ class TemplateService:
             "Return only the template name that would best fit this narrative."
         )
         
-        suggested_template_name = llm_service.execute(prompt)
+        suggested_template_name = llm_service.execute(prompt).strip().lower()
         
         # Find the closest matching template
-        try:
-            return Template.objects.get(name__iexact=suggested_template_name.strip())
-        except Template.DoesNotExist:
-            # Fallback to closest match
-            templates = Template.objects.all()
-            closest_match = None
-            highest_ratio = 0
-            
-            for template in templates:
-                ratio = difflib.SequenceMatcher(None, template.name.lower(), 
-                                               suggested_template_name.lower()).ratio()
-                if ratio > highest_ratio:
-                    highest_ratio = ratio
-                    closest_match = template
-            
-            # If we found a reasonable match (>60% similarity)
-            if highest_ratio > 0.6:
-                return closest_match
-            
-            # Ultimate fallback - basic grid template
-            return Template.objects.get(slug='basic-grid')
+        for template in templates:
+            if template.name.lower() == suggested_template_name:
+                return template
+        
+        # Fallback to closest match
+        closest_match = None
+        highest_ratio = 0
+        
+        for template in templates:
+            ratio = difflib.SequenceMatcher(None, template.name.lower(), 
+                                           suggested_template_name).ratio()
+            if ratio > highest_ratio:
+                highest_ratio = ratio
+                closest_match = template
+        
+        # If we found a reasonable match (>60% similarity)
+        if highest_ratio > 0.6:
+            return closest_match
+        
+        # Ultimate fallback - basic grid template
+        if 'basic-grid' in catalogue.by_slug:
+            return catalogue.by_slug['basic-grid']
+        return Template.objects.get(slug='basic-grid')
     
     @staticmethod
     def apply_template(panels, template):
@@ -75,8 +196,10 @@ class TemplateService:
         
         # Ensure we have the right number of panel positions
         if len(panels) != len(layout_data['positions']):
-            # Adapt layout for different panel counts
-            layout_data = TemplateService._adapt_layout(layout_data, len(panels))
+            # Adapt layout for different panel counts, sized by each panel's importance
+            layout_data = TemplateService._adapt_layout(
+                layout_data, len(panels), weights=[panel.importance for panel in panels], template=template
+            )
         
         # Apply layout positions to panels
         for i, panel in enumerate(panels):
@@ -90,54 +213,36 @@ class TemplateService:
         return panels
     
     @staticmethod
-    def _adapt_layout(layout_data, panel_count):
-        """Adapt a layout to fit a different number of panels"""
-        original_count = len(layout_data['positions'])
-        
-        if panel_count == original_count:
-            return layout_data
-        
-        # For fewer panels, use subset of positions
-        if panel_count < original_count:
-            layout_data['positions'] = layout_data['positions'][:panel_count]
+    def _adapt_layout(layout_data, panel_count, weights=None, template=None):
+        """
+        Adapt a layout to fit a different number of panels
+        
+        The template's own positions are kept when the count matches;
+        otherwise LayoutSolver lays out the page, reusing a stored solution
+        for the same layout, count and weights when there is one. The result
+        is checked by LayoutValidator.
+        
+        Args:
+            layout_data (dict): Parsed template layout
+            panel_count (int): Number of panels to place
+            weights (list, optional): Importance of each panel, in reading order
+            template (Template, optional): The template the layout came from
+            
+        Returns:
+            dict: The layout with panel_count positions, in reading order
+        """
+        if panel_count == len(layout_data['positions']):
             return layout_data
         
-        # For more panels, use an algorithm to split existing panels
-        # This is a simplified approach; a more complex algorithm would be used in production
-        new_positions = layout_data['positions'].copy()
-        
-        # Continue splitting the largest panel until we have enough
-        while len(new_positions) < panel_count:
-            # Find largest panel by area
-            largest_panel_idx = 0
-            largest_area = 0
-            
-            for i, pos in enumerate(new_positions):
-                area = pos['width'] * pos['height']
-                if area > largest_area:
-                    largest_area = area
-                    largest_panel_idx = i
-            
-            # Split the panel (horizontally if wider, vertically if taller)
-            panel = new_positions[largest_panel_idx]
-            if panel['width'] >= panel['height']:
-                # Split horizontally
-                new_positions[largest_panel_idx]['width'] = panel['width'] / 2
-                new_positions.append({
-                    'x': panel['x'] + panel['width'],
-                    'y': panel['y'],
-                    'width': panel['width'],
-                    'height': panel['height']
-                })
-            else:
-                # Split vertically
-                new_positions[largest_panel_idx]['height'] = panel['height'] / 2
-                new_positions.append({
-                    'x': panel['x'],
-                    'y': panel['y'] + panel['height'],
-                    'width': panel['width'],
-                    'height': panel['height']
-                })
-        
-        layout_data['positions'] = new_positions
-        return layout_data
\ No newline at end of file
+        adapted = {
+            **layout_data,
+            'positions': LayoutSolver.cached(template, layout_data, panel_count, weights)
+        }
+        report = LayoutValidator.validate(adapted)
+        if report.errors:
+            # Only a template setting such as an oversized gutter can cause this; use plain defaults
+            logger.error("Adapted layout of %s for %d panels is invalid: %s",
+                         template, panel_count, '; '.join(report.errors))
+            telemetry.increment('layout_validator.invalid_adaptations')
+            adapted = {**layout_data, 'positions': LayoutSolver.solve({'positions': []}, panel_count, weights)}
+        return adapted
\ No newline at end of file
@@ -1,3 +1,598 @@
-from django.test import TestCase
+# manga/tests.py
+import datetime
+import io
+import json
+import shutil
+import tempfile
+from collections import deque
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.exceptions import PermissionDenied
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ai_services.image import ImageGenerationService
+from ai_services.llm import LLMService
+from ai_services.registry import AIServiceRegistry
+
+from .chapter_service import ChapterGenerationService, ChapterIncomplete
+from .export_service import ExportService
+from .generation_context import TIER_PROVIDERS
+from .generation_service import GenerationIncomplete, GenerationInProgress, MangaGenerationService
+from .layout_solver import LayoutSolver
+from .model_router import ModelRouter
+from .models import MangaChapter, MangaProject, Panel, SolvedLayout, Template, UserProfile
+from .prefetch import SpeculativePrefetcher
+from .scheduler import GenerationScheduler, SchedulerBusy, _Ticket
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def png_bytes(color='red', size=(64, 64)):
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new('RGB', size, color).save(output, format='PNG')
+    return output.getvalue()
+
+
+class MediaTestCase(TestCase):
+    """Runs each test against an empty MEDIA_ROOT"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='manga-test-media-')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, MEDIA_URL='/media/')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+@override_settings(MANGA_EXPORT_PAGE_SIZE=(200, 300), MANGA_EXPORT_WORKERS=1)
+class ExportServiceTests(MediaTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        if ExportService._executor is not None:
+            ExportService._executor.shutdown()
+            ExportService._executor = None
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username='reader')
+        self.project = MangaProject.objects.create(user=self.user, title='Page', narrative='Akira runs.')
+        path = default_storage.save('manga_panels/red.png', ContentFile(png_bytes()))
+        for number, (x, y) in enumerate([(0, 0), (0.5, 0), (0, 0.5), (0.5, 0.5)], start=1):
+            Panel.objects.create(
+                project=self.project, panel_number=number, description='', prompt='',
+                image_url=default_storage.url(path), position_x=x, position_y=y, width=0.5, height=0.5
+            )
+
+    def _stored(self, url):
+        name = url[len(default_storage.base_url):]
+        with default_storage.open(name, 'rb') as exported:
+            return exported.read()
+
+    def test_pdf_export_renders_through_the_process_pool(self):
+        result = ExportService().export_project(self.project, 'pdf')
+
+        data = self._stored(result['url'])
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertIn(b'/Count 1', data)
+        self.assertTrue(data.rstrip().endswith(b'%%EOF'))
+
+    def test_png_export_is_reused_for_the_same_content(self):
+        first = ExportService().export_project(self.project, 'png')
+        second = ExportService().export_project(self.project, 'png')
+
+        self.assertEqual(first['url'], second['url'])
+        self.assertTrue(self._stored(first['url']).startswith(b'\x89PNG'))
+        self.assertGreaterEqual(second['expires_at'], first['expires_at'])
+
+    def test_sweep_deletes_expired_exports(self):
+        ExportService().export_project(self.project, 'png')
+
+        self.assertEqual(ExportService.sweep(max_age=3600)[0], 0)
+        self.assertEqual(ExportService.sweep(max_age=-1)[0], 1)
+
+    def test_chapter_export_is_limited_to_the_owners_pages(self):
+        other = User.objects.create(username='other')
+        chapter = MangaChapter.objects.create(user=other, title='Theirs', narrative='')
+        MangaProject.objects.create(user=other, title='Their page', narrative='', chapter=chapter, page_number=1)
+        self.project.chapter = chapter
+        self.project.save()
+
+        with self.assertRaises(PermissionDenied):
+            ExportService().export_project(self.project, 'pdf', scope='chapter')
+
+
+class ProjectApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='owner')
+        self.other = User.objects.create(username='other')
+        self.project = MangaProject.objects.create(user=self.user, title='Page', narrative='Akira runs.')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_cannot_be_moved_into_a_chapter(self):
+        chapter = MangaChapter.objects.create(user=self.other, title='Theirs', narrative='')
+
+        response = self.client.patch(
+            f'/api/projects/{self.project.id}/', {'chapter': str(chapter.id), 'page_number': 1}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.project.refresh_from_db()
+        self.assertIsNone(self.project.chapter_id)
+        self.assertIsNone(self.project.page_number)
+
+    def test_generation_status_and_template_are_read_only(self):
+        response = self.client.patch(
+            f'/api/projects/{self.project.id}/', {'generation_status': 'failed', 'template': 1}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.generation_status, 'complete')
+        self.assertIsNone(self.project.template_id)
+
+
+@override_settings(MANGA_PREFETCH_ENABLED=True, MANGA_PREFETCH_DAILY_BUDGET={'PRO': 5},
+                   MANGA_PREFETCH_MAX_CONCURRENCY=1, CACHES=LOCMEM_CACHES)
+class SpeculativePrefetcherTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username='pro')
+        self.profile = UserProfile.objects.create(user=user, subscription_tier='PRO')
+        self.project = MangaProject.objects.create(
+            user=user, title='Page', narrative='Akira runs.', generation_params={'panel_count': 4}
+        )
+        self.service = mock.Mock(user_profile=self.profile)
+        self.service.get_context.return_value.llm_provider = 'openai'
+        for patcher in (mock.patch.object(SpeculativePrefetcher, '_is_idle', return_value=True),
+                        mock.patch('manga.prefetch.CharacterConsistencyService')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, SpeculativePrefetcher, '_running', 0)
+
+    def budget_used(self):
+        self.profile.refresh_from_db()
+        return self.profile.prefetch_budget_used
+
+    def test_concurrency_skip_does_not_spend_the_budget(self):
+        SpeculativePrefetcher._running = 1
+
+        self.assertEqual(SpeculativePrefetcher.after_page(self.service, self.project, 'Akira jumps.'), 0)
+        self.assertEqual(self.budget_used(), 0)
+
+    def test_failed_submit_releases_its_slot(self):
+        with mock.patch('manga.prefetch.RenderPipeline.submit', side_effect=RuntimeError('shut down')):
+            with self.assertRaises(RuntimeError):
+                SpeculativePrefetcher.after_page(self.service, self.project)
+
+        self.assertEqual(SpeculativePrefetcher._running, 0)
+
+    def test_budget_is_shared_and_capped(self):
+        self.assertEqual([SpeculativePrefetcher._charge(self.profile.user_id, 'PRO') for _ in range(6)],
+                         [True] * 5 + [False])
+        self.assertEqual(self.budget_used(), 5)
+
+
+class ModelRouterTests(TestCase):
+    def setUp(self):
+        self.addCleanup(ModelRouter._stats.clear)
+
+    def stats(self):
+        return ModelRouter._stats.get(('llm', 'fake'))
+
+    def test_stream_time_excludes_the_consumer(self):
+        with mock.patch('manga.model_router.time.perf_counter', side_effect=[0.0, 1.0, 1.0, 2.0, 50.0, 51.0]):
+            for _ in ModelRouter.track_stream('llm', 'fake', ['panel 1', 'panel 2']):
+                pass
+
+        self.assertEqual(self.stats().latency, 3.0)
+        self.assertEqual(self.stats().error_rate, 0.0)
+
+    def test_consumer_errors_are_not_provider_failures(self):
+        with self.assertRaises(ValueError):
+            for _ in ModelRouter.track_stream('llm', 'fake', ['panel 1']):
+                raise ValueError('database down')
+
+        self.assertIsNone(self.stats())
+
+    def test_provider_errors_are_recorded(self):
+        def stream():
+            yield 'panel 1'
+            raise RuntimeError('rate limited')
+
+        with self.assertRaises(RuntimeError):
+            list(ModelRouter.track_stream('llm', 'fake', stream()))
+
+        self.assertEqual(self.stats().calls, 1)
+        self.assertGreater(self.stats().error_rate, 0.0)
+
+
+class FakeLLM(LLMService):
+    """Describes every panel from the narrative itself"""
+
+    def __init__(self):
+        self.plans = 0
+        self.failing = set()
+
+    def configure(self, **kwargs):
+        pass
+
+    def parse_narrative(self, text, panel_count=4, context=None):
+        self.plans += 1
+        if text in self.failing:
+            raise RuntimeError('provider error')
+        return [
+            {'description': f'{text} {number}', 'image_prompt': f'{text} panel {number}'}
+            for number in range(1, panel_count + 1)
+        ]
+
+    def execute(self, input_data):
+        return json.dumps([{'name': 'Akira', 'visual_traits': 'red hair'}])
+
+
+class FakeImageService(ImageGenerationService):
+    """Fails any prompt containing one of the failing texts"""
+
+    def __init__(self):
+        self.prompts = []
+        self.failing = set()
+
+    def configure(self, **kwargs):
+        pass
+
+    def generate_image(self, prompt, parameters=None):
+        self.prompts.append(prompt)
+        if any(text in prompt for text in self.failing):
+            raise RuntimeError('provider error')
+        return f'https://images.test/{len(self.prompts)}.png'
+
+
+@override_settings(MANGA_PREFETCH_ENABLED=False, CACHES=LOCMEM_CACHES)
+class GenerationTestCase(TestCase):
+    """Generates against fake providers registered under every tier's names"""
+
+    def setUp(self):
+        self.llm = FakeLLM()
+        self.images = FakeImageService()
+        for name in ('_instances', '_capabilities'):
+            patcher = mock.patch.object(AIServiceRegistry, name, {})
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for llm_provider, image_provider in TIER_PROVIDERS.values():
+            AIServiceRegistry.register('llm', llm_provider, self.llm)
+            AIServiceRegistry.register('image', image_provider, self.images)
+        self.addCleanup(ModelRouter._stats.clear)
+
+        self.user = User.objects.create(username='writer')
+        UserProfile.objects.create(user=self.user, pages_quota=10)
+        self.template = Template.objects.create(
+            name='Basic Grid', slug='basic-grid', description='Four equal panels',
+            layout_json=json.dumps({'positions': [
+                {'x': x, 'y': y, 'width': 0.5, 'height': 0.5} for y in (0, 0.5) for x in (0, 0.5)
+            ]})
+        )
+
+    def pages_created(self):
+        return UserProfile.objects.get(user=self.user).pages_created
+
+    def generate(self, narrative='Akira runs.', **kwargs):
+        return MangaGenerationService(self.user).generate_manga(
+            narrative, 4, template_id=self.template.id, progressive=False, **kwargs
+        )
+
+
+class MangaGenerationServiceTests(GenerationTestCase):
+    def test_resume_renders_only_the_failed_panels(self):
+        self.images.failing.add('panel 3')
+        with self.assertRaises(GenerationIncomplete) as raised:
+            self.generate()
+        project = raised.exception.project
+        self.assertEqual(raised.exception.failed_panels, [3])
+        self.assertEqual(MangaProject.objects.get(pk=project.pk).generation_status, 'failed')
+        self.assertEqual(self.pages_created(), 0)
+
+        self.images.failing.clear()
+        self.images.prompts.clear()
+        project = MangaGenerationService(self.user).resume(MangaProject.objects.get(pk=project.pk))
+
+        self.assertEqual(project.generation_status, 'complete')
+        self.assertEqual(self.llm.plans, 1)
+        self.assertEqual(len(self.images.prompts), 1)
+        self.assertIn('panel 3', self.images.prompts[0])
+        self.assertEqual(set(project.panel_set.values_list('generation_status', flat=True)), {'done'})
+        self.assertEqual(self.pages_created(), 1)
+
+    def test_repeated_idempotency_key_returns_the_same_project(self):
+        first = self.generate(idempotency_key='request-1')
+        second = self.generate(idempotency_key='request-1')
+        third = self.generate(idempotency_key='request-2')
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertNotEqual(first.pk, third.pk)
+        self.assertEqual(self.llm.plans, 2)
+        self.assertEqual(self.pages_created(), 2)
+
+    def test_repeated_idempotency_key_resumes_a_failed_project(self):
+        self.images.failing.add('panel 1')
+        with self.assertRaises(GenerationIncomplete):
+            self.generate(idempotency_key='request-1')
+        self.images.failing.clear()
+
+        project = self.generate(idempotency_key='request-1')
+
+        self.assertEqual(project.generation_status, 'complete')
+        self.assertEqual(MangaProject.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.pages_created(), 1)
+
+    def test_resume_replans_a_page_whose_breakdown_failed(self):
+        self.llm.failing.add('Akira runs.')
+        with self.assertRaises(RuntimeError):
+            self.generate()
+        project = MangaProject.objects.get(user=self.user)
+        self.assertEqual(project.generation_status, 'failed')
+        self.assertFalse(project.generation_params['planned'])
+
+        self.llm.failing.clear()
+        project = MangaGenerationService(self.user).resume(project)
+
+        self.assertEqual(project.generation_status, 'complete')
+        self.assertEqual(project.panel_set.count(), 4)
+
+    def test_resume_leaves_a_fresh_claim_alone(self):
+        project = MangaProject.objects.create(
+            user=self.user, title='Page', narrative='Akira runs.', generation_status='generating',
+            generation_started_at=timezone.now(), generation_params={'panel_count': 4, 'planned': False}
+        )
+
+        with self.assertRaises(GenerationInProgress):
+            MangaGenerationService(self.user).resume(project)
+        self.assertEqual(self.llm.plans, 0)
+
+
+class ChapterGenerationServiceTests(GenerationTestCase):
+    narrative = 'Akira runs.\n\nMei falls.\n\nAkira catches her.'
+
+    def generate_chapter(self):
+        return ChapterGenerationService(self.user).generate_chapter(
+            self.narrative, page_count=3, template_id=self.template.id, progressive=False
+        )
+
+    def test_chapter_pages_share_the_roster_and_layout(self):
+        chapter = self.generate_chapter()
+
+        pages = list(chapter.pages.order_by('page_number'))
+        self.assertEqual([page.narrative for page in pages], ['Akira runs.', 'Mei falls.', 'Akira catches her.'])
+        self.assertEqual({page.generation_status for page in pages}, {'complete'})
+        self.assertEqual({page.template_id for page in pages}, {self.template.id})
+        for page in pages:
+            self.assertEqual(list(page.characterprofile_set.values_list('name', flat=True)), ['Akira'])
+            self.assertEqual(page.panel_set.filter(generation_status='done').count(), 4)
+        self.assertEqual(self.pages_created(), 3)
+
+    def test_failed_pages_are_kept_for_resume(self):
+        self.images.failing.add('Mei falls. panel 2')
+        self.llm.failing.add('Akira catches her.')
+
+        with self.assertRaises(ChapterIncomplete) as raised:
+            self.generate_chapter()
+
+        failed = {page.page_number: panels for page, panels in raised.exception.failed_pages.items()}
+        self.assertEqual(failed, {2: [2], 3: []})
+        pages = {page.page_number: page for page in raised.exception.chapter.pages.all()}
+        self.assertEqual(pages[1].generation_status, 'complete')
+        self.assertEqual(pages[2].generation_status, 'failed')
+        self.assertEqual(self.pages_created(), 1)
+
+        self.images.failing.clear()
+        self.llm.failing.clear()
+        for number in (2, 3):
+            page = MangaGenerationService(self.user).resume(pages[number])
+            self.assertEqual(page.generation_status, 'complete')
+            self.assertEqual(page.panel_set.filter(generation_status='done').count(), 4)
+        self.assertEqual(self.pages_created(), 3)
+
+    def test_split_into_pages_keeps_paragraphs_whole(self):
+        narrative = '\n\n'.join(['a' * 100, 'b' * 10, 'c' * 10, 'd' * 100])
+
+        self.assertEqual(
+            ChapterGenerationService.split_into_pages(narrative, 2),
+            ['a' * 100 + '\n\n' + 'b' * 10, 'c' * 10 + '\n\n' + 'd' * 100]
+        )
+        self.assertEqual(len(ChapterGenerationService.split_into_pages(narrative, 10)), 4)
+        with self.assertRaises(ValueError):
+            ChapterGenerationService.split_into_pages('\n\n')
+
+
+@override_settings(MANGA_EXPORT_PAGE_SIZE=(1000, 1000), MANGA_LAYOUT_GUTTER=0.0)
+class LayoutSolverTests(TestCase):
+    layout = {'positions': [{'x': 0, 'y': 0, 'width': 50, 'height': 50}]}
+
+    def setUp(self):
+        self.addCleanup(LayoutSolver.clear_memo)
+
+    def area(self, position):
+        return position['width'] * position['height']
+
+    def test_area_follows_importance(self):
+        weights = [1.0, 2.0, 1.0, 4.0, 2.0]
+
+        positions = LayoutSolver.solve(self.layout, 5, weights)
+
+        page = 50 * 50
+        for position, weight in zip(positions, weights):
+            self.assertAlmostEqual(self.area(position) / page, weight / sum(weights), places=4)
+
+    def test_panels_fill_the_page_in_reading_order(self):
+        positions = LayoutSolver.solve(self.layout, 5)
+
+        self.assertAlmostEqual(sum(self.area(p) for p in positions), 50 * 50, places=2)
+        order = [(p['y'], p['x']) for p in positions]
+        self.assertEqual(order, sorted(order))
+        for position in positions:
+            self.assertLessEqual(position['x'] + position['width'], 50 + 1e-6)
+            self.assertLessEqual(position['y'] + position['height'], 50 + 1e-6)
+
+    def test_right_to_left_mirrors_each_row(self):
+        ltr = LayoutSolver.solve(self.layout, 5)
+        rtl = LayoutSolver.solve({**self.layout, 'direction': 'rtl'}, 5)
+
+        for left, right in zip(ltr, rtl):
+            self.assertAlmostEqual(right['x'], 50 - left['x'] - left['width'], places=4)
+            self.assertEqual((right['y'], right['width']), (left['y'], left['width']))
+
+    def test_gutters_separate_panels(self):
+        with self.settings(MANGA_LAYOUT_GUTTER=0.05):
+            positions = LayoutSolver.solve(self.layout, 2)
+
+        first, second = sorted(positions, key=lambda p: (p['y'], p['x']))
+        gap = (second['y'] - first['y'] - first['height'], second['x'] - first['x'] - first['width'])
+        self.assertAlmostEqual(max(gap), 2.5, places=4)
+
+    def test_bad_counts(self):
+        self.assertEqual(LayoutSolver.solve(self.layout, 0), [])
+        with self.assertRaises(ValueError):
+            LayoutSolver.solve(self.layout, 3, [1.0, 2.0])
+
+    def test_cached_solutions_are_stored_and_reused(self):
+        first = LayoutSolver.cached(None, self.layout, 3, [1, 2, 1])
+        LayoutSolver.clear_memo()
+
+        with mock.patch.object(LayoutSolver, 'solve') as solve:
+            second = LayoutSolver.cached(None, self.layout, 3, [2, 4, 2])
+
+        solve.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(SolvedLayout.objects.count(), 1)
+
+
+SCHEDULER_CONFIG = {
+    'max_in_flight': 1,
+    'aging_seconds': 30,
+    'tiers': {'FREE': {'weight': 1, 'max_in_flight': 1}, 'PRO': {'weight': 4, 'max_in_flight': 1}}
+}
+
+
+@override_settings(MANGA_SCHEDULER=SCHEDULER_CONFIG, CACHES=LOCMEM_CACHES)
+class GenerationSchedulerTests(TestCase):
+    def setUp(self):
+        for name in ('_queues', '_in_flight', '_virtual_time'):
+            patcher = mock.patch.object(GenerationScheduler, name, {})
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        GenerationScheduler._config = None
+        self.addCleanup(setattr, GenerationScheduler, '_config', None)
+
+    def queue(self, tier, count, waited=0):
+        tickets = [_Ticket(tier) for _ in range(count)]
+        for ticket in tickets:
+            ticket.enqueued_at -= waited
+        GenerationScheduler._queues.setdefault(tier, deque()).extend(tickets)
+
+    def grant_order(self, count):
+        """Serve count jobs one at a time, finishing each before the next starts"""
+        order = []
+        with GenerationScheduler._condition:
+            for _ in range(count):
+                GenerationScheduler._dispatch(GenerationScheduler.get_config())
+                tier = next(tier for tier, running in GenerationScheduler._in_flight.items() if running)
+                GenerationScheduler._in_flight[tier] -= 1
+                order.append(tier)
+        return order
+
+    def test_slots_are_shared_by_weight(self):
+        self.queue('FREE', 10)
+        self.queue('PRO', 10)
+
+        order = self.grant_order(10)
+
+        self.assertEqual(order.count('PRO'), 8)
+        self.assertEqual(order.count('FREE'), 2)
+
+    def test_aged_jobs_jump_the_line(self):
+        self.queue('PRO', 5)
+        self.queue('FREE', 1, waited=60)
+        GenerationScheduler._virtual_time['FREE'] = 10.0
+
+        self.assertEqual(self.grant_order(2), ['FREE', 'PRO'])
+
+    def test_returning_tier_starts_level_with_the_busy_ones(self):
+        with self.settings(MANGA_SCHEDULER={**SCHEDULER_CONFIG, 'max_in_flight': 2}):
+            GenerationScheduler._config = None
+            GenerationScheduler._in_flight['PRO'] = 1
+            GenerationScheduler._virtual_time['PRO'] = 5.0
+
+            self.assertEqual(GenerationScheduler.acquire('FREE', timeout=1), 'FREE')
+
+        self.assertEqual(GenerationScheduler._virtual_time['FREE'], 6.0)
+
+    def test_unknown_tiers_queue_as_free_and_time_out(self):
+        GenerationScheduler._in_flight['FREE'] = 1
+
+        with self.assertRaises(SchedulerBusy):
+            GenerationScheduler.acquire('GOLD', timeout=0.01)
+        self.assertEqual(len(GenerationScheduler._queues['FREE']), 0)
+
+    def test_configure_rejects_bad_values(self):
+        with self.assertRaises(ValueError):
+            GenerationScheduler.configure({'tiers': {'PRO': {'weight': 0}}})
+        with self.assertRaises(ValueError):
+            GenerationScheduler.configure({'max_inflight': 3})
+
+
+@override_settings(MANGA_QUOTA_PERIOD_DAYS=30, MANGA_TIER_PAGE_QUOTAS={'FREE': 7, 'PRO': 120})
+class ResetQuotasCommandTests(TestCase):
+    today = datetime.date(2026, 3, 10)
+
+    def profile(self, reset_date, tier='FREE', pages_quota=5):
+        user = User.objects.create(username=f'user{User.objects.count()}')
+        return UserProfile.objects.create(
+            user=user, subscription_tier=tier, pages_created=3, pages_quota=pages_quota,
+            quota_reset_date=reset_date
+        )
+
+    def reset(self, *profiles, **options):
+        call_command('reset_quotas', date=self.today, stdout=io.StringIO(), **options)
+        return [UserProfile.objects.get(pk=profile.pk) for profile in profiles]
+
+    def test_overdue_dates_keep_their_reset_day(self):
+        due_today, late, periods_late = self.reset(
+            self.profile(self.today), self.profile(datetime.date(2026, 3, 1)), self.profile(datetime.date(2026, 1, 5))
+        )
+
+        self.assertEqual(due_today.quota_reset_date, datetime.date(2026, 4, 9))
+        self.assertEqual(late.quota_reset_date, datetime.date(2026, 3, 31))
+        self.assertEqual(periods_late.quota_reset_date, datetime.date(2026, 4, 5))
+        self.assertEqual({p.pages_created for p in (due_today, late, periods_late)}, {0})
+
+    def test_long_lapsed_dates_restart_from_the_run_date(self):
+        lapsed, = self.reset(self.profile(datetime.date(2024, 1, 1)))
+
+        self.assertEqual(lapsed.quota_reset_date, datetime.date(2026, 4, 9))
+
+    def test_profiles_not_due_are_untouched(self):
+        not_due, = self.reset(self.profile(datetime.date(2026, 3, 11)))
+
+        self.assertEqual((not_due.pages_created, not_due.quota_reset_date), (3, datetime.date(2026, 3, 11)))
+
+    def test_quota_comes_from_the_configured_tiers(self):
+        free, pro, basic = self.reset(
+            self.profile(self.today), self.profile(self.today, 'PRO'), self.profile(self.today, 'BASIC', 30)
+        )
+
+        self.assertEqual((free.pages_quota, pro.pages_quota, basic.pages_quota), (7, 120, 30))
+
+    def test_id_range_and_chunks(self):
+        profiles = [self.profile(self.today) for _ in range(5)]
+
+        updated = self.reset(*profiles, start_id=profiles[1].pk, end_id=profiles[3].pk, chunk_size=2)
+
+        self.assertEqual([p.pages_created for p in updated], [3, 0, 0, 0, 3])
\ No newline at end of file
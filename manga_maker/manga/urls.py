@@ -0,0 +1,15 @@
+# manga/urls.py
+from django.urls import path
+from rest_framework.routers import DefaultRouter
+
+from .api import MangaProjectViewSet, liveness, readiness, routing_table, scheduler
+
+router = DefaultRouter()
+router.register(r'projects', MangaProjectViewSet, basename='manga-project')
+
+urlpatterns = [
+    path('routing/', routing_table, name='routing-table'),
+    path('scheduler/', scheduler, name='scheduler'),
+    path('live/', liveness, name='liveness'),
+    path('ready/', readiness, name='readiness'),
+] + router.urls
\ No newline at end of file
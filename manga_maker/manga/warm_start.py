@@ -0,0 +1,159 @@
+# manga/warm_start.py
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from ai_services import telemetry
+from ai_services.registry import AIServiceRegistry
+from ai_services.sessions import ProviderSessions
+
+from .generation_context import AIModelCache
+from .layout_solver import LayoutSolver
+from .template_service import TemplateCatalogue
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerBootstrap:
+    """
+    Get a new worker process ready before it takes generation traffic
+
+    Called from wsgi.py and asgi.py. In a background thread it configures
+    the providers in MANGA_AI_PROVIDERS, opens keep-alive connections to
+    every registered provider and loads the template catalogue, AI models,
+    solved layouts and Stripe prices. ready() only turns true once that
+    has finished, so a readiness probe on /api/ready/ holds traffic off
+    the worker until then. A step that fails is logged and reported but
+    doesn't keep the worker out of service. If the process forks after
+    starting (gunicorn --preload), the child starts over with fresh
+    connections.
+    """
+    STEPS = ('providers', 'connections', 'catalogue', 'layouts', 'prices')
+
+    _state = 'cold'
+    _started_at = None
+    _ready_at = None
+    _steps = {}
+    _pid = None
+    _lock = threading.Lock()
+    _fork_hook = False
+
+    @classmethod
+    def start(cls, background=True):
+        """
+        Warm this process, once
+
+        Args:
+            background (bool): Run in a daemon thread and return at once
+
+        Returns:
+            bool: False if warm start is disabled or already under way
+        """
+        if not getattr(settings, 'MANGA_WARM_START', True):
+            return False
+        with cls._lock:
+            if cls._pid == os.getpid() and cls._state != 'cold':
+                return False
+            cls._state = 'warming'
+            cls._started_at = time.time()
+            cls._ready_at = None
+            cls._steps = {}
+            cls._pid = os.getpid()
+            if not cls._fork_hook and hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=cls._after_fork)
+                cls._fork_hook = True
+        telemetry.gauge('warm_start.ready', 0)
+
+        if background:
+            threading.Thread(target=cls.run, name='warm-start', daemon=True).start()
+        else:
+            cls.run()
+        return True
+
+    @classmethod
+    def run(cls):
+        """Run every warm-up step in order, then mark the process ready"""
+        for step in cls.STEPS:
+            started = time.perf_counter()
+            try:
+                with telemetry.span('warm_start.step', step=step):
+                    result = getattr(cls, f'_warm_{step}')()
+                cls._steps[step] = {'ok': True, 'result': result}
+            except Exception as e:
+                logger.exception("Warm start step %s failed", step)
+                cls._steps[step] = {'ok': False, 'error': str(e)}
+            cls._steps[step]['seconds'] = round(time.perf_counter() - started, 3)
+
+        with cls._lock:
+            if cls._pid == os.getpid():
+                cls._state = 'ready'
+                cls._ready_at = time.time()
+        telemetry.gauge('warm_start.ready', 1)
+        telemetry.gauge('warm_start.seconds', cls._ready_at - cls._started_at)
+        logger.info("Worker %s warm in %.2fs", os.getpid(), cls._ready_at - cls._started_at)
+
+    @classmethod
+    def ready(cls):
+        """Whether this process has finished warming, or warm start is disabled"""
+        if not getattr(settings, 'MANGA_WARM_START', True):
+            return True
+        return cls._state == 'ready' and cls._pid == os.getpid()
+
+    @classmethod
+    def status(cls):
+        """
+        Readiness and what each step did
+
+        Returns:
+            dict: state, pid, seconds taken (or so far) and per-step results
+        """
+        end = cls._ready_at or time.time()
+        return {
+            'state': 'ready' if cls.ready() else cls._state,
+            'pid': os.getpid(),
+            'seconds': round(end - cls._started_at, 3) if cls._started_at else None,
+            'steps': dict(cls._steps)
+        }
+
+    @classmethod
+    def _after_fork(cls):
+        was_started = cls._state != 'cold'
+        cls._lock = threading.Lock()
+        cls._state = 'cold'
+        cls._pid = None
+        ProviderSessions.reset()
+        if was_started:
+            cls.start()
+
+    @staticmethod
+    def _warm_providers():
+        return [f"{service_type}:{provider}" for service_type, provider in AIServiceRegistry.configure_from_settings()]
+
+    @staticmethod
+    def _warm_connections():
+        # Connections are pooled per host, which several providers and endpoints can share
+        by_host = {}
+        for service in AIServiceRegistry.registered().values():
+            for url in service.endpoints():
+                by_host.setdefault(urlsplit(url)[:2], url)
+        return {url: ProviderSessions.warm(url) for url in by_host.values()}
+
+    @staticmethod
+    def _warm_catalogue():
+        snapshot = TemplateCatalogue.current()
+        return {'templates': len(snapshot.by_slug), 'ai_models': len(AIModelCache.active())}
+
+    @staticmethod
+    def _warm_layouts():
+        return LayoutSolver.warm(TemplateCatalogue.current().by_slug.values())
+
+    @staticmethod
+    def _warm_prices():
+        if 'payments' not in settings.INSTALLED_APPS or not getattr(settings, 'STRIPE_API_KEY', ''):
+            return None
+        from payments.stripe_service import StripeService
+        return StripeService.warm_prices()
\ No newline at end of file
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,6 +42,9 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
+    'ai_services',
+    'payments',
 ]
 
 MIDDLEWARE = [
@@ -74,14 +81,34 @@ WSGI_APPLICATION = 'manga_maker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Set DATABASE_URL for PostgreSQL; see manga_maker/database.py for the tuning knobs
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR / 'db.sqlite3'),
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/ref/settings/#caches
+
+# Must be shared by every process: scheduler overrides, template and AI model versions,
+# prefetched plans and image variant hashes live here. Set REDIS_URL in deployments;
+# without it a file cache is used, which the processes on one machine share.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'manga-maker-cache')),
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -118,7 +145,184 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded and generated files (panel images, variants)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Manga generation
+# Upper bound on concurrent provider calls shared by all generation jobs
+MANGA_RENDER_MAX_CONCURRENCY = 8
+
+# Chapter batches are split into pages of roughly this many characters
+MANGA_CHAPTER_CHARS_PER_PAGE = 1500
+MANGA_CHAPTER_MAX_PAGES = 40
+
+
+# Long narratives are parsed in overlapping, scene-aligned chunks
+LLM_NARRATIVE_CHUNK_OVERLAP = 500
+LLM_CHUNK_CONCURRENCY = 4
+
+# Tiers whose pages render a fast preview first and upgrade to full quality in the background
+MANGA_PROGRESSIVE_TIERS = ['PRO', 'ENTERPRISE']
+
+# Panel image variants: built in a process pool, keyed by content hash
+MANGA_VARIANT_WORKERS = 2
+MANGA_EAGER_VARIANTS = ['thumb']
+MANGA_VARIANT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# Page export: canvas size in pixels at MANGA_EXPORT_DPI, rendered in a process pool
+MANGA_EXPORT_PAGE_SIZE = (1654, 2339)
+MANGA_EXPORT_DPI = 200
+MANGA_EXPORT_WORKERS = 2
+# Seconds an export stays downloadable after it was last requested; the sweep_exports command deletes it after that
+MANGA_EXPORT_TTL = 24 * 60 * 60
+
+# Panel images are stored once per content hash; unreferenced ones are swept after the grace period
+MANGA_BLOB_GRACE_SECONDS = 60 * 60
+# Seconds between in-process sweeps; None leaves it to the sweep_panel_images command
+MANGA_BLOB_SWEEP_INTERVAL = None
+
+
+# Pipeline telemetry; e.g. 'ai_services.telemetry.LogExporter', 'ai_services.telemetry.PrometheusExporter'
+# (served at /api/metrics) or 'ai_services.telemetry.OpenTelemetryExporter'. Empty disables it.
+MANGA_TELEMETRY_EXPORTERS = []
+# /api/metrics is served to staff users and to scrapers sending "Authorization: Bearer <token>"
+MANGA_METRICS_TOKEN = os.environ.get('MANGA_METRICS_TOKEN', '')
+
+
+# Provider routing: per-tier p95 page latency targets (seconds) and learning rates
+MANGA_TIER_LATENCY_SLO = {'FREE': 180, 'BASIC': 90, 'PRO': 45, 'ENTERPRISE': 30}
+MANGA_ROUTER_EWMA_ALPHA = 0.2
+MANGA_ROUTER_MIN_SAMPLES = 5
+MANGA_ROUTER_MAX_ERROR_RATE = 0.5
+MANGA_ROUTER_STATS_TTL = 300
+
+
+# Weighted fair queuing of generation jobs per process; only the keys that differ
+# from manga.scheduler.DEFAULT_SCHEDULER_CONFIG are needed. Tune live via PATCH
+# /api/scheduler/ or the tune_scheduler command.
+MANGA_SCHEDULER = {
+    'max_in_flight': 8,
+    'aging_seconds': 30,
+    'queue_timeout': 300,
+    'tiers': {
+        'FREE': {'weight': 1, 'max_in_flight': 2},
+        'BASIC': {'weight': 2, 'max_in_flight': 4},
+        'PRO': {'weight': 4, 'max_in_flight': 6},
+        'ENTERPRISE': {'weight': 8, 'max_in_flight': 8},
+    }
+}
+
+
+# A generating project whose worker hasn't finished in this many seconds can be resumed by another request
+MANGA_GENERATION_LEASE_SECONDS = 600
+
+
+# Speculative prefetch: prepare a user's likely next page (LLM breakdown, characters,
+# template) while generation slots are idle. Budgets are segments per user per day.
+MANGA_PREFETCH_ENABLED = False
+MANGA_PREFETCH_DAILY_BUDGET = {'FREE': 0, 'BASIC': 0, 'PRO': 20, 'ENTERPRISE': 100}
+MANGA_PREFETCH_TTL = 600
+MANGA_PREFETCH_IDLE_FRACTION = 0.5
+MANGA_PREFETCH_MAX_CONCURRENCY = 2
+
+
+# Provider responses are streamed under a hard cap; bodies past the spill size
+# go to a memory-mapped temp file, and whole-document JSON parsing is refused
+# past its own, smaller limit
+MANGA_PROVIDER_MAX_RESPONSE_BYTES = 64 * 1024 * 1024
+MANGA_PROVIDER_SPILL_BYTES = 1024 * 1024
+MANGA_PROVIDER_MAX_JSON_BYTES = 8 * 1024 * 1024
+
+
+# Subscription quotas, in pages per quota period
+MANGA_TIER_PAGE_QUOTAS = {'FREE': 5, 'BASIC': 30, 'PRO': 100, 'ENTERPRISE': 500}
+
+
+# Stripe: checkout uses cached per-tier price IDs (pin them with STRIPE_PRICE_IDS);
+# webhooks are verified and queued, and `manage.py process_payment_events` applies them
+BASE_URL = os.environ.get('BASE_URL', 'http://localhost:8000')
+STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY', '')
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+STRIPE_PRICE_IDS = {}
+STRIPE_PRICE_CACHE_TTL = 24 * 60 * 60
+STRIPE_EVENT_BATCH_SIZE = 500
+STRIPE_EVENT_MAX_ATTEMPTS = 5
+
+
+# Length of a page quota period; `manage.py reset_quotas` rolls over the ones that have ended
+MANGA_QUOTA_PERIOD_DAYS = 30
+
+
+# Layout solver, used when a page has a different panel count than its template.
+# Gutter is a fraction of the page; solutions are stored in SolvedLayout.
+MANGA_LAYOUT_GUTTER = 0.02
+MANGA_LAYOUT_MAX_PER_ROW = 4
+MANGA_LAYOUT_TARGET_ASPECT = 1.2
+MANGA_LAYOUT_MEMO_SIZE = 1024
+
+
+# Layout validation, on template save, after layout adaptation and in `manage.py audit_layouts`
+MANGA_LAYOUT_MIN_GUTTER = 0.005
+MANGA_LAYOUT_MIN_COVERAGE = 0.75
+
+
+# AI providers, configured and registered when a worker starts (manga/warm_start.py);
+# providers whose API key is unset are left out
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
+HUGGINGFACE_API_KEY = os.environ.get('HUGGINGFACE_API_KEY', '')
+HUGGINGFACE_MODEL = os.environ.get('HUGGINGFACE_MODEL', 'mistralai/Mistral-7B-Instruct-v0.2')
+STABLE_DIFFUSION_API_KEY = os.environ.get('STABLE_DIFFUSION_API_KEY') or os.environ.get('STABILITY_API_KEY', '')
+STABLE_DIFFUSION_API_URL = os.environ.get('STABLE_DIFFUSION_API_URL', 'https://api.stability.ai/v1')
+NOVELAI_API_KEY = os.environ.get('NOVELAI_API_KEY', '')
+MIDJOURNEY_API_KEY = os.environ.get('MIDJOURNEY_API_KEY', '')
+MANGA_AI_PROVIDERS = {
+    'openai': {
+        'type': 'llm',
+        'class': 'ai_services.providers.openai_llm.OpenAILLMService',
+        'options': {'api_key': OPENAI_API_KEY}
+    },
+    'huggingface': {
+        'type': 'llm',
+        'class': 'ai_services.providers.huggingface_llm.HuggingFaceLLMService',
+        'options': {'api_key': HUGGINGFACE_API_KEY, 'model_name': HUGGINGFACE_MODEL}
+    },
+    **{
+        provider: {
+            'type': 'image',
+            'class': 'ai_services.providers.stable_diffusion_adapter.StableDiffusionService',
+            'options': {'api_key': STABLE_DIFFUSION_API_KEY, 'api_url': STABLE_DIFFUSION_API_URL}
+        }
+        for provider in ('stability-basic', 'stability-standard', 'stability-creative')
+    },
+    'novelai': {
+        'type': 'image',
+        'class': 'ai_services.providers.novelai_adapter.NovelAIService',
+        'options': {'api_key': NOVELAI_API_KEY}
+    },
+    'midjourney': {
+        'type': 'image',
+        'class': 'ai_services.providers.midjourney_adapter.MidjourneyService',
+        'options': {'api_key': MIDJOURNEY_API_KEY}
+    }
+}
+
+
+# Warm start: each WSGI/ASGI worker configures providers, opens keep-alive connections
+# to them and loads the template and layout caches before /api/ready reports it ready
+MANGA_WARM_START = True
+MANGA_PROVIDER_POOL_SIZE = 10
+MANGA_PROVIDER_WARM_CONNECTIONS = 2
+MANGA_PROVIDER_WARM_TIMEOUT = 5
+
+
+# Longest a process keeps its template catalogue snapshot and AI model cache before
+# reloading them, even when no change was signalled through the cache
+MANGA_TEMPLATE_CATALOGUE_MAX_AGE = 300
+MANGA_AI_MODEL_CACHE_MAX_AGE = 300
\ No newline at end of file
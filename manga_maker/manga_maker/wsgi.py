@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'manga_maker.settings')
 
 application = get_wsgi_application()
+
+# Configure providers, open their connections and fill caches before taking traffic;
+# /api/ready/ reports 503 until this has finished
+from manga.warm_start import WorkerBootstrap  # noqa: E402
+
+WorkerBootstrap.start()
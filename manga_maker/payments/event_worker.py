@@ -0,0 +1,236 @@
+# payments/event_worker.py
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from ai_services import telemetry
+from manga.models import UserProfile
+from subscriptions.quota_service import QuotaService
+
+from .models import StripeCustomer, StripeEvent
+from .stripe_service import TIER_PRICING, StripeService
+
+logger = logging.getLogger(__name__)
+
+# Tiers a webhook may move a user to
+TIERS = ('FREE', *TIER_PRICING)
+# Subscription states that keep the paid tier; anything else drops to FREE
+ACTIVE_SUBSCRIPTION_STATUSES = ('active', 'trialing', 'past_due')
+
+
+class PaymentEventWorker:
+    """
+    Apply queued Stripe webhook events to user profiles in batches
+
+    Each batch reads the oldest pending events, works out per user the
+    latest tier (by the event's Stripe timestamp, so late or replayed
+    deliveries can't undo a newer change) and who starts a new quota
+    period, then writes that with one UPDATE per tier and one for the quota
+    resets. Events for a customer that isn't known yet (a subscription
+    event that overtook its checkout) stay pending for a few batches.
+    Updates and cancellations only count for the customer's current
+    subscription, the one from its latest checkout.
+
+    Handled events: checkout.session.completed, customer.subscription.created,
+    customer.subscription.updated, customer.subscription.deleted and
+    invoice.paid. Others are marked ignored.
+    """
+
+    @classmethod
+    def process_batch(cls, limit=None):
+        """
+        Apply one batch of pending events
+
+        Args:
+            limit (int, optional): Events per batch; defaults to STRIPE_EVENT_BATCH_SIZE
+
+        Returns:
+            int: Number of events taken from the queue
+        """
+        limit = limit or getattr(settings, 'STRIPE_EVENT_BATCH_SIZE', 500)
+        with telemetry.span('payments.process_batch'), transaction.atomic():
+            # Concurrent workers skip each other's rows on PostgreSQL
+            events = list(
+                StripeEvent.objects.select_for_update(skip_locked=True)
+                .filter(status='pending')
+                .order_by('created', 'id')[:limit]
+            )
+            if not events:
+                return 0
+
+            actions = []
+            for event in events:
+                try:
+                    action = cls._read(event)
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    event.status, event.error = 'failed', f"Malformed event: {e}"
+                    continue
+                if action is None:
+                    event.status = 'ignored'
+                else:
+                    actions.append(action)
+
+            cls._apply(actions)
+
+            now = timezone.now()
+            for event in events:
+                if event.status != 'pending':
+                    event.processed_at = now
+            StripeEvent.objects.bulk_update(events, ['status', 'attempts', 'error', 'processed_at'])
+
+        for event in events:
+            telemetry.increment('payments.events', type=event.event_type, status=event.status)
+        return len(events)
+
+    @classmethod
+    def drain(cls, limit=None):
+        """Process batches until one comes back short; returns the number of events taken"""
+        limit = limit or getattr(settings, 'STRIPE_EVENT_BATCH_SIZE', 500)
+        total = 0
+        while True:
+            processed = cls.process_batch(limit)
+            total += processed
+            if processed < limit:
+                return total
+
+    @classmethod
+    def _read(cls, event):
+        """Turn an event into what it asks of the user's profile, or None if nothing"""
+        obj = event.payload['data']['object']
+        action = {
+            'event': event,
+            'customer': obj.get('customer'),
+            'user_id': None,
+            'subscription_id': None,
+            'about_subscription': None,
+            'tier': None,
+            'reset_quota': False
+        }
+
+        if event.event_type == 'checkout.session.completed':
+            if obj.get('mode') != 'subscription':
+                return None
+            action['user_id'] = int(obj['client_reference_id'])
+            action['subscription_id'] = obj.get('subscription')
+            action['tier'] = (obj.get('metadata') or {}).get('tier')
+            action['reset_quota'] = True
+        elif event.event_type in ('customer.subscription.created', 'customer.subscription.updated'):
+            if event.event_type == 'customer.subscription.created':
+                action['subscription_id'] = obj['id']
+            else:
+                action['about_subscription'] = obj['id']
+            if obj.get('status') in ACTIVE_SUBSCRIPTION_STATUSES:
+                action['tier'] = cls._subscription_tier(obj)
+            else:
+                action['tier'] = 'FREE'
+        elif event.event_type == 'customer.subscription.deleted':
+            action['about_subscription'] = obj['id']
+            action['tier'] = 'FREE'
+        elif event.event_type == 'invoice.paid':
+            # Only renewals start a new period; the first invoice comes with the checkout
+            if obj.get('billing_reason') != 'subscription_cycle':
+                return None
+            action['reset_quota'] = True
+        else:
+            return None
+
+        if action['tier'] is not None and action['tier'] not in TIERS:
+            raise ValueError(f"unknown tier {action['tier']!r}")
+        if not action['customer']:
+            raise ValueError("no customer")
+        return action
+
+    @classmethod
+    def _apply(cls, actions):
+        """Resolve customers to users and write the batch's changes in bulk"""
+        # A checkout for an account deleted since can't be linked; failing it
+        # here keeps its foreign key error from rolling back the whole batch
+        checkout_users = {a['user_id'] for a in actions if a['user_id'] is not None}
+        existing_users = set(User.objects.filter(id__in=checkout_users).values_list('id', flat=True))
+        for action in actions:
+            if action['user_id'] is not None and action['user_id'] not in existing_users:
+                event = action['event']
+                event.status, event.error = 'failed', f"Checkout for unknown user {action['user_id']}"
+        actions = [a for a in actions if a['event'].status == 'pending']
+        if not actions:
+            return
+
+        # Customers linked by checkouts in this batch, then those already known
+        links = {a['customer']: a['user_id'] for a in actions if a['user_id'] is not None}
+        customers = {
+            customer.customer_id: customer
+            for customer in StripeCustomer.objects.filter(customer_id__in={a['customer'] for a in actions})
+        }
+        new_customers = [
+            StripeCustomer(customer_id=customer_id, user_id=user_id)
+            for customer_id, user_id in links.items() if customer_id not in customers
+        ]
+        StripeCustomer.objects.bulk_create(new_customers, ignore_conflicts=True)
+        customers.update({
+            customer.customer_id: customer
+            for customer in StripeCustomer.objects.filter(customer_id__in=[c.customer_id for c in new_customers])
+        })
+
+        latest_tier = {}  # user_id -> (created, tier)
+        resets = set()
+        changed_customers = set()
+        for action in actions:
+            event = action['event']
+            customer = customers.get(action['customer'])
+            if customer is None:
+                event.attempts += 1
+                if event.attempts >= getattr(settings, 'STRIPE_EVENT_MAX_ATTEMPTS', 5):
+                    event.status, event.error = 'failed', f"Unknown customer {action['customer']}"
+                continue
+            event.status = 'processed'
+
+            # Every checkout starts a new subscription, so updates and cancellations of
+            # one the user has since replaced (the old plan after an upgrade) are ignored
+            if action['about_subscription'] and customer.subscription_id not in ('', action['about_subscription']):
+                continue
+            if action['subscription_id'] and customer.subscription_id != action['subscription_id']:
+                customer.subscription_id = action['subscription_id']
+                changed_customers.add(customer)
+            if action['tier'] is not None and event.created >= customer.tier_changed_at:
+                customer.tier_changed_at = event.created
+                changed_customers.add(customer)
+                current = latest_tier.get(customer.user_id)
+                if current is None or event.created >= current[0]:
+                    latest_tier[customer.user_id] = (event.created, action['tier'])
+            if action['reset_quota']:
+                resets.add(customer.user_id)
+
+        by_tier = defaultdict(list)
+        for user_id, (_, tier) in latest_tier.items():
+            by_tier[tier].append(user_id)
+        for tier, user_ids in by_tier.items():
+            UserProfile.objects.filter(user_id__in=user_ids).update(
+                subscription_tier=tier,
+                pages_quota=QuotaService.quota_for_tier(tier)
+            )
+        if resets:
+            UserProfile.objects.filter(user_id__in=resets).update(
+                pages_created=0,
+                quota_reset_date=QuotaService.next_reset_date(timezone.localdate())
+            )
+        if changed_customers:
+            StripeCustomer.objects.bulk_update(changed_customers, ['subscription_id', 'tier_changed_at'])
+        logger.info(
+            "Applied payment events: %d tier changes, %d quota resets",
+            len(latest_tier), len(resets)
+        )
+
+    @staticmethod
+    def _subscription_tier(subscription):
+        tier = (subscription.get('metadata') or {}).get('tier')
+        if tier:
+            return tier
+        for item in (subscription.get('items') or {}).get('data', []):
+            tier = StripeService.tier_for_price(item.get('price') or {})
+            if tier:
+                return tier
+        raise ValueError("subscription has no recognisable tier")
\ No newline at end of file
@@ -0,0 +1,33 @@
+# payments/management/commands/process_payment_events.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.event_worker import PaymentEventWorker
+from payments.models import StripeEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply queued Stripe webhook events (tier changes and quota resets) to user profiles in "
+        "batches. Drains the queue once, or with --loop keeps polling for new events."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Events per batch (default STRIPE_EVENT_BATCH_SIZE)")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for events")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            processed = PaymentEventWorker.drain(options['batch_size'])
+            if processed or not options['loop']:
+                failed = StripeEvent.objects.filter(status='failed').count()
+                self.stdout.write(
+                    f"Processed {processed} events in {time.perf_counter() - started:.2f}s "
+                    f"({failed} failed in total)"
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
\ No newline at end of file
@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class StripeEvent(models.Model):
+    """A verified Stripe webhook event, queued for the payment event worker"""
+    event_id = models.CharField(max_length=255, unique=True)  # Stripe retries deliveries; one row per event
+    event_type = models.CharField(max_length=100)
+    created = models.BigIntegerField()  # Stripe's Unix timestamp, used to order tier changes
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=10,
+        choices=[
+            ('pending', 'Pending'),
+            ('processed', 'Processed'),
+            ('ignored', 'Ignored'),
+            ('failed', 'Failed')
+        ],
+        default='pending'
+    )
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue scan
+            models.Index(fields=['status', 'created'], name='stripeevent_queue_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
+
+
+class StripeCustomer(models.Model):
+    """Links a Stripe customer to the user who checked out as it"""
+    customer_id = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stripe_customers')
+    subscription_id = models.CharField(max_length=255, blank=True)
+    tier_changed_at = models.BigIntegerField(default=0)  # created time of the last tier event applied
+
+    def __str__(self):
+        return f"{self.customer_id} ({self.user})"
\ No newline at end of file
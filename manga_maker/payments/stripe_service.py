@@ -1,36 +1,161 @@
 # payments/stripe_service.py
+import json
+import threading
+
 import stripe
 from django.conf import settings
+from django.core.cache import cache
 
 stripe.api_key = settings.STRIPE_API_KEY
+# Transient network errors are retried by the client instead of failing checkout
+stripe.max_network_retries = getattr(settings, 'STRIPE_MAX_NETWORK_RETRIES', 2)
+
+TIER_PRICING = {
+    'BASIC': {'price': 999, 'name': 'Basic Subscription'},
+    'PRO': {'price': 1999, 'name': 'Pro Subscription'},
+    'ENTERPRISE': {'price': 4999, 'name': 'Enterprise Subscription'}
+}
+# Prices are found again by lookup key, so each tier has exactly one
+PRICE_LOOKUP_PREFIX = 'manga-'
+
 
 class StripeService:
+    """
+    Checkout sessions, tier prices and webhook verification
+
+    Each tier's recurring price is created in Stripe once, under the lookup
+    key 'manga-<tier>', and its ID is kept in the process and in the Django
+    cache, so a checkout costs a single Stripe call. STRIPE_PRICE_IDS pins
+    the IDs instead when prices are managed in the Stripe dashboard.
+    """
+    _price_ids = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def create_checkout_session(user, tier):
-        tier_pricing = {
-            'BASIC': {'price': 999, 'name': 'Basic Subscription'},
-            'PRO': {'price': 1999, 'name': 'Pro Subscription'},
-            'ENTERPRISE': {'price': 4999, 'name': 'Enterprise Subscription'}
-        }
-        
-        price_data = tier_pricing[tier]
-        
+        """
+        Start a subscription checkout for a user
+
+        Args:
+            user (User): The subscribing user
+            tier (str): Tier to subscribe to, a key of TIER_PRICING
+
+        Returns:
+            dict: The session's 'id' and the 'url' to send the user to
+        """
         session = stripe.checkout.Session.create(
             payment_method_types=['card'],
             line_items=[{
-                'price_data': {
-                    'currency': 'usd',
-                    'product_data': {
-                        'name': price_data['name'],
-                    },
-                    'unit_amount': price_data['price'],
-                },
+                'price': StripeService.price_id(tier),
                 'quantity': 1,
             }],
             mode='subscription',
             success_url=settings.BASE_URL + '/payment/success?session_id={CHECKOUT_SESSION_ID}',
             cancel_url=settings.BASE_URL + '/payment/cancel',
-            client_reference_id=str(user.id)
+            client_reference_id=str(user.id),
+            metadata={'tier': tier},
+            # Subscription events carry the tier too, without a price lookup
+            subscription_data={'metadata': {'tier': tier}}
+        )
+
+        return {'id': session.id, 'url': session.url}
+
+    @classmethod
+    def price_id(cls, tier):
+        """
+        Return the Stripe price ID of a tier, creating the price on first use
+
+        Raises:
+            KeyError: If the tier has no pricing
+        """
+        price_id = cls._price_ids.get(tier)
+        if price_id:
+            return price_id
+
+        pricing = TIER_PRICING[tier]
+        price_id = getattr(settings, 'STRIPE_PRICE_IDS', {}).get(tier) or cache.get(cls._cache_key(tier))
+        if not price_id:
+            with cls._lock:
+                price_id = cls._price_ids.get(tier) or cls._find_or_create_price(tier, pricing)
+            cache.set(cls._cache_key(tier), price_id, getattr(settings, 'STRIPE_PRICE_CACHE_TTL', 24 * 60 * 60))
+        cls._price_ids[tier] = price_id
+        return price_id
+
+    @classmethod
+    def warm_prices(cls):
+        """Resolve every tier's price ID, so no checkout has to"""
+        return {tier: cls.price_id(tier) for tier in TIER_PRICING}
+
+    @classmethod
+    def clear_price_cache(cls):
+        cls._price_ids = {}
+        cache.delete_many([cls._cache_key(tier) for tier in TIER_PRICING])
+
+    @classmethod
+    def tier_for_price(cls, price):
+        """
+        Return the tier a Stripe price object belongs to, or None
+
+        Args:
+            price (dict): Price from an event payload
+        """
+        lookup_key = price.get('lookup_key') or ''
+        if lookup_key.startswith(PRICE_LOOKUP_PREFIX):
+            tier = lookup_key[len(PRICE_LOOKUP_PREFIX):].upper()
+            if tier in TIER_PRICING:
+                return tier
+        for tier, price_id in {**cls._price_ids, **getattr(settings, 'STRIPE_PRICE_IDS', {})}.items():
+            if price_id == price.get('id'):
+                return tier
+        return None
+
+    @staticmethod
+    def verify_event(payload, signature):
+        """
+        Check a webhook delivery's signature and decode its event
+
+        Args:
+            payload (bytes): Raw request body
+            signature (str): Stripe-Signature header
+
+        Returns:
+            dict: The event
+
+        Raises:
+            ValueError: If the signature is invalid or too old, or the body isn't an event
+        """
+        try:
+            stripe.WebhookSignature.verify_header(
+                payload.decode('utf-8'),
+                signature,
+                settings.STRIPE_WEBHOOK_SECRET,
+                getattr(settings, 'STRIPE_WEBHOOK_TOLERANCE', 300)
+            )
+        except stripe.SignatureVerificationError as e:
+            raise ValueError(f"Invalid Stripe signature: {e}")
+        except UnicodeDecodeError:
+            raise ValueError("Webhook body is not UTF-8")
+
+        event = json.loads(payload)
+        if not isinstance(event, dict) or not {'id', 'type', 'created', 'data'} <= event.keys():
+            raise ValueError("Webhook body is not a Stripe event")
+        return event
+
+    @staticmethod
+    def _find_or_create_price(tier, pricing):
+        lookup_key = f"{PRICE_LOOKUP_PREFIX}{tier.lower()}"
+        existing = stripe.Price.list(lookup_keys=[lookup_key], active=True, limit=1)
+        if existing.data:
+            return existing.data[0].id
+        price = stripe.Price.create(
+            currency='usd',
+            unit_amount=pricing['price'],
+            recurring={'interval': 'month'},
+            product_data={'name': pricing['name']},
+            lookup_key=lookup_key
         )
-        
-        return session.id
\ No newline at end of file
+        return price.id
+
+    @staticmethod
+    def _cache_key(tier):
+        return f"stripe-price:{tier}"
\ No newline at end of file
@@ -0,0 +1,278 @@
+# payments/stripe_stub.py
+import hashlib
+import hmac
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+import stripe
+
+from .stripe_service import StripeService
+
+
+def sign_payload(payload, secret, timestamp=None):
+    """
+    Build the Stripe-Signature header Stripe would send with a payload
+
+    Args:
+        payload (bytes): Webhook request body
+        secret (str): Endpoint signing secret
+        timestamp (int, optional): Signing time; defaults to now
+
+    Returns:
+        str: Header value
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed = f"{timestamp}.".encode() + payload
+    digest = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def _unflatten(pairs):
+    """Rebuild Stripe's form encoding (a[b][0]=c) into nested dicts and lists"""
+    result = {}
+    for key, value in pairs:
+        parts = key.replace(']', '').split('[')
+        target = result
+        for part, following in zip(parts, parts[1:]):
+            container = [] if following.isdigit() else {}
+            if isinstance(target, list):
+                index = int(part)
+                target.extend([None] * (index + 1 - len(target)))
+                if target[index] is None:
+                    target[index] = container
+                target = target[index]
+            else:
+                target = target.setdefault(part, container)
+        if isinstance(target, list):
+            index = int(parts[-1])
+            target.extend([None] * (index + 1 - len(target)))
+            target[index] = value
+        else:
+            target[parts[-1]] = value
+    return result
+
+
+class StripeStubHandler(BaseHTTPRequestHandler):
+    """Answers the Stripe API calls StripeService makes"""
+    server_version = "StripeStub/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = _unflatten(parse_qsl(url.query))
+        self.server.count(f"GET {url.path}")
+        if url.path == '/v1/prices':
+            lookup_keys = params.get('lookup_keys', [])
+            with self.server.lock:
+                prices = [
+                    price for price in self.server.prices.values()
+                    if not lookup_keys or price['lookup_key'] in lookup_keys
+                ]
+            return self._send_json(200, {'object': 'list', 'url': '/v1/prices', 'has_more': False, 'data': prices})
+        self._send_json(404, {'error': {'type': 'invalid_request_error', 'message': f"Unknown path {url.path}"}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        params = _unflatten(parse_qsl(self.rfile.read(length).decode()))
+        self.server.count(f"POST {url.path}")
+        routes = {
+            '/v1/prices': self.server.create_price,
+            '/v1/checkout/sessions': self.server.create_checkout_session,
+        }
+        handler = routes.get(url.path)
+        if handler is None:
+            return self._send_json(404, {'error': {'type': 'invalid_request_error', 'message': f"Unknown path {url.path}"}})
+        self._send_json(200, handler(params))
+
+    def _send_json(self, status, data):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StripeStubServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the Stripe API and its webhook deliveries
+
+    Serves price listing and creation and checkout session creation, and
+    plays the customer's side afterwards: complete_checkout(), renew(),
+    change_tier() and cancel() send the signed webhook events Stripe would.
+    Events are POSTed to webhook_url, or handed to deliver() when a test
+    replaces it (e.g. with a Django test client call).
+
+        stub = StripeStubServer(webhook_secret=settings.STRIPE_WEBHOOK_SECRET)
+        use_stripe_stub(stub.start())
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, webhook_url=None, webhook_secret='whsec_stub'):
+        super().__init__((host, port), StripeStubHandler)
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.prices = {}
+        self.sessions = {}
+        self.subscriptions = {}
+        self.events = []
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self._clock = itertools.count(int(time.time()))
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, route):
+        with self.lock:
+            self.requests[route] += 1
+
+    def start(self):
+        """Serve from a daemon thread and return the base URL"""
+        self._thread = threading.Thread(target=self.serve_forever, name='stripe-stub', daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    # API
+
+    def create_price(self, params):
+        price = {
+            'id': f"price_{uuid.uuid4().hex[:14]}",
+            'object': 'price',
+            'active': True,
+            'currency': params.get('currency', 'usd'),
+            'unit_amount': int(params.get('unit_amount', 0)),
+            'recurring': params.get('recurring'),
+            'lookup_key': params.get('lookup_key'),
+            'product': f"prod_{uuid.uuid4().hex[:14]}"
+        }
+        with self.lock:
+            self.prices[price['id']] = price
+        return price
+
+    def create_checkout_session(self, params):
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        session = {
+            'id': session_id,
+            'object': 'checkout.session',
+            'mode': params.get('mode'),
+            'client_reference_id': params.get('client_reference_id'),
+            'metadata': params.get('metadata', {}),
+            'subscription_data': params.get('subscription_data', {}),
+            'line_items': params.get('line_items', []),
+            'customer': None,
+            'subscription': None,
+            'url': f"{self.base_url}/pay/{session_id}"
+        }
+        with self.lock:
+            self.sessions[session_id] = session
+        return session
+
+    # Customer actions
+
+    def complete_checkout(self, session_id):
+        """Pay for a checkout session; sends checkout.session.completed and customer.subscription.created"""
+        with self.lock:
+            session = self.sessions[session_id]
+            price = self.prices[session['line_items'][0]['price']]
+        session['customer'] = f"cus_{uuid.uuid4().hex[:14]}"
+        subscription = self._subscription(session['customer'], price, session['subscription_data'].get('metadata', {}))
+        session['subscription'] = subscription['id']
+        return [
+            self.send_event('checkout.session.completed', {k: v for k, v in session.items() if k != 'line_items'}),
+            self.send_event('customer.subscription.created', subscription)
+        ]
+
+    def renew(self, subscription_id):
+        """Bill the next period; sends invoice.paid"""
+        subscription = self.subscriptions[subscription_id]
+        return self.send_event('invoice.paid', {
+            'id': f"in_{uuid.uuid4().hex[:14]}",
+            'object': 'invoice',
+            'customer': subscription['customer'],
+            'subscription': subscription_id,
+            'billing_reason': 'subscription_cycle',
+            'paid': True
+        })
+
+    def change_tier(self, subscription_id, lookup_key):
+        """Switch the subscription to the price with a lookup key; sends customer.subscription.updated"""
+        subscription = self.subscriptions[subscription_id]
+        with self.lock:
+            price = next(price for price in self.prices.values() if price['lookup_key'] == lookup_key)
+        subscription['items']['data'][0]['price'] = price
+        # A dashboard change leaves the checkout's metadata behind
+        subscription['metadata'] = {}
+        return self.send_event('customer.subscription.updated', subscription)
+
+    def cancel(self, subscription_id):
+        """End the subscription; sends customer.subscription.deleted"""
+        subscription = self.subscriptions[subscription_id]
+        subscription['status'] = 'canceled'
+        return self.send_event('customer.subscription.deleted', subscription)
+
+    def send_event(self, event_type, obj):
+        """Wrap an object in an event, sign it and deliver it; returns the event"""
+        event = {
+            'id': f"evt_{uuid.uuid4().hex[:14]}",
+            'object': 'event',
+            'type': event_type,
+            'created': next(self._clock),
+            'livemode': False,
+            'data': {'object': json.loads(json.dumps(obj))}
+        }
+        payload = json.dumps(event).encode()
+        self.events.append(event)
+        self.deliver(payload, sign_payload(payload, self.webhook_secret))
+        return event
+
+    def deliver(self, payload, signature):
+        if self.webhook_url is None:
+            return None
+        return requests.post(
+            self.webhook_url,
+            data=payload,
+            headers={'Content-Type': 'application/json', 'Stripe-Signature': signature},
+            timeout=10
+        )
+
+    def _subscription(self, customer, price, metadata):
+        subscription = {
+            'id': f"sub_{uuid.uuid4().hex[:14]}",
+            'object': 'subscription',
+            'customer': customer,
+            'status': 'active',
+            'metadata': dict(metadata),
+            'items': {'object': 'list', 'data': [{'id': f"si_{uuid.uuid4().hex[:14]}", 'price': price}]}
+        }
+        self.subscriptions[subscription['id']] = subscription
+        return subscription
+
+
+def use_stripe_stub(base_url):
+    """
+    Point the stripe client at a stub server
+
+    Args:
+        base_url (str): Stub root, e.g. 'http://127.0.0.1:12111'
+    """
+    stripe.api_base = base_url
+    stripe.api_key = 'sk_test_stub'
+    StripeService.clear_price_cache()
\ No newline at end of file
@@ -0,0 +1,123 @@
+# payments/tests.py
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from manga.models import UserProfile
+
+from .event_worker import PaymentEventWorker
+from .models import StripeCustomer, StripeEvent
+
+
+class PaymentEventWorkerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='subscriber')
+        UserProfile.objects.create(user=self.user)
+        self.events = 0
+
+    def queue(self, event_type, created, **obj):
+        self.events += 1
+        obj.setdefault('customer', 'cus_1')
+        return StripeEvent.objects.create(
+            event_id=f'evt_{self.events}', event_type=event_type, created=created,
+            payload={'data': {'object': obj}}
+        )
+
+    def checkout(self, created, tier, subscription):
+        return self.queue(
+            'checkout.session.completed', created, mode='subscription', client_reference_id=str(self.user.id),
+            subscription=subscription, metadata={'tier': tier}
+        )
+
+    def profile(self):
+        return UserProfile.objects.get(user=self.user)
+
+    def test_cancelling_the_replaced_subscription_keeps_the_upgrade(self):
+        self.checkout(100, 'BASIC', 'sub_old')
+        self.checkout(200, 'PRO', 'sub_new')
+        self.queue('customer.subscription.updated', 300, id='sub_old', status='canceled',
+                   metadata={'tier': 'BASIC'})
+        self.queue('customer.subscription.deleted', 301, id='sub_old')
+
+        PaymentEventWorker.drain()
+
+        self.assertEqual(self.profile().subscription_tier, 'PRO')
+        self.assertEqual(StripeCustomer.objects.get(customer_id='cus_1').subscription_id, 'sub_new')
+
+    def test_cancelling_the_current_subscription_drops_to_free(self):
+        self.checkout(100, 'PRO', 'sub_1')
+        self.queue('customer.subscription.deleted', 200, id='sub_1')
+
+        PaymentEventWorker.drain()
+
+        self.assertEqual(self.profile().subscription_tier, 'FREE')
+
+    def test_late_delivery_of_an_older_change_is_ignored(self):
+        self.checkout(100, 'BASIC', 'sub_1')
+        self.queue('customer.subscription.updated', 300, id='sub_1', status='active', metadata={'tier': 'PRO'})
+        PaymentEventWorker.drain()
+
+        self.queue('customer.subscription.updated', 200, id='sub_1', status='active', metadata={'tier': 'BASIC'})
+        PaymentEventWorker.drain()
+
+        self.assertEqual(self.profile().subscription_tier, 'PRO')
+        self.assertEqual(self.profile().pages_quota, 100)
+
+    def test_newest_change_in_a_batch_wins(self):
+        self.checkout(100, 'BASIC', 'sub_1')
+        self.queue('customer.subscription.updated', 300, id='sub_1', status='active', metadata={'tier': 'ENTERPRISE'})
+        self.queue('customer.subscription.updated', 200, id='sub_1', status='past_due', metadata={'tier': 'PRO'})
+
+        PaymentEventWorker.drain(limit=10)
+
+        self.assertEqual(self.profile().subscription_tier, 'ENTERPRISE')
+        self.assertEqual(set(StripeEvent.objects.values_list('status', flat=True)), {'processed'})
+
+    def test_events_for_an_unknown_customer_wait_for_the_checkout(self):
+        update = self.queue('customer.subscription.updated', 200, id='sub_1', status='active',
+                            metadata={'tier': 'PRO'})
+        PaymentEventWorker.drain()
+        update.refresh_from_db()
+        self.assertEqual((update.status, update.attempts), ('pending', 1))
+
+        self.checkout(100, 'BASIC', 'sub_1')
+        PaymentEventWorker.drain()
+
+        update.refresh_from_db()
+        self.assertEqual(update.status, 'processed')
+        self.assertEqual(self.profile().subscription_tier, 'PRO')
+
+    @override_settings(STRIPE_EVENT_MAX_ATTEMPTS=2)
+    def test_events_for_an_unknown_customer_fail_eventually(self):
+        update = self.queue('customer.subscription.deleted', 200, id='sub_1')
+
+        for _ in range(2):
+            PaymentEventWorker.drain()
+
+        update.refresh_from_db()
+        self.assertEqual(update.status, 'failed')
+        self.assertIn('Unknown customer', update.error)
+
+    def test_renewal_starts_a_new_quota_period(self):
+        self.checkout(100, 'PRO', 'sub_1')
+        PaymentEventWorker.drain()
+        UserProfile.objects.filter(user=self.user).update(pages_created=40)
+
+        self.queue('invoice.paid', 200, billing_reason='subscription_create')
+        PaymentEventWorker.drain()
+        self.assertEqual(self.profile().pages_created, 40)
+
+        self.queue('invoice.paid', 300, billing_reason='subscription_cycle')
+        PaymentEventWorker.drain()
+        self.assertEqual(self.profile().pages_created, 0)
+
+    def test_malformed_and_unhandled_events(self):
+        malformed = self.queue('customer.subscription.updated', 100, id='sub_1', status='active',
+                               metadata={'tier': 'GOLD'})
+        unhandled = self.queue('charge.refunded', 100)
+
+        PaymentEventWorker.drain()
+
+        malformed.refresh_from_db()
+        unhandled.refresh_from_db()
+        self.assertEqual(malformed.status, 'failed')
+        self.assertEqual(unhandled.status, 'ignored')
\ No newline at end of file
@@ -0,0 +1,9 @@
+# payments/urls.py
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('payments/checkout/', views.checkout, name='payments-checkout'),
+    path('payments/webhook/', views.stripe_webhook, name='payments-webhook'),
+]
\ No newline at end of file
@@ -0,0 +1,64 @@
+# payments/views.py
+import logging
+
+import stripe
+from django.db import IntegrityError
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ai_services import telemetry
+
+from .models import StripeEvent
+from .stripe_service import TIER_PRICING, StripeService
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def checkout(request):
+    """Start a Stripe checkout for the tier in the request body"""
+    tier = request.data.get('tier')
+    if tier not in TIER_PRICING:
+        return Response(
+            {'error': f"tier must be one of {', '.join(TIER_PRICING)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        session = StripeService.create_checkout_session(request.user, tier)
+    except stripe.StripeError as e:
+        logger.warning("Stripe checkout failed: %s", e)
+        return Response({'error': 'Payment provider unavailable'}, status=status.HTTP_502_BAD_GATEWAY)
+    return Response({'session_id': session['id'], 'url': session['url']}, status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    """
+    Receive a Stripe webhook delivery
+
+    Only verifies and queues the event; PaymentEventWorker applies it. A
+    redelivered event is acknowledged without being queued twice.
+    """
+    try:
+        event = StripeService.verify_event(request.body, request.headers.get('Stripe-Signature', ''))
+    except ValueError as e:
+        telemetry.increment('payments.webhook_rejected')
+        return HttpResponseBadRequest(str(e))
+
+    try:
+        _, created = StripeEvent.objects.get_or_create(
+            event_id=event['id'],
+            defaults={'event_type': event['type'], 'created': event['created'], 'payload': event}
+        )
+    except IntegrityError:
+        # The same delivery raced itself
+        created = False
+    telemetry.increment('payments.webhook_events', type=event['type'], duplicate=str(not created).lower())
+    return HttpResponse(status=200)
\ No newline at end of file
@@ -0,0 +1,84 @@
+# subscriptions/quota_service.py
+import datetime
+
+from django.conf import settings
+from django.db.models import F
+
+# Pages a subscription tier may create per quota period
+DEFAULT_TIER_PAGE_QUOTAS = {'FREE': 5, 'BASIC': 30, 'PRO': 100, 'ENTERPRISE': 500}
+
+
+class QuotaExceeded(Exception):
+    """Raised when a user has no page quota left for the requested work"""
+    pass
+
+
+class QuotaService:
+    @staticmethod
+    def quota_for_tier(tier):
+        """
+        Return the page quota of a subscription tier
+
+        Args:
+            tier (str): Subscription tier, e.g. 'PRO'
+
+        Returns:
+            int: Pages per quota period, from MANGA_TIER_PAGE_QUOTAS
+        """
+        return QuotaService.tier_quotas().get(tier, DEFAULT_TIER_PAGE_QUOTAS['FREE'])
+
+    @staticmethod
+    def tier_quotas():
+        """
+        Return the page quota of every configured tier
+
+        Returns:
+            dict: Tier to pages per quota period, MANGA_TIER_PAGE_QUOTAS or the defaults
+        """
+        return getattr(settings, 'MANGA_TIER_PAGE_QUOTAS', DEFAULT_TIER_PAGE_QUOTAS)
+
+    @staticmethod
+    def next_reset_date(start):
+        """
+        Return when a quota period starting on a date ends
+
+        UserProfile.quota_reset_date holds this date; the reset_quotas
+        command rolls over every profile whose date has come.
+
+        Args:
+            start (datetime.date): First day of the period
+
+        Returns:
+            datetime.date: start plus MANGA_QUOTA_PERIOD_DAYS
+        """
+        return start + datetime.timedelta(days=getattr(settings, 'MANGA_QUOTA_PERIOD_DAYS', 30))
+
+    @staticmethod
+    def check_user_quota(user_profile, pages=1):
+        """
+        Check whether a user can create the given number of pages
+
+        Args:
+            user_profile (UserProfile): Profile of the requesting user
+            pages (int): Number of pages about to be generated
+
+        Returns:
+            bool: True if the remaining quota covers the pages
+        """
+        return user_profile.remaining_pages >= pages
+
+    @staticmethod
+    def increment_usage(user_profile, pages=1):
+        """
+        Record generated pages against the user's quota
+
+        Uses an F() expression so concurrent generations can't lose updates.
+
+        Args:
+            user_profile (UserProfile): Profile of the requesting user
+            pages (int): Number of pages generated
+        """
+        type(user_profile).objects.filter(pk=user_profile.pk).update(
+            pages_created=F('pages_created') + pages
+        )
+        user_profile.pages_created += pages
\ No newline at end of file